@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# archive.py
+"""
+Lấy dữ liệu cầu thủ cho nhiều giải đấu và nhiều mùa giải trong một lần chạy.
+
+Mỗi cặp (giải, mùa) là một phân vùng: các bảng của phân vùng được tải song song
+(dùng chung giới hạn theo host và cache HTML), phân tích trong pool tiến trình dùng chung
+(parse_pool.py), gộp bằng `get_players_from_table`/`update_players` như main.py, rồi ghi ra:
+    <ARCHIVE_DIR>/league=<giải>/season=<mùa>/part-0.parquet   (hoặc part-0.csv nếu thiếu pyarrow)
+
+Phân vùng đã có file kết quả sẽ được bỏ qua (trừ khi dùng --force), nên có thể chạy lại
+sau khi bị gián đoạn.
+
+Ví dụ:
+    python archive.py --leagues Premier-League La-Liga --seasons 2021-2022 2022-2023
+"""
+import argparse
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from config import (
+    FBREF_COMPS_URL, COMPETITIONS, ARCHIVE_SEASONS, ARCHIVE_DIR, ARCHIVE_PARTITION_WORKERS,
+    TABLE_IDS, TABLE_PAGES, STATS_BY_TABLE, MIN_MINUTES, EXPORT_STATS, HEADER_ORDER, STAT_TYPES,
+    DRIVER_POOL_SIZE, DRIVER_MAX_PAGES, DRIVER_LEAN_PROFILE,
+    FETCH_WORKERS, FETCH_PER_HOST, USE_HTTP_FETCH, USE_ASYNC_FETCH, PARSE_PROCESSES,
+    RATE_LIMIT_RATE, RATE_LIMIT_MIN_RATE, RATE_LIMIT_MAX_RATE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_BACKOFF,
+    PAGE_CACHE_DIR, PAGE_CACHE_TTL, PAGE_CACHE_MAX_BYTES, RUN_REPORT_FILE
+)
+from scraper import get_players_from_table, update_players, fetch_table_htmls, PlayerIndex
+from player_table import PlayerTable
+from driver_pool import configure_driver_pool, shutdown_driver_pool
+from page_cache import configure_page_cache
+from parse_pool import configure_parse_pool, get_parse_pool, shutdown_parse_pool
+from rate_limit import configure_rate_limiter
+from results_io import write_parquet
+from run_report import configure_run_report, get_run_report
+
+
+class Partition(NamedTuple):
+    """Một phân vùng của kho dữ liệu: một giải đấu trong một mùa giải."""
+    league: str
+    season: str
+
+    @property
+    def comp_id(self) -> int:
+        return COMPETITIONS[self.league]
+
+
+def table_url(partition: Partition, table_id: str) -> str:
+    """Dựng URL trang fbref chứa bảng `table_id` của phân vùng."""
+    page = TABLE_PAGES[table_id]
+    season = partition.season
+    return f"{FBREF_COMPS_URL}/{partition.comp_id}/{season}/{page}/{season}-{partition.league}-Stats"
+
+
+def plan_tables(required_stats: List[str]) -> Tuple[str, List[str], Dict[str, List[str]]]:
+    """
+    Chia các data-stat cần lấy theo bảng (giống main.py).
+    Trả về (bảng chính, các trường của bảng chính, dict bảng phụ -> các trường cần gộp).
+    """
+    required = set(required_stats)
+    main_table_id = TABLE_IDS['standard']
+    base_fields = set(f for f in STATS_BY_TABLE[main_table_id] if f in required)
+    base_fields.update(('player', 'minutes'))
+
+    addtl_tables: Dict[str, List[str]] = {}
+    for table_id, table_fields in STATS_BY_TABLE.items():
+        if table_id == main_table_id:
+            continue
+        fields = [f for f in table_fields if f in required]
+        if fields and table_id in TABLE_PAGES:
+            addtl_tables[table_id] = fields
+    return main_table_id, list(base_fields), addtl_tables
+
+
+def plan_partitions(leagues: List[str], seasons: List[str]) -> List[Partition]:
+    """Khai triển danh sách giải x mùa thành hàng đợi phân vùng (bỏ giải không có trong COMPETITIONS)."""
+    partitions = []
+    for league in leagues:
+        if league not in COMPETITIONS:
+            print(f"[WARNING] Khong co ma giai cho '{league}' trong COMPETITIONS, bo qua.")
+            continue
+        for season in seasons:
+            partitions.append(Partition(league, season))
+    return partitions
+
+
+def partition_dir(out_dir: str, partition: Partition) -> str:
+    return os.path.join(out_dir, f"league={partition.league}", f"season={partition.season}")
+
+
+def existing_output(out_dir: str, partition: Partition) -> Optional[str]:
+    """File kết quả đã ghi của phân vùng (parquet hoặc csv), None nếu chưa có."""
+    directory = partition_dir(out_dir, partition)
+    for name in ('part-0.parquet', 'part-0.csv'):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def scrape_partition(partition: Partition, min_mins: int = MIN_MINUTES) -> Optional[pd.DataFrame]:
+    """Tải và gộp tất cả các bảng của một phân vùng, trả về DataFrame (None nếu thất bại)."""
+    main_table_id, base_fields, addtl_tables = plan_tables(EXPORT_STATS)
+    table_urls = {main_table_id: table_url(partition, main_table_id)}
+    for table_id in addtl_tables:
+        table_urls[table_id] = table_url(partition, table_id)
+
+    report = get_run_report()
+    label = f"{partition.league} {partition.season}"
+    with report.span('fetch', partition=label, tables=len(table_urls)):
+        htmls = fetch_table_htmls(
+            table_urls,
+            max_workers=FETCH_WORKERS,
+            use_http=USE_HTTP_FETCH,
+            use_async=USE_ASYNC_FETCH
+        )
+    # Phân tích trong tiến trình con, chỉ nhận về các hàng dạng tuple
+    with report.span('parse', partition=label, bytes=sum(len(h) for h in htmls.values() if h)):
+        tables = get_parse_pool().extract_tables(htmls)
+    htmls.clear()
+
+    player_index = PlayerIndex()
+    player_table = PlayerTable(EXPORT_STATS, STAT_TYPES)
+    main_rows = tables.get(main_table_id)
+    with report.span('merge', partition=label, table=main_table_id):
+        players = get_players_from_table(
+            url=table_urls[main_table_id],
+            table_id=main_table_id,
+            fetch_fields=base_fields,
+            min_mins=min_mins,
+            index=player_index,
+            table=player_table,
+            rows=main_rows.iter_cells() if main_rows is not None else ()
+        )
+    if not players:
+        print(f"[ERROR] {partition.league} {partition.season}: khong co cau thu nao (> {min_mins} phut).")
+        return None
+
+    for table_id, fields in addtl_tables.items():
+        table_rows = tables.get(table_id)
+        if table_rows is None:
+            print(f"[WARNING] {partition.league} {partition.season}: bo qua bang {table_id} do khong tai duoc HTML.")
+            continue
+        with report.span('merge', partition=label, table=table_id):
+            update_players(
+                players=players,
+                url=table_urls[table_id],
+                table_id=table_id,
+                update_fields=fields,
+                index=player_index,
+                rows=table_rows.iter_cells()
+            )
+    tables.clear()
+
+    order = sorted(range(len(players)), key=lambda i: (players[i].get('player') or '').lower())
+    return player_table.to_dataframe(EXPORT_STATS, HEADER_ORDER, order=[players[i].row for i in order])
+
+
+def write_partition(df: pd.DataFrame, out_dir: str, partition: Partition) -> str:
+    """
+    Ghi DataFrame của phân vùng ra part-0.parquet (hoặc part-0.csv nếu không ghi được Parquet).
+    Ghi vào file tạm rồi đổi tên, để file kết quả chỉ xuất hiện khi đã ghi xong.
+    """
+    directory = partition_dir(out_dir, partition)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'part-0.parquet')
+    if write_parquet(df, path + '.tmp', column_order=HEADER_ORDER):
+        os.replace(path + '.tmp', path)
+        return path
+    path = os.path.join(directory, 'part-0.csv')
+    df.to_csv(path + '.tmp', index=False, encoding='utf-8-sig', na_rep='N/a')
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def run_archive(partitions: List[Partition], out_dir: str = ARCHIVE_DIR,
+                partition_workers: int = ARCHIVE_PARTITION_WORKERS, force: bool = False) -> Dict[str, List[Partition]]:
+    """
+    Chạy hàng đợi phân vùng với tối đa `partition_workers` phân vùng đồng thời.
+    Tất cả request đi qua bộ giới hạn dùng chung (rate_limit.py), nên FETCH_PER_HOST và
+    tốc độ/backoff theo host áp dụng cho cả lần chạy chứ không riêng từng phân vùng.
+    Trả về dict 'done' / 'skipped' / 'failed' -> danh sách phân vùng.
+    """
+    summary: Dict[str, List[Partition]] = {'done': [], 'skipped': [], 'failed': []}
+    queue = []
+    for partition in partitions:
+        if not force and existing_output(out_dir, partition):
+            summary['skipped'].append(partition)
+        else:
+            queue.append(partition)
+    print(f"[INFO] {len(queue)} phan vung can lay, {len(summary['skipped'])} phan vung da co du lieu.")
+    if not queue:
+        return summary
+
+    def job(partition: Partition) -> Optional[str]:
+        df = scrape_partition(partition)
+        if df is None:
+            return None
+        with get_run_report().span('export', partition=f"{partition.league} {partition.season}"):
+            return write_partition(df, out_dir, partition)
+
+    with ThreadPoolExecutor(max_workers=max(1, partition_workers)) as executor:
+        futures = {executor.submit(job, partition): partition for partition in queue}
+        for future in as_completed(futures):
+            partition = futures[future]
+            try:
+                path = future.result()
+            except Exception as e:
+                print(f"[ERROR] {partition.league} {partition.season}: {e}")
+                traceback.print_exc()
+                path = None
+            if path:
+                print(f"[SUCCESS] {partition.league} {partition.season} -> {path}")
+                summary['done'].append(partition)
+            else:
+                summary['failed'].append(partition)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Lay du lieu cau thu cho nhieu giai dau va nhieu mua giai.")
+    parser.add_argument('--leagues', nargs='+', default=list(COMPETITIONS), help="Ten giai (khoa trong COMPETITIONS)")
+    parser.add_argument('--seasons', nargs='+', default=ARCHIVE_SEASONS, help="Mua giai dang YYYY-YYYY")
+    parser.add_argument('--out', default=ARCHIVE_DIR, help="Thu muc goc cua kho du lieu")
+    parser.add_argument('--workers', type=int, default=ARCHIVE_PARTITION_WORKERS, help="So phan vung chay dong thoi")
+    parser.add_argument('--force', action='store_true', help="Lay lai ca cac phan vung da co du lieu")
+    parser.add_argument('--report', default=os.path.join(ARCHIVE_DIR, RUN_REPORT_FILE),
+                        help="File JSON ghi thoi gian tung buoc cua lan chay (de trong de tat)")
+    args = parser.parse_args()
+    report = configure_run_report('archive')
+
+    partitions = plan_partitions(args.leagues, args.seasons)
+    print(f"[INFO] Ke hoach: {len(partitions)} phan vung x {1 + len(plan_tables(EXPORT_STATS)[2])} bang.")
+    summary = run_archive(partitions, out_dir=args.out, partition_workers=args.workers, force=args.force)
+    print(f"[INFO] Hoan thanh: {len(summary['done'])}, bo qua: {len(summary['skipped'])}, "
+          f"that bai: {len(summary['failed'])}.")
+    for partition in summary['failed']:
+        print(f"[WARNING] That bai: {partition.league} {partition.season}")
+    if args.report:
+        report.set_info(**{key: len(value) for key, value in summary.items()})
+        os.makedirs(os.path.dirname(args.report) or '.', exist_ok=True)
+        report.write(args.report)
+        report.print_summary()
+
+
+if __name__ == '__main__':
+    start_time = time.time()
+    if PAGE_CACHE_DIR:
+        configure_page_cache(PAGE_CACHE_DIR, ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES)
+    configure_rate_limiter(
+        rate=RATE_LIMIT_RATE, burst=RATE_LIMIT_BURST, max_concurrency=FETCH_PER_HOST,
+        min_rate=RATE_LIMIT_MIN_RATE, max_rate=RATE_LIMIT_MAX_RATE, max_backoff=RATE_LIMIT_MAX_BACKOFF
+    )
+    configure_driver_pool(size=DRIVER_POOL_SIZE, max_pages=DRIVER_MAX_PAGES, warm=not USE_HTTP_FETCH,
+                          lean=DRIVER_LEAN_PROFILE)
+    configure_parse_pool(PARSE_PROCESSES)
+    try:
+        main()
+    finally:
+        shutdown_parse_pool()
+        shutdown_driver_pool()
+    print(f"\n[INFO] Tong thoi gian thuc thi: {time.time() - start_time:.2f} giay.")
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# async_fetch.py
+"""
+Tầng tải bất đồng bộ (asyncio) cho fbref và footballtransfers.
+
+- Mọi request chạy trên một vòng lặp sự kiện, chung một giới hạn đồng thời toàn cục
+  (`max_concurrency`) và vẫn đi qua bộ giới hạn theo host dùng chung (rate_limit.py):
+  số chỗ đồng thời mỗi host, token bucket, backoff và Retry-After giữ nguyên như đường đồng bộ.
+- Có aiohttp thì dùng aiohttp; thiếu thì mỗi request đồng bộ của http_fetch chạy trong
+  luồng riêng (asyncio.to_thread) nên vẫn tải song song.
+- Việc phân tích HTML (BeautifulSoup) được chuyển sang pool luồng để vòng lặp không bị chặn.
+- Bảng không có trong HTML thô vẫn rơi về Selenium (driver pool) như scraper.get_soup.
+
+Các hàm đồng bộ `fetch_tables` / `fetch_pages` bọc các coroutine bằng asyncio.run,
+nên code hiện có (main.py, archive.py, BAI-4) gọi được mà không cần đổi sang async.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp là phụ thuộc tùy chọn, thiếu thì dùng http_fetch trong luồng riêng
+    aiohttp = None
+
+import http_fetch
+from config import ASYNC_MAX_CONCURRENCY, PARSE_WORKERS
+from driver_pool import USER_AGENT
+from html_parser import table_soup
+from page_cache import get_page_cache
+from rate_limit import get_rate_limiter
+from run_report import get_run_report
+from scraper import _get_soup_selenium
+
+
+def is_available() -> bool:
+    """Có thể tải bất đồng bộ nếu có aiohttp, hoặc có requests để chạy trong luồng riêng."""
+    return aiohttp is not None or http_fetch.is_available()
+
+
+class AsyncFetcher:
+    """
+    Phiên tải bất đồng bộ, dùng như async context manager:
+
+        async with AsyncFetcher(max_concurrency=8) as fetcher:
+            soups = await fetcher.fetch_tables({'stats_standard': url, ...})
+    """
+    def __init__(self, max_concurrency: int = ASYNC_MAX_CONCURRENCY, parse_workers: int = PARSE_WORKERS):
+        self.max_concurrency = max(1, max_concurrency)
+        self.parse_workers = max(1, parse_workers)
+        self._session = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        self._global = asyncio.Semaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.parse_workers)
+        if aiohttp is not None:
+            self._session = aiohttp.ClientSession(
+                headers={
+                    'User-Agent': USER_AGENT,
+                    'Accept': 'text/html,application/xhtml+xml',
+                    'Accept-Language': 'en-US,en;q=0.9',
+                },
+                timeout=aiohttp.ClientTimeout(total=http_fetch.HTTP_TIMEOUT),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def parse(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Chạy hàm phân tích HTML trong pool luồng, không chặn vòng lặp sự kiện."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        host = url.split('/')[2] if '://' in url else url
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(get_rate_limiter().max_concurrency)
+        return self._host_slots[host]
+
+    async def fetch_page(self, url: str, etag: Optional[str] = None,
+                         last_modified: Optional[str] = None) -> Optional[http_fetch.HttpPage]:
+        """Tải một trang (có thể kèm request có điều kiện); cùng quy ước trả về như http_fetch.fetch_page."""
+        if self._session is None:
+            # Không có aiohttp: http_fetch tự giữ chỗ của host trong bộ giới hạn
+            async with self._global:
+                return await asyncio.to_thread(http_fetch.fetch_page, url, etag, last_modified)
+
+        headers: Dict[str, str] = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        limiter = get_rate_limiter()
+        async with self._global, self._host_slot(url):
+            wait = limiter.reserve(url)
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = limiter.reserve(url)
+            start = time.monotonic()
+            try:
+                async with self._session.get(url, headers=headers) as response:
+                    text = await response.text() if response.status == 200 else ''
+                    status, response_headers = response.status, response.headers
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError) as e:
+                print(f"[WARNING] HTTP fetch failed for {url}: {e!r}")
+                get_run_report().count('http_errors')
+                limiter.failure(url)
+                return None
+            except aiohttp.ClientError as e:
+                print(f"[WARNING] HTTP fetch failed for {url}: {e!r}")
+                get_run_report().count('http_errors')
+                return None
+            latency = time.monotonic() - start
+        return http_fetch.page_from_response(url, status, response_headers, lambda: text, latency)
+
+    async def fetch_html(self, url: str) -> Optional[str]:
+        page = await self.fetch_page(url)
+        return page.html if page is not None else None
+
+    async def fetch_pages(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Tải đồng thời nhiều trang, trả về dict url -> HTML (None nếu lỗi)."""
+        urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.fetch_html(url) for url in urls), return_exceptions=True)
+        pages: Dict[str, Optional[str]] = {}
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                print(f"[ERROR] Fetch failed for {url}: {result!r}")
+                result = None
+            pages[url] = result
+        return pages
+
+    async def get_soup(self, url: str, table_id: str, retries: int = 3,
+                       use_http: bool = True) -> Optional[BeautifulSoup]:
+        """Bản bất đồng bộ của scraper.get_soup; soup được dựng trong pool luồng."""
+        html = await self.get_table_html(url, table_id, retries=retries, use_http=use_http)
+        if html is None:
+            return None
+        with get_run_report().span('parse', table=table_id, bytes=len(html)):
+            return await self.parse(table_soup, html, table_id)
+
+    async def get_table_html(self, url: str, table_id: str, retries: int = 3,
+                             use_http: bool = True) -> Optional[str]:
+        """Bản bất đồng bộ của scraper.get_table_html: cache -> HTTP -> Selenium (trong luồng riêng)."""
+        report = get_run_report()
+        cache = get_page_cache()
+        entry = await asyncio.to_thread(cache.get, url, table_id) if cache else None
+        if entry is not None and entry.fresh:
+            print(f"[DEBUG] Cache hit for table {table_id}")
+            report.count('cache_hits')
+            return entry.html
+
+        html = None
+        page = None
+        if use_http and is_available():
+            # Mục hết hạn: một GET có điều kiện, 304 thì dùng lại bản cache, 200 thì dùng luôn nội dung mới
+            etag = entry.etag if entry else None
+            last_modified = entry.last_modified if entry else None
+            for attempt in range(retries):
+                if attempt:
+                    report.count('retries')
+                with report.span('page_load', table=table_id, attempt=attempt + 1, via='async') as span:
+                    page = await self.fetch_page(url, etag, last_modified)
+                    span['status'] = page.status if page is not None else None
+                if page is not None and page.status == 304:
+                    print(f"[DEBUG] Cache revalidated (304) for table {table_id}")
+                    report.count('cache_hits')
+                    report.count('cache_revalidated')
+                    await asyncio.to_thread(cache.touch, url, table_id)
+                    return entry.html
+                if page is None or page.status != 200:
+                    continue
+                if table_id not in page.html:
+                    print(f"[DEBUG] Table {table_id} not present in raw HTML of {url}.")
+                else:
+                    with report.span('extract', table=table_id, bytes=len(page.html)):
+                        html = await self.parse(http_fetch.extract_table_html, page.html, table_id)
+                    if html is not None:
+                        print(f"[DEBUG] Successfully fetched table {table_id} over HTTP")
+                break
+            if html is None:
+                print(f"[INFO] Falling back to Selenium for table {table_id} at {url}")
+        if cache is not None:
+            report.count('cache_misses')
+
+        if html is None:
+            page = None
+            report.count('selenium_fallbacks')
+            soup = await asyncio.to_thread(_get_soup_selenium, url, table_id, retries)
+            table = soup.find('table', id=table_id) if soup is not None else None
+            html = str(table) if table is not None else None
+
+        if html is not None and cache is not None:
+            await asyncio.to_thread(
+                cache.put, url, html, part=table_id,
+                etag=page.etag if page else None, last_modified=page.last_modified if page else None
+            )
+        return html
+
+    async def _gather_tables(self, fetch, table_urls: Dict[str, str], use_http: bool) -> Dict[str, Any]:
+        table_ids = list(table_urls)
+        results = await asyncio.gather(
+            *(fetch(table_urls[table_id], table_id, use_http=use_http) for table_id in table_ids),
+            return_exceptions=True
+        )
+        tables: Dict[str, Any] = {}
+        for table_id, result in zip(table_ids, results):
+            if isinstance(result, BaseException):
+                print(f"[ERROR] Fetch failed for table {table_id}: {result!r}")
+                result = None
+            tables[table_id] = result
+        return tables
+
+    async def fetch_tables(self, table_urls: Dict[str, str], use_http: bool = True
+                           ) -> Dict[str, Optional[BeautifulSoup]]:
+        """Tải đồng thời nhiều bảng (table_id -> url), trả về table_id -> BeautifulSoup (None nếu lỗi)."""
+        return await self._gather_tables(self.get_soup, table_urls, use_http)
+
+    async def fetch_table_htmls(self, table_urls: Dict[str, str], use_http: bool = True
+                                ) -> Dict[str, Optional[str]]:
+        """Như fetch_tables nhưng trả về chuỗi HTML của từng bảng, chưa phân tích."""
+        return await self._gather_tables(self.get_table_html, table_urls, use_http)
+
+
+def run(coro) -> Any:
+    """
+    Chạy coroutine từ code đồng bộ. Nếu luồng hiện tại đã có vòng lặp đang chạy
+    (vd. Jupyter), coroutine được chạy trong một luồng riêng.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    result: Dict[str, Any] = {}
+
+    def target() -> None:
+        try:
+            result['value'] = asyncio.run(coro)
+        except BaseException as e:
+            result['error'] = e
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+def fetch_tables(table_urls: Dict[str, str], use_http: bool = True,
+                 max_concurrency: int = ASYNC_MAX_CONCURRENCY) -> Dict[str, Optional[BeautifulSoup]]:
+    """Bọc đồng bộ của AsyncFetcher.fetch_tables."""
+    async def go():
+        async with AsyncFetcher(max_concurrency=max_concurrency) as fetcher:
+            return await fetcher.fetch_tables(table_urls, use_http=use_http)
+    print(f"[INFO] Fetching {len(table_urls)} tables asynchronously (concurrency={max_concurrency})...")
+    return run(go())
+
+
+def fetch_table_htmls(table_urls: Dict[str, str], use_http: bool = True,
+                      max_concurrency: int = ASYNC_MAX_CONCURRENCY) -> Dict[str, Optional[str]]:
+    """Bọc đồng bộ của AsyncFetcher.fetch_table_htmls."""
+    async def go():
+        async with AsyncFetcher(max_concurrency=max_concurrency) as fetcher:
+            return await fetcher.fetch_table_htmls(table_urls, use_http=use_http)
+    print(f"[INFO] Fetching {len(table_urls)} tables asynchronously (concurrency={max_concurrency})...")
+    return run(go())
+
+
+def fetch_pages(urls: Iterable[str], max_concurrency: int = ASYNC_MAX_CONCURRENCY) -> Dict[str, Optional[str]]:
+    """Bọc đồng bộ của AsyncFetcher.fetch_pages: tải đồng thời nhiều trang, trả về url -> HTML."""
+    async def go():
+        async with AsyncFetcher(max_concurrency=max_concurrency) as fetcher:
+            return await fetcher.fetch_pages(urls)
+    return run(go())
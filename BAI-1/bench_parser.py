@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# bench_parser.py
+"""
+Micro-benchmark so sánh các cách phân tích HTML trên trang đã lưu.
+
+Ví dụ:
+    python bench_parser.py standard.html:table#stats_standard transfers.html:tbody#player-table-body
+"""
+import argparse
+import time
+from typing import Callable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+from html_parser import DEFAULT_PARSER, make_soup, slice_element
+from http_fetch import uncomment_tables
+
+
+def _time_it(func: Callable[[], Optional[BeautifulSoup]], repeat: int) -> Tuple[float, int]:
+    """
+    Chạy `func` `repeat` lần, trả về thời gian tốt nhất (giây) và số hàng <tr> tìm được
+    (0 nếu trang không có phần tử đích, khi đó `func` trả về None).
+    """
+    best = float('inf')
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = func()
+        rows = len(soup.find_all('tr')) if soup is not None else 0
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def bench_page(path: str, target: str, repeat: int) -> None:
+    tag, _, element_id = target.partition('#')
+    with open(path, 'r', encoding='utf-8') as f:
+        html = uncomment_tables(f.read())
+
+    def full_html_parser() -> Optional[BeautifulSoup]:
+        return BeautifulSoup(html, 'html.parser').find(tag, id=element_id)
+
+    def full_default() -> Optional[BeautifulSoup]:
+        return BeautifulSoup(html, DEFAULT_PARSER).find(tag, id=element_id)
+
+    def subtree_default() -> BeautifulSoup:
+        return make_soup(html, tag, {'id': element_id})
+
+    def sliced_default() -> BeautifulSoup:
+        return make_soup(slice_element(html, tag, element_id) or html, tag, {'id': element_id})
+
+    cases: List[Tuple[str, Callable[[], Optional[BeautifulSoup]]]] = [
+        ('html.parser (ca trang)', full_html_parser),
+        (f'{DEFAULT_PARSER} (ca trang)', full_default),
+        (f'{DEFAULT_PARSER} (chi {target})', subtree_default),
+        (f'{DEFAULT_PARSER} (cat chuoi + chi {target})', sliced_default),
+    ]
+    print(f"\n{path} [{target}] - {len(html) / 1024:.0f} KB")
+    baseline = None
+    for name, func in cases:
+        seconds, rows = _time_it(func, repeat)
+        baseline = baseline or seconds
+        note = f"({rows} hang)" if rows else f"(khong tim thay {target})"
+        print(f"  {name:<48} {seconds * 1000:8.1f} ms  x{baseline / seconds:5.1f}  {note}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="So sanh toc do cac parser HTML tren trang da luu.")
+    parser.add_argument('pages', nargs='+', help="Duong dan trang va phan tu dich, dang path:tag#id")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    for page in args.pages:
+        path, _, target = page.rpartition(':')
+        bench_page(path, target, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
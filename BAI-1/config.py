@@ -5,8 +5,45 @@
 FBREF_BASE_URL = 'https://fbref.com/en/comps/9'
 PL_SUFFIX = '/stats/Premier-League-Stats' 
 OUT_FILE = 'results.csv' 
+WRITE_PARQUET = True # Ghi thêm results.parquet (cần pyarrow) cạnh OUT_FILE
+STATE_FILE = 'results_state.json' # Mã băm từng bảng/hàng của lần chạy trước (dùng cho --incremental)
+CHANGE_LOG_FILE = 'changes.jsonl' # Nhật ký thay đổi của các lần chạy --incremental
+RUN_REPORT_FILE = 'run_report.json' # Thời gian từng bước, số request, byte và tỉ lệ cache hit của lần chạy
 MIN_MINUTES = 90
 
+# Tải song song các bảng: số luồng tối đa
+FETCH_WORKERS = 4
+
+# Giới hạn lịch sự theo host (rate_limit.py), dùng chung cho HTTP, Selenium và BAI-4
+FETCH_PER_HOST = 4 # Số request đồng thời tối đa tới một host
+RATE_LIMIT_RATE = 1.0 # Request/giây lúc bắt đầu; tự tăng khi server phản hồi nhanh
+RATE_LIMIT_MIN_RATE = 0.1 # Tốc độ thấp nhất khi bị 429/5xx/timeout liên tục
+RATE_LIMIT_MAX_RATE = 3.0
+RATE_LIMIT_BURST = 2 # Số request được dồn khi host rảnh
+RATE_LIMIT_MAX_BACKOFF = 60.0 # Giây chờ tối đa sau lỗi liên tiếp
+
+# Tải bảng qua HTTP thuần (requests), chỉ dùng Selenium khi không tìm thấy bảng
+USE_HTTP_FETCH = True
+
+# Tải bất đồng bộ (async_fetch.py, dùng aiohttp nếu có): giới hạn request đồng thời toàn cục
+# và số luồng phân tích HTML
+USE_ASYNC_FETCH = True
+ASYNC_MAX_CONCURRENCY = 8
+PARSE_WORKERS = 4
+
+# Pool tiến trình phân tích HTML (parse_pool.py): None = số lõi CPU, 0 = phân tích ngay trong tiến trình chính
+PARSE_PROCESSES = None
+
+# Cache HTML trên đĩa (đặt PAGE_CACHE_DIR = None để tắt)
+PAGE_CACHE_DIR = 'page_cache'
+PAGE_CACHE_TTL = 6 * 3600 # Giây
+PAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Pool WebDriver dùng chung cho tất cả các bảng
+DRIVER_POOL_SIZE = FETCH_WORKERS
+DRIVER_MAX_PAGES = 20 # Số trang tối đa một driver được tải trước khi thay mới
+DRIVER_LEAN_PROFILE = True # Chrome headless, chặn ảnh/CSS/font/script bên thứ ba, pageLoadStrategy=eager
+
 # ID các bảng trên fbref
 TABLE_IDS = {
     'standard': 'stats_standard',
@@ -31,6 +68,32 @@ TABLE_URLS = {
     TABLE_IDS['misc']: '/misc/Premier-League-Stats',
 }
 
+# Lưu trữ nhiều giải đấu / nhiều mùa giải (archive.py)
+FBREF_COMPS_URL = 'https://fbref.com/en/comps'
+COMPETITIONS = { # Tên giải (dùng trong URL fbref) -> mã giải
+    'Premier-League': 9,
+    'La-Liga': 12,
+    'Serie-A': 11,
+    'Bundesliga': 20,
+    'Ligue-1': 13,
+}
+ARCHIVE_SEASONS = [f'{year}-{year + 1}' for year in range(2014, 2024)]
+ARCHIVE_DIR = 'archive' # Dữ liệu ghi theo archive/league=<giải>/season=<mùa>/
+ARCHIVE_PARTITION_WORKERS = 2 # Số phân vùng (giải, mùa) xử lý đồng thời
+
+# Tên trang fbref của từng bảng, dùng để dựng URL theo giải và mùa giải:
+# {FBREF_COMPS_URL}/<mã giải>/<mùa>/<trang>/<mùa>-<tên giải>-Stats
+TABLE_PAGES = {
+    TABLE_IDS['standard']: 'stats',
+    TABLE_IDS['keeper']: 'keepers',
+    TABLE_IDS['shooting']: 'shooting',
+    TABLE_IDS['passing']: 'passing',
+    TABLE_IDS['gca']: 'gca',
+    TABLE_IDS['defense']: 'defense',
+    TABLE_IDS['possession']: 'possession',
+    TABLE_IDS['misc']: 'misc',
+}
+
 # Ánh xạ tên cột từ file CSV mẫu sang data-stat của fbref
 HEADER_MAP = { 
     'Player': 'player',
@@ -201,4 +264,39 @@ STATS_BY_TABLE = {
         'fouls', 'fouled', 'offsides', 'crosses', 'ball_recoveries',
         'aerials_won', 'aerials_lost', 'aerials_won_pct'
     ]
-}
\ No newline at end of file
+}
+
+# Kiểu dữ liệu của từng data-stat, được áp dụng một lần khi phân tích bảng
+# 'text': chuỗi, 'categorical': chuỗi lặp lại nhiều (đội, quốc tịch, vị trí),
+# 'int': số nguyên (bỏ dấu phẩy), 'float': số thực, 'percent': phần trăm (bỏ '%', giữ thang 0-100),
+# 'age_days': tuổi dạng 'năm-ngày' của fbref, được đổi sang tổng số ngày (số nguyên)
+STAT_SCHEMA = {
+    'text': ['player'],
+    'categorical': ['nationality', 'position', 'team'],
+    'age_days': ['age'],
+    'int': [
+        'games', 'games_starts', 'minutes', 'goals', 'assists', 'cards_yellow', 'cards_red',
+        'progressive_carries', 'progressive_passes', 'progressive_passes_received',
+        'passes_completed', 'passes_progressive_distance', 'assisted_shots',
+        'passes_into_final_third', 'passes_into_penalty_area', 'crosses_into_penalty_area',
+        'sca', 'gca', 'tackles', 'tackles_won', 'challenges', 'challenges_lost', 'blocks',
+        'blocked_shots', 'blocked_passes', 'interceptions', 'touches', 'touches_def_pen_area',
+        'touches_def_3rd', 'touches_mid_3rd', 'touches_att_3rd', 'touches_att_pen_area',
+        'take_ons', 'carries', 'carries_progressive_distance', 'carries_into_final_third',
+        'carries_into_penalty_area', 'miscontrols', 'dispossessed', 'passes_received',
+        'fouls', 'fouled', 'offsides', 'crosses', 'ball_recoveries', 'aerials_won', 'aerials_lost'
+    ],
+    'percent': [
+        'gk_save_pct', 'gk_clean_sheets_pct', 'gk_pens_save_pct', 'shots_on_target_pct',
+        'passes_pct', 'passes_pct_short', 'passes_pct_medium', 'passes_pct_long',
+        'take_ons_won_pct', 'take_ons_tackled_pct', 'aerials_won_pct'
+    ],
+}
+
+# data-stat -> kiểu; data-stat không được liệt kê ở trên mặc định là 'float'
+STAT_TYPES = {}
+for stat_type, stats in STAT_SCHEMA.items():
+    for stat in stats:
+        STAT_TYPES[stat] = stat_type
+for stat in EXPORT_STATS:
+    STAT_TYPES.setdefault(stat, 'float')
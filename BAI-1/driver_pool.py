@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# driver_pool.py
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from run_report import get_run_report
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+# Tài nguyên bị chặn ở chế độ gọn nhẹ: ảnh, CSS, font và script/quảng cáo của bên thứ ba.
+# Bảng dữ liệu chỉ cần HTML và script của chính trang (fbref mở comment bảng bằng JS).
+LEAN_BLOCKED_URLS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4',
+    '*googletagmanager.com*', '*google-analytics.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*adservice.google.*', '*amazon-adsystem.com*',
+    '*facebook.net*', '*scorecardresearch.com*', '*quantserve.com*', '*criteo.*',
+    '*hotjar.com*', '*cookielaw.org*', '*onetrust.com*',
+]
+# Chặn thêm bằng cấu hình trình duyệt (2 = không cho phép), phòng khi CDP không dùng được
+_LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.managed_default_content_settings.stylesheets': 2,
+    'profile.managed_default_content_settings.fonts': 2,
+    'profile.managed_default_content_settings.plugins': 2,
+    'profile.managed_default_content_settings.popups': 2,
+    'profile.managed_default_content_settings.notifications': 2,
+}
+
+
+def add_lean_options(options: Options) -> Options:
+    """
+    Thêm cấu hình gọn nhẹ: headless, không tải ảnh/CSS/font và trả quyền điều khiển ngay khi
+    DOM sẵn sàng (pageLoadStrategy=eager); phần chờ do WebDriverWait trên phần tử cần lấy đảm nhận.
+    """
+    options.add_argument('--headless=new')
+    options.add_argument('--window-size=1366,900')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-background-networking')
+    options.add_argument('--mute-audio')
+    options.add_experimental_option('prefs', _LEAN_PREFS)
+    options.page_load_strategy = 'eager'
+    return options
+
+
+def build_chrome_options(lean: bool = False) -> Options:
+    """Tạo cấu hình Chrome dùng chung cho mọi driver trong pool (`lean`: xem add_lean_options)."""
+    options = Options()
+    if lean:
+        add_lean_options(options)
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument(f'user-agent={USER_AGENT}')
+    return options
+
+
+def apply_lean_profile(driver: webdriver.Chrome) -> None:
+    """Chặn các URL trong LEAN_BLOCKED_URLS qua Chrome DevTools (Network.setBlockedURLs)."""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': LEAN_BLOCKED_URLS})
+    except Exception as e:
+        print(f"[WARNING] Khong bat duoc chan tai nguyen qua CDP, chi dung cau hinh trinh duyet: {e}")
+
+
+class DriverPool:
+    """
+    Pool các WebDriver Chrome được khởi động sẵn và dùng lại giữa các lần tải trang.
+    Mỗi driver được kiểm tra còn sống trước khi cấp phát và được thay mới sau `max_pages` trang.
+    `lean=True` dùng cấu hình headless gọn nhẹ (xem build_chrome_options).
+    """
+    def __init__(self, size: int = 1, max_pages: int = 20, lean: bool = False):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.lean = lean
+        self._idle: List[webdriver.Chrome] = []
+        self._pages: Dict[int, int] = {}
+        self._all: List[webdriver.Chrome] = []
+        self._lock = threading.Lock()
+        # Bao hieu khi co driver ranh hoac mot cho trong (driver bi dong); _slots dem driver dang song
+        # cong cac driver dang khoi dong, nen kiem tra va giu cho dien ra nguyen tu duoi khoa.
+        self._available = threading.Condition(self._lock)
+        self._slots = 0
+        self._closed = False
+
+    def _create(self) -> webdriver.Chrome:
+        """Khởi động driver cho một chỗ đã được giữ trong _slots; lỗi thì trả lại chỗ."""
+        try:
+            with get_run_report().span('driver_start', lean=self.lean):
+                driver = webdriver.Chrome(options=build_chrome_options(self.lean))
+                if self.lean:
+                    apply_lean_profile(driver)
+        except BaseException:
+            with self._available:
+                self._slots -= 1
+                self._available.notify()
+            raise
+        with self._lock:
+            self._pages[id(driver)] = 0
+            self._all.append(driver)
+            opened = len(self._all)
+        print(f"[DEBUG] DriverPool: Khoi dong driver moi (dang mo: {opened}).")
+        return driver
+
+    def _discard(self, driver: webdriver.Chrome) -> None:
+        with self._available:
+            self._pages.pop(id(driver), None)
+            if driver in self._all:
+                self._all.remove(driver)
+                self._slots -= 1
+                self._available.notify()
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"[WARNING] DriverPool: Loi khi dong driver: {e}")
+
+    @staticmethod
+    def _is_alive(driver: webdriver.Chrome) -> bool:
+        try:
+            return driver.execute_script('return 1;') == 1
+        except Exception:
+            return False
+
+    def _reserve_slot(self) -> bool:
+        with self._available:
+            if self._closed or self._slots >= self.size:
+                return False
+            self._slots += 1
+            return True
+
+    def warm(self) -> None:
+        """Khởi động trước đủ `size` driver để lần tải trang đầu không phải chờ Chrome."""
+        while self._reserve_slot():
+            driver = self._create()
+            with self._available:
+                self._idle.append(driver)
+                self._available.notify()
+
+    def _acquire(self) -> webdriver.Chrome:
+        while True:
+            with self._available:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("DriverPool da dong")
+                    if self._idle:
+                        driver, create = self._idle.pop(), False
+                        break
+                    if self._slots < self.size:
+                        self._slots += 1
+                        driver, create = None, True
+                        break
+                    self._available.wait()
+            if create:
+                return self._create()
+            if self._is_alive(driver):
+                return driver
+            print("[WARNING] DriverPool: Driver khong phan hoi, thay the driver moi.")
+            self._discard(driver)
+
+    def _release(self, driver: webdriver.Chrome, healthy: bool) -> None:
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+            used = self._pages[id(driver)]
+        if self._closed or not healthy or used >= self.max_pages:
+            if healthy and used >= self.max_pages:
+                print(f"[DEBUG] DriverPool: Driver da tai {used} trang, thay moi.")
+            self._discard(driver)
+            return
+        with self._available:
+            self._idle.append(driver)
+            self._available.notify()
+
+    @contextmanager
+    def driver(self) -> Iterator[webdriver.Chrome]:
+        """
+        Cấp phát một driver cho một lần tải trang.
+        Driver gặp lỗi trong khối `with` sẽ bị đóng thay vì trả lại pool.
+        """
+        driver = self._acquire()
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            self._release(driver, healthy)
+
+    def shutdown(self) -> None:
+        """Đóng toàn bộ driver còn mở."""
+        with self._available:
+            self._closed = True
+            drivers = list(self._all)
+            self._idle.clear()
+            self._available.notify_all()
+        for driver in drivers:
+            self._discard(driver)
+        print("[DEBUG] DriverPool: Da dong tat ca driver.")
+
+
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def configure_driver_pool(size: int = 1, max_pages: int = 20, warm: bool = True, lean: bool = False) -> DriverPool:
+    """Tạo (hoặc tạo lại) pool dùng chung cho scraper và khởi động sẵn driver nếu cần."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = DriverPool(size=size, max_pages=max_pages, lean=lean)
+    if warm:
+        _pool.warm()
+    return _pool
+
+
+def get_driver_pool() -> DriverPool:
+    """Trả về pool dùng chung, tạo pool mặc định nếu chưa được cấu hình."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+        return _pool
+
+
+def shutdown_driver_pool() -> None:
+    """Đóng pool dùng chung (gọi ở cuối `main()`)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
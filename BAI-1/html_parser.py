@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# html_parser.py
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:  # lxml là tùy chọn, thiếu thì dùng parser có sẵn của Python
+    DEFAULT_PARSER = 'html.parser'
+
+
+def make_soup(html: str, tag: Optional[str] = None, attrs: Optional[Dict[str, str]] = None,
+              parser: Optional[str] = None) -> BeautifulSoup:
+    """
+    Tạo BeautifulSoup bằng parser nhanh nhất hiện có (lxml, nếu không thì html.parser).
+    Nếu truyền `tag`/`attrs` thì chỉ dựng cây con của phần tử cần dùng (SoupStrainer).
+    """
+    parse_only = SoupStrainer(tag, attrs=attrs or {}) if tag else None
+    return BeautifulSoup(html, parser or DEFAULT_PARSER, parse_only=parse_only)
+
+
+def slice_element(html: str, tag: str, element_id: str) -> Optional[str]:
+    """
+    Cắt chuỗi HTML của phần tử `<tag id=element_id>` trước khi phân tích.
+    Chỉ dùng cho phần tử không lồng thẻ cùng loại (bảng fbref); trả về None nếu không tìm thấy.
+    """
+    id_pos = html.find(f'id="{element_id}"')
+    if id_pos == -1:
+        return None
+    start = html.rfind(f'<{tag}', 0, id_pos)
+    end = html.find(f'</{tag}>', id_pos)
+    if start == -1 or end == -1:
+        return None
+    return html[start:end + len(tag) + 3]
+
+
+def table_soup(html: str, table_id: str, parser: Optional[str] = None) -> BeautifulSoup:
+    """Chỉ phân tích bảng `table#table_id` trong trang (cắt chuỗi trước nếu được)."""
+    fragment = slice_element(html, 'table', table_id)
+    return make_soup(fragment if fragment is not None else html, 'table', {'id': table_id}, parser=parser)
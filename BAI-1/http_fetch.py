@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# http_fetch.py
+import re
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import requests
+except ImportError:  # requests là phụ thuộc tùy chọn, thiếu thì chỉ dùng Selenium
+    requests = None
+
+from driver_pool import USER_AGENT
+from html_parser import slice_element, table_soup
+from rate_limit import get_rate_limiter, parse_retry_after
+from run_report import get_run_report
+
+HTTP_TIMEOUT = 20
+_COMMENT_RE = re.compile(r'<!--(.*?)-->', re.S)
+# Các mã lỗi cho thấy server đang bị quá tải hoặc giới hạn tốc độ
+PUSHBACK_STATUSES = (429, 500, 502, 503, 504)
+_local = threading.local()
+
+
+def is_available() -> bool:
+    """Kiểm tra thư viện `requests` có sẵn để dùng đường tải HTTP hay không."""
+    return requests is not None
+
+
+def _session() -> "requests.Session":
+    """Mỗi luồng giữ một Session riêng để tái sử dụng kết nối keep-alive."""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Connection': 'keep-alive',
+        })
+        _local.session = session
+    return session
+
+
+def uncomment_tables(html: str) -> str:
+    """
+    Bỏ dấu comment `<!-- -->` quanh các bảng mà fbref ẩn trong HTML ban đầu.
+    Các comment không chứa `<table` được giữ nguyên.
+    """
+    return _COMMENT_RE.sub(lambda m: m.group(1) if '<table' in m.group(1) else m.group(0), html)
+
+
+class HttpPage(NamedTuple):
+    status: int
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+def fetch_page(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+               timeout: int = HTTP_TIMEOUT) -> Optional[HttpPage]:
+    """
+    Tải trang bằng HTTP, gửi kèm If-None-Match/If-Modified-Since nếu có.
+    Mọi request đi qua bộ giới hạn dùng chung (rate_limit); 429/5xx/timeout làm host đó chậm lại.
+    Trả về HttpPage với status 200 hoặc 304, None nếu lỗi.
+    """
+    headers: Dict[str, str] = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    limiter = get_rate_limiter()
+    with limiter.slot(url):
+        start = time.monotonic()
+        try:
+            response = _session().get(url, headers=headers, timeout=timeout)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            print(f"[WARNING] HTTP fetch failed for {url}: {e}")
+            get_run_report().count('http_errors')
+            limiter.failure(url)
+            return None
+        except requests.RequestException as e:
+            print(f"[WARNING] HTTP fetch failed for {url}: {e}")
+            get_run_report().count('http_errors')
+            return None
+        latency = time.monotonic() - start
+    return page_from_response(url, response.status_code, response.headers,
+                              lambda: response.text, latency)
+
+
+def page_from_response(url: str, status: int, headers, read_text, latency: float) -> Optional[HttpPage]:
+    """
+    Phân loại một response (dùng chung cho requests và async_fetch): báo cho bộ giới hạn
+    biết host bị đẩy lùi hay phản hồi tốt, trả về HttpPage với status 200/304 hoặc None.
+    `read_text` chỉ được gọi khi status là 200.
+    """
+    limiter = get_rate_limiter()
+    report = get_run_report()
+    report.count('http_requests')
+    report.count(f'http_status_{status}')
+    if status in PUSHBACK_STATUSES:
+        print(f"[WARNING] HTTP fetch for {url} returned status {status}.")
+        limiter.failure(url, parse_retry_after(headers.get('Retry-After')))
+        return None
+    if status not in (200, 304):
+        print(f"[WARNING] HTTP fetch for {url} returned status {status}.")
+        return None
+    limiter.success(url, latency)
+    text = read_text() if status == 200 else ''
+    report.count('bytes_downloaded', len(text))
+    return HttpPage(status, text, headers.get('ETag'), headers.get('Last-Modified'))
+
+
+def fetch_html(url: str, timeout: int = HTTP_TIMEOUT) -> Optional[str]:
+    """Tải HTML thô của trang bằng HTTP, trả về None nếu lỗi."""
+    page = fetch_page(url, timeout=timeout)
+    return page.html if page is not None else None
+
+
+def get_table_soup(url: str, table_id: str, retries: int = 3,
+                   response_meta: Optional[Dict[str, Optional[str]]] = None) -> Optional[BeautifulSoup]:
+    """
+    Tải trang bằng HTTP, mở comment các bảng ẩn và trả về BeautifulSoup nếu tìm thấy bảng `table_id`.
+    Trả về None khi bảng thật sự không có trong HTML hoặc tải thất bại sau `retries` lần
+    (thời gian chờ giữa các lần thử do backoff của bộ giới hạn quyết định).
+    Nếu truyền `response_meta`, ETag/Last-Modified của response được ghi vào đó.
+    """
+    html = get_table_html(url, table_id, retries=retries, response_meta=response_meta)
+    return table_soup(html, table_id) if html is not None else None
+
+
+def get_table_html(url: str, table_id: str, retries: int = 3,
+                   response_meta: Optional[Dict[str, Optional[str]]] = None,
+                   etag: Optional[str] = None, last_modified: Optional[str] = None) -> Optional[str]:
+    """
+    Như get_table_soup nhưng trả về chuỗi HTML của riêng bảng `table_id`, chưa phân tích.
+    Truyền `etag`/`last_modified` của mục cache hết hạn để gửi một request có điều kiện duy nhất:
+    nếu server trả về 304, hàm trả về None và ghi response_meta['status'] = 304 (bản cache vẫn dùng được),
+    nếu 200 thì dùng luôn nội dung của response đó.
+    """
+    if not is_available():
+        return None
+    report = get_run_report()
+    for attempt in range(retries):
+        if attempt:
+            report.count('retries')
+        with report.span('page_load', table=table_id, attempt=attempt + 1, via='http') as span:
+            page = fetch_page(url, etag=etag, last_modified=last_modified)
+            span['status'] = page.status if page is not None else None
+        if page is not None and page.status == 304:
+            if response_meta is not None:
+                response_meta['status'] = 304
+            return None
+        if page is None or page.status != 200:
+            continue
+        if table_id not in page.html:
+            print(f"[DEBUG] Table {table_id} not present in raw HTML of {url}.")
+            return None
+        with report.span('extract', table=table_id, bytes=len(page.html)):
+            table_html = extract_table_html(page.html, table_id)
+        if table_html is not None:
+            print(f"[DEBUG] Successfully fetched table {table_id} over HTTP")
+            if response_meta is not None:
+                response_meta['etag'] = page.etag
+                response_meta['last_modified'] = page.last_modified
+        return table_html
+    return None
+
+
+def extract_table_html(html: str, table_id: str) -> Optional[str]:
+    """
+    Mở comment các bảng ẩn và cắt chuỗi HTML của bảng `table_id` (không dựng cây HTML
+    nếu cắt chuỗi được). Trả về None nếu không có bảng hoặc bảng không có hàng dữ liệu.
+    """
+    html = uncomment_tables(html)
+    fragment = slice_element(html, 'table', table_id)
+    if fragment is None:
+        table = table_soup(html, table_id).find('table', id=table_id)
+        fragment = str(table) if table is not None else None
+    if fragment is None or fragment.count('<tr') < 2:
+        return None
+    return fragment
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+# incremental.py
+"""
+Cập nhật tăng dần kết quả của main.py.
+
+File trạng thái (STATE_FILE) lưu mã băm của từng bảng và của từng hàng (theo khóa tên|đội)
+từ lần chạy trước, tính trên các hàng dạng tuple (TableRows của parse_pool). Ở lần chạy sau:
+- bảng có mã băm không đổi được bỏ qua, không cần duyệt hàng;
+- trong bảng đã đổi, chỉ các hàng có mã băm khác được ghi đè vào dữ liệu đã lưu;
+- cầu thủ mới vượt ngưỡng số phút được thêm, cầu thủ không còn trong bảng chính bị xóa.
+Mỗi thay đổi được ghi thêm một dòng JSON vào CHANGE_LOG_FILE.
+"""
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from parse_pool import TableRows
+from player_table import INTEGER_KINDS, parse_value
+from scraper import PlayerIndex, safe_cast_int
+
+# 2: mã băm tính trên TableRows thay vì chuỗi HTML của bảng
+STATE_VERSION = 2
+
+
+class Change(NamedTuple):
+    """Một thay đổi trên dữ liệu đã lưu: 'added', 'updated' hoặc 'removed'."""
+    table_id: str
+    key: str
+    kind: str
+    fields: Dict[str, Tuple[Any, Any]]
+
+
+def field_owners(tables: List[Tuple[str, List[str]]]) -> Dict[str, List[str]]:
+    """
+    Với danh sách (table_id, fields) theo đúng thứ tự gộp của main.py, trả về các trường
+    mà mỗi bảng quyết định giá trị cuối cùng (bảng gộp sau ghi đè bảng gộp trước).
+    """
+    owner: Dict[str, str] = {}
+    for table_id, fields in tables:
+        for field in fields:
+            owner[field] = table_id
+    return {table_id: [f for f in fields if owner[f] == table_id] for table_id, fields in tables}
+
+
+def base_key(name: Optional[str], team: Optional[str]) -> str:
+    return '|'.join(PlayerIndex.make_key(name, team))
+
+
+def table_hash(table: TableRows) -> str:
+    """Mã băm của cả bảng, tính trên tên cột và các hàng tuple (không phụ thuộc định dạng HTML)."""
+    payload = json.dumps([table.fields, table.rows], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def row_hash(cells: Dict[str, str], fields: List[str]) -> str:
+    return hashlib.sha1('\x1f'.join(cells.get(f, '') for f in fields).encode('utf-8')).hexdigest()
+
+
+def iter_keyed_rows(table: TableRows, min_mins: Optional[int] = None) -> Iterator[Tuple[str, int, Dict[str, str]]]:
+    """
+    Duyệt các hàng cầu thủ hợp lệ, sinh ra (khóa tên|đội, thứ tự trùng khóa, ô).
+    Nếu truyền `min_mins` thì bỏ các hàng có số phút <= min_mins (như get_players_from_table).
+    """
+    seen: Dict[str, int] = {}
+    for cells in table.iter_cells():
+        name = cells.get('player')
+        if not name or name == 'Player' or name == 'N/a':
+            continue
+        if min_mins is not None and safe_cast_int(cells.get('minutes')) <= min_mins:
+            continue
+        key = base_key(name, cells.get('team'))
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        yield key, occurrence, cells
+
+
+def snapshot_table(table: TableRows, fields: List[str], min_mins: Optional[int] = None) -> Dict[str, Any]:
+    """Trạng thái của một bảng: mã băm cả bảng và mã băm từng hàng theo khóa 'tên|đội#n'."""
+    rows = {f"{key}#{occurrence}": row_hash(cells, fields)
+            for key, occurrence, cells in iter_keyed_rows(table, min_mins)}
+    return {'hash': table_hash(table), 'rows': rows}
+
+
+def build_state(tables: Dict[str, Optional[TableRows]], owned: Dict[str, List[str]],
+                main_table_id: str, min_mins: int) -> Dict[str, Any]:
+    """Dựng trạng thái đầy đủ sau một lần chạy toàn bộ."""
+    snapshots = {}
+    for table_id, fields in owned.items():
+        table = tables.get(table_id)
+        if table is not None:
+            snapshots[table_id] = snapshot_table(table, fields, min_mins if table_id == main_table_id else None)
+    return {'version': STATE_VERSION, 'tables': snapshots}
+
+
+def load_state(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Khong doc duoc file trang thai '{path}': {e}")
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (not isinstance(value, str) and bool(pd.isna(value)))
+
+
+def _json_value(value: Any) -> Any:
+    if _is_missing(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+def append_change_log(path: str, changes: List[Change]) -> None:
+    """Ghi thêm mỗi thay đổi thành một dòng JSON (kèm thời điểm chạy) vào file nhật ký."""
+    if not changes:
+        return
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+    with open(path, 'a', encoding='utf-8') as f:
+        for change in changes:
+            record = {
+                'time': stamp,
+                'table': change.table_id,
+                'key': change.key,
+                'change': change.kind,
+                'fields': {header: [_json_value(old), _json_value(new)]
+                           for header, (old, new) in change.fields.items()},
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def _nullable_frame(df: pd.DataFrame, stat_headers: Dict[str, List[str]],
+                    stat_types: Dict[str, str]) -> pd.DataFrame:
+    """
+    Chuyển DataFrame của lần chạy trước sang kiểu cho phép ô trống trước khi ghi đè/thêm hàng:
+    category -> object, cột số nguyên (theo STAT_SCHEMA, hoặc int64 khi đọc lại từ CSV) -> Int64.
+    Nếu không, `df.at[i, col] = None` và astype cho hàng mới sẽ lỗi với cột int64 thường.
+    """
+    int_headers = {header for stat, kind in stat_types.items() if kind in INTEGER_KINDS
+                   for header in stat_headers.get(stat, ())}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+            df[col] = df[col].astype('Int64')
+        elif col in int_headers and pd.api.types.is_float_dtype(dtype):
+            values = df[col]
+            if (values.dropna() % 1 == 0).all():
+                df[col] = values.astype('Int64')
+    return df
+
+
+def apply_incremental(df: pd.DataFrame, tables: Dict[str, Optional[TableRows]], owned: Dict[str, List[str]],
+                      main_table_id: str, min_mins: int, state: Dict[str, Any],
+                      stat_headers: Dict[str, List[str]], stat_types: Dict[str, str]
+                      ) -> Tuple[pd.DataFrame, Dict[str, Any], List[Change]]:
+    """
+    Áp các hàng đã thay đổi lên DataFrame `df` của lần chạy trước.
+    `owned` là kết quả của field_owners (bảng chính đứng đầu), `stat_headers` ánh xạ
+    data-stat -> các cột trong df. Trả về (DataFrame mới, trạng thái mới, danh sách thay đổi).
+    """
+    df = _nullable_frame(df.reset_index(drop=True), stat_headers, stat_types)
+
+    player_col = stat_headers['player'][0]
+    team_col = stat_headers['team'][0]
+    positions: Dict[str, List[int]] = {}
+    for i, (name, team) in enumerate(zip(df[player_col], df[team_col])):
+        positions.setdefault(base_key(name, team), []).append(i)
+
+    added: Dict[str, Dict[str, Any]] = {}   # khóa 'tên|đội#n' -> bản ghi mới
+    added_keys = set()
+    removed: List[int] = []
+    changes: List[Change] = []
+    new_tables: Dict[str, Any] = {}
+
+    def apply_cells(targets: List[Any], cells: Dict[str, str], fields: List[str]) -> Dict[str, Tuple[Any, Any]]:
+        """Ghi các trường của một hàng lên từng đích (chỉ số hàng trong df hoặc bản ghi mới), trả về các ô đã đổi."""
+        diff: Dict[str, Tuple[Any, Any]] = {}
+        for stat in fields:
+            value = parse_value(stat_types.get(stat, 'float'), cells.get(stat, 'N/a'))
+            for header in stat_headers.get(stat, ()):
+                for target in targets:
+                    if isinstance(target, dict):
+                        target[header] = value
+                        continue
+                    old = df.at[target, header]
+                    if _is_missing(old) and _is_missing(value):
+                        continue
+                    if _is_missing(old) or _is_missing(value) or old != value:
+                        df.at[target, header] = value
+                        diff[header] = (old, value)
+        return diff
+
+    for table_id, fields in owned.items():
+        table = tables.get(table_id)
+        old_table = state.get('tables', {}).get(table_id)
+        if table is None:
+            if old_table is not None:
+                new_tables[table_id] = old_table
+            continue
+
+        is_main = table_id == main_table_id
+        current_hash = table_hash(table)
+        if old_table is not None and old_table.get('hash') == current_hash and not added_keys:
+            new_tables[table_id] = old_table
+            continue
+
+        old_rows = old_table.get('rows', {}) if old_table else {}
+        rows: Dict[str, str] = {}
+        for key, occurrence, cells in iter_keyed_rows(table, min_mins if is_main else None):
+            row_key = f"{key}#{occurrence}"
+            rows[row_key] = row_hash(cells, fields)
+            new_player = key in added_keys
+            if rows[row_key] == old_rows.get(row_key) and not new_player:
+                continue
+
+            if is_main:
+                existing = positions.get(key, [])
+                if occurrence < len(existing):
+                    targets: List[Any] = [existing[occurrence]]
+                else:
+                    record: Dict[str, Any] = {col: None for col in df.columns}
+                    added[row_key] = record
+                    added_keys.add(key)
+                    apply_cells([record], cells, fields)
+                    changes.append(Change(table_id, row_key, 'added', {}))
+                    continue
+            else:
+                # Như update_players: một hàng của bảng phụ cập nhật mọi bản ghi cùng khóa
+                targets = list(positions.get(key, []))
+                if new_player:
+                    targets += [record for k, record in added.items() if k.rpartition('#')[0] == key]
+                if not targets:
+                    continue
+
+            diff = apply_cells(targets, cells, fields)
+            if diff:
+                changes.append(Change(table_id, row_key, 'updated', diff))
+
+        if is_main:
+            for row_key in old_rows:
+                if row_key in rows:
+                    continue
+                key, _, occurrence = row_key.rpartition('#')
+                existing = positions.get(key, [])
+                if int(occurrence) < len(existing):
+                    removed.append(existing[int(occurrence)])
+                    changes.append(Change(table_id, row_key, 'removed', {}))
+        new_tables[table_id] = {'hash': current_hash, 'rows': rows}
+
+    if removed:
+        df = df.drop(index=removed)
+    if added:
+        added_df = pd.DataFrame(list(added.values()), columns=df.columns).astype(df.dtypes.to_dict())
+        df = pd.concat([df, added_df], ignore_index=True)
+    return df.reset_index(drop=True), {'version': STATE_VERSION, 'tables': new_tables}, changes
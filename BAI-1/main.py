@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 # main.py
+import argparse
+import os
 import sys
 import time
 from typing import List, Dict, Optional, Any
@@ -9,16 +11,87 @@ import traceback
 from config import (
     FBREF_BASE_URL, TABLE_IDS, TABLE_URLS, STATS_BY_TABLE,
     MIN_MINUTES, OUT_FILE, EXPORT_STATS,                
-    HEADER_ORDER, HEADER_MAP                               
+    HEADER_ORDER, HEADER_MAP,
+    DRIVER_POOL_SIZE, DRIVER_MAX_PAGES, DRIVER_LEAN_PROFILE,
+    FETCH_WORKERS, FETCH_PER_HOST, USE_HTTP_FETCH, USE_ASYNC_FETCH,
+    RATE_LIMIT_RATE, RATE_LIMIT_MIN_RATE, RATE_LIMIT_MAX_RATE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_BACKOFF,
+    PAGE_CACHE_DIR, PAGE_CACHE_TTL, PAGE_CACHE_MAX_BYTES, STAT_TYPES,
+    WRITE_PARQUET, STATE_FILE, CHANGE_LOG_FILE, RUN_REPORT_FILE, PARSE_PROCESSES
+)
+from scraper import get_players_from_table, update_players, fetch_table_htmls, Player, PlayerIndex
+from player_table import PlayerTable
+from driver_pool import configure_driver_pool, shutdown_driver_pool
+from page_cache import configure_page_cache
+from parse_pool import TableRows, configure_parse_pool, get_parse_pool, shutdown_parse_pool
+from rate_limit import configure_rate_limiter
+from run_report import configure_run_report, get_run_report, profile_call
+from results_io import parquet_path_for, write_parquet, read_results
+from incremental import (
+    field_owners, build_state, load_state, save_state, apply_incremental, append_change_log
 )
-from scraper import get_players_from_table, update_players, Player
 
 def get_first_name(full_name: Optional[str]) -> str:
     if not isinstance(full_name, str) or ' ' not in full_name:
         return full_name or ""
     return full_name.split(' ')[0]
 
-def main():
+def sort_by_first_name(df: pd.DataFrame) -> pd.DataFrame:
+    """Sắp xếp DataFrame kết quả theo First Name (giống thứ tự của lần chạy toàn bộ)."""
+    names = df['Player'].tolist()
+    order = sorted(range(len(names)), key=lambda i: get_first_name(names[i]).lower())
+    return df.iloc[order].reset_index(drop=True)
+
+def write_results(df: pd.DataFrame) -> None:
+    """Ghi DataFrame ra OUT_FILE (và bản Parquet nếu bật WRITE_PARQUET)."""
+    df.to_csv(OUT_FILE, index=False, encoding='utf-8-sig', na_rep='N/a')
+    print(f"[SUCCESS] Du lieu da duoc luu thanh cong vao file {OUT_FILE}")
+    if WRITE_PARQUET:
+        parquet_file = parquet_path_for(OUT_FILE)
+        if write_parquet(df, parquet_file, column_order=HEADER_ORDER):
+            print(f"[SUCCESS] Da luu them ban Parquet vao file {parquet_file}")
+
+def load_previous_results() -> Optional[pd.DataFrame]:
+    """Đọc kết quả của lần chạy trước (Parquet nếu có, không thì CSV); None nếu chưa có."""
+    if not os.path.exists(OUT_FILE) and not os.path.exists(parquet_path_for(OUT_FILE)):
+        return None
+    try:
+        return read_results(OUT_FILE, na_values=['N/a'])
+    except Exception as e:
+        print(f"[WARNING] Khong doc duoc ket qua cu '{OUT_FILE}': {e}")
+        return None
+
+def run_incremental(tables: Dict[str, Optional[TableRows]], owned: Dict[str, List[str]], main_table_id: str) -> bool:
+    """
+    Chỉ cập nhật các hàng đã thay đổi so với lần chạy trước.
+    Trả về False nếu chưa có trạng thái hoặc kết quả cũ (khi đó cần chạy toàn bộ).
+    """
+    state = load_state(STATE_FILE)
+    previous = load_previous_results() if state is not None else None
+    if state is None or previous is None:
+        print(f"[INFO] Chua co trang thai '{STATE_FILE}' hoac ket qua cu, chay toan bo.")
+        return False
+
+    stat_headers: Dict[str, List[str]] = {}
+    for stat, header in zip(EXPORT_STATS, HEADER_ORDER):
+        stat_headers.setdefault(stat, []).append(header)
+    with get_run_report().span('merge', table='incremental'):
+        df, new_state, changes = apply_incremental(
+            previous, tables, owned, main_table_id, MIN_MINUTES, state, stat_headers, STAT_TYPES
+        )
+    counts = {kind: sum(1 for c in changes if c.kind == kind) for kind in ('added', 'updated', 'removed')}
+    print(f"[INFO] Thay doi: {counts['added']} them, {counts['updated']} cap nhat, {counts['removed']} xoa.")
+    get_run_report().set_info(changes=counts)
+    with get_run_report().span('export'):
+        if changes:
+            write_results(sort_by_first_name(df))
+            append_change_log(CHANGE_LOG_FILE, changes)
+            print(f"[INFO] Da ghi nhat ky thay doi vao {CHANGE_LOG_FILE}")
+        else:
+            print(f"[INFO] Khong co thay doi, giu nguyen {OUT_FILE}.")
+        save_state(STATE_FILE, new_state)
+    return True
+
+def main(incremental: bool = False):
     print(f"[INFO] Bat dau qua trinh lay du lieu cau thu Premier League...")
     print(f"[INFO] Lay du lieu tu mua giai tai: {FBREF_BASE_URL}")
 
@@ -47,25 +120,64 @@ def main():
             else:
                 print(f"[WARNING] Khong tim thay URL suffix cho table_id: {table_id}")
 
+    # Buoc tai: lay HTML cua tat ca cac bang cung luc
+    table_urls = {main_table_id: f"{FBREF_BASE_URL}{main_url_suffix}"}
+    for table_info in addtl_tables:
+        table_urls[table_info['table_id']] = f"{FBREF_BASE_URL}{table_info['url_suffix']}"
+    report = get_run_report()
+    with report.span('fetch', tables=len(table_urls)):
+        htmls = fetch_table_htmls(
+            table_urls,
+            max_workers=FETCH_WORKERS,
+            use_http=USE_HTTP_FETCH,
+            use_async=USE_ASYNC_FETCH
+        )
+    # Buoc phan tich: chay trong pool tien trinh, chi nhan ve cac hang dang tuple (TableRows)
+    with report.span('parse', tables=len(htmls), bytes=sum(len(h) for h in htmls.values() if h)):
+        tables = get_parse_pool().extract_tables(htmls)
+    htmls.clear()
+
+    merge_order = [(main_table_id, base_req_fields)]
+    merge_order += [(t['table_id'], t['fields']) for t in addtl_tables]
+    owned = field_owners(merge_order)
+    if incremental and run_incremental(tables, owned, main_table_id):
+        return
+
+    # Buoc gop: chi xu ly cac hang da phan tich
     print(f"[INFO] Lay du lieu cau thu co ban tu bang '{main_table_id}'...")
-    players = get_players_from_table(
-        url=f"{FBREF_BASE_URL}{main_url_suffix}",
-        table_id=main_table_id,
-        fetch_fields=base_req_fields, 
-        min_mins=MIN_MINUTES          
-    )
+    player_index = PlayerIndex()
+    player_table = PlayerTable(EXPORT_STATS, STAT_TYPES)
+    main_rows = tables.get(main_table_id)
+    with report.span('merge', table=main_table_id):
+        players = get_players_from_table(
+            url=table_urls[main_table_id],
+            table_id=main_table_id,
+            fetch_fields=base_req_fields, 
+            min_mins=MIN_MINUTES,
+            index=player_index,
+            table=player_table,
+            rows=main_rows.iter_cells() if main_rows is not None else ()
+        )
+    report.set_info(players=len(players))
 
     if not players:
         print(f"[ERROR] Khong lay duoc du lieu cau thu ban dau (> {MIN_MINUTES} phut). Chuong trinh ket thuc.")
         sys.exit(1)
 
     for table_info in addtl_tables:
-        update_players(
-            players=players, 
-            url=f"{FBREF_BASE_URL}{table_info['url_suffix']}",
-            table_id=table_info['table_id'],
-            update_fields=table_info['fields'] 
-        )
+        table_rows = tables.get(table_info['table_id'])
+        if table_rows is None:
+            print(f"[WARNING] Bo qua bang {table_info['table_id']} do khong tai duoc HTML.")
+            continue
+        with report.span('merge', table=table_info['table_id']):
+            update_players(
+                players=players, 
+                url=table_urls[table_info['table_id']],
+                table_id=table_info['table_id'],
+                update_fields=table_info['fields'],
+                index=player_index,
+                rows=table_rows.iter_cells()
+            )
         print("-" * 30)
 
     print("[INFO] Chuan bi xuat du lieu...")
@@ -74,15 +186,14 @@ def main():
         sys.exit(1)
 
     print("[INFO] Sap xep du lieu cau thu theo ten (First Name)...")
-    sorted_players = sorted(players, key=lambda p: get_first_name(p.data.get('player', '')).lower())
+    sorted_players = sorted(players, key=lambda p: get_first_name(p.get('player', '')).lower())
 
     final_stat_order = EXPORT_STATS 
     final_headers = HEADER_ORDER  
     print(f"[INFO] Thu tu cot header cuoi cung theo file CSV mau: {final_headers}")
 
     if sorted_players:
-        sample_keys = set(sorted_players[0].data.keys())
-        missing_stats = set(final_stat_order) - sample_keys 
+        missing_stats = player_table.missing_stats(final_stat_order)
         if missing_stats:
              valid_missing = [k for k in missing_stats if k in HEADER_MAP.values()] 
              if valid_missing:
@@ -90,8 +201,7 @@ def main():
 
     print("[INFO] Tao DataFrame tu du lieu da sap xep...")
     try:
-        data_to_export = [p.export(final_stat_order) for p in sorted_players]
-        df = pd.DataFrame(data_to_export, columns=final_headers)
+        df = player_table.to_dataframe(final_stat_order, final_headers, order=[p.row for p in sorted_players])
     except Exception as e:
         print(f"[ERROR] Loi khi tao DataFrame: {e}")
         traceback.print_exc()
@@ -99,8 +209,10 @@ def main():
 
     print(f"[INFO] Luu DataFrame vao file {OUT_FILE}...") 
     try:
-        df.to_csv(OUT_FILE, index=False, encoding='utf-8-sig')
-        print(f"[SUCCESS] Du lieu da duoc luu thanh cong vao file {OUT_FILE}")
+        with report.span('export'):
+            write_results(df)
+            # Luu ma bam tung bang/hang de lan chay --incremental sau chi cap nhat phan thay doi
+            save_state(STATE_FILE, build_state(tables, owned, main_table_id, MIN_MINUTES))
 
         print(f"\n[INFO] Du lieu cua {len(df)} cau thu (da sap xep theo First Name):")
         with pd.option_context('display.max_rows', None, 'display.max_columns', None):
@@ -112,7 +224,37 @@ def main():
          print(f"[ERROR] Loi khong xac dinh khi xu ly DataFrame hoac luu file: {e}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Lay du lieu cau thu Premier League tu fbref.")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Chi cap nhat cac cau thu thay doi so voi lan chay truoc (dua tren {STATE_FILE})")
+    parser.add_argument('--report', default=RUN_REPORT_FILE,
+                        help="File JSON ghi thoi gian tung buoc cua lan chay (de trong de tat)")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help="Chup them profile CPU cua ca lan chay (ghi canh file bao cao)")
+    args = parser.parse_args()
     start_time = time.time()
-    main()
+    report = configure_run_report('main')
+    report.set_info(incremental=args.incremental, use_http=USE_HTTP_FETCH, use_async=USE_ASYNC_FETCH,
+                    lean_driver=DRIVER_LEAN_PROFILE)
+    if PAGE_CACHE_DIR:
+        configure_page_cache(PAGE_CACHE_DIR, ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES)
+    configure_rate_limiter(
+        rate=RATE_LIMIT_RATE, burst=RATE_LIMIT_BURST, max_concurrency=FETCH_PER_HOST,
+        min_rate=RATE_LIMIT_MIN_RATE, max_rate=RATE_LIMIT_MAX_RATE, max_backoff=RATE_LIMIT_MAX_BACKOFF
+    )
+    # Khi tai qua HTTP, Chrome chi khoi dong khi can fallback
+    configure_driver_pool(size=DRIVER_POOL_SIZE, max_pages=DRIVER_MAX_PAGES, warm=not USE_HTTP_FETCH,
+                          lean=DRIVER_LEAN_PROFILE)
+    configure_parse_pool(PARSE_PROCESSES)
+    try:
+        profile_call(lambda: main(incremental=args.incremental), args.profile,
+                     os.path.splitext(args.report or RUN_REPORT_FILE)[0])
+    finally:
+        shutdown_parse_pool()
+        shutdown_driver_pool()
+        if args.report:
+            report.write(args.report)
+            report.print_summary()
+            print(f"[INFO] Da ghi bao cao thoi gian vao {args.report}")
     end_time = time.time()
     print(f"\n[INFO] Tong thoi gian thuc thi: {end_time - start_time:.2f} giay.")
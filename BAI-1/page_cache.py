@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# page_cache.py
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    html: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    stored_at: float
+    fresh: bool
+
+
+class PageCache:
+    """
+    Cache HTML trên đĩa, khóa theo (url, phần trang) và lưu nén gzip.
+    Mỗi mục có TTL; mục hết hạn vẫn được giữ để xác thực lại bằng ETag/Last-Modified.
+    Khi tổng dung lượng vượt `max_bytes`, các mục ít được dùng gần đây nhất bị xóa (LRU).
+    """
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str, ttl: float = 6 * 3600, max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index: Dict[str, Dict] = self._load_index()
+
+    @staticmethod
+    def make_key(url: str, part: str = '') -> str:
+        return hashlib.sha256(f"{url}#{part}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.html.gz")
+
+    def _load_index(self) -> Dict[str, Dict]:
+        path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] PageCache: Khong doc duoc index, bat dau cache moi: {e}")
+            return {}
+
+    def _save_index(self) -> None:
+        path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+
+    def get(self, url: str, part: str = '') -> Optional[CacheEntry]:
+        """Đọc một mục từ cache (kể cả mục đã hết hạn), trả về None nếu không có."""
+        key = self.make_key(url, part)
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                return None
+            try:
+                with gzip.open(self._path(key), 'rt', encoding='utf-8') as f:
+                    html = f.read()
+            except OSError:
+                self._index.pop(key, None)
+                return None
+            meta['last_access'] = time.time()
+            fresh = time.time() - meta['stored_at'] < self.ttl
+            return CacheEntry(html, meta.get('etag'), meta.get('last_modified'), meta['stored_at'], fresh)
+
+    def put(self, url: str, html: str, part: str = '', etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """Ghi (hoặc ghi đè) một mục vào cache rồi dọn LRU nếu vượt dung lượng."""
+        key = self.make_key(url, part)
+        with self._lock:
+            with gzip.open(self._path(key), 'wt', encoding='utf-8') as f:
+                f.write(html)
+            now = time.time()
+            self._index[key] = {
+                'url': url,
+                'part': part,
+                'etag': etag,
+                'last_modified': last_modified,
+                'stored_at': now,
+                'last_access': now,
+                'size': os.path.getsize(self._path(key)),
+            }
+            self._evict()
+            self._save_index()
+
+    def touch(self, url: str, part: str = '') -> None:
+        """Làm mới thời điểm lưu sau khi server xác nhận trang không đổi (HTTP 304)."""
+        key = self.make_key(url, part)
+        with self._lock:
+            if key in self._index:
+                self._index[key]['stored_at'] = time.time()
+                self._save_index()
+
+    def _evict(self) -> None:
+        total = sum(meta['size'] for meta in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, meta in sorted(self._index.items(), key=lambda item: item[1]['last_access']):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            total -= meta['size']
+            del self._index[key]
+
+
+_cache: Optional[PageCache] = None
+
+
+def configure_page_cache(cache_dir: str, ttl: float = 6 * 3600, max_bytes: int = 200 * 1024 * 1024) -> PageCache:
+    """Tạo cache dùng chung cho scraper."""
+    global _cache
+    _cache = PageCache(cache_dir, ttl=ttl, max_bytes=max_bytes)
+    return _cache
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Trả về cache dùng chung, hoặc None nếu chưa bật cache."""
+    return _cache
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# parse_pool.py
+"""
+Bước phân tích HTML tách khỏi bước tải, chạy trong pool tiến trình.
+
+BeautifulSoup chạy thuần Python nên khi việc tải đã song song, phân tích nhiều trang cùng lúc
+bị giới hạn bởi GIL. Pool này gửi chuỗi HTML thô của từng bảng sang các tiến trình con,
+duyệt hàng ở đó (như _iter_table_rows) và chỉ gửi về các tuple gọn (TableRows) thay vì cây HTML.
+"""
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from html_parser import table_soup
+from scraper import _iter_table_rows
+
+
+class TableRows(NamedTuple):
+    """Các hàng dữ liệu của một bảng: tên cột (data-stat) và mỗi hàng một tuple giá trị (None = không có ô)."""
+    fields: Tuple[str, ...]
+    rows: List[Tuple[Optional[str], ...]]
+
+    def iter_cells(self) -> Iterator[Dict[str, str]]:
+        """Dựng lại dict data-stat -> text của từng hàng, giống _iter_table_rows."""
+        fields = self.fields
+        for row in self.rows:
+            yield {field: value for field, value in zip(fields, row) if value is not None}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def extract_rows(html: str, table_id: str) -> Optional[TableRows]:
+    """Phân tích bảng `table_id` và trả về TableRows (None nếu không có bảng). Chạy được trong tiến trình con."""
+    html_table = table_soup(html, table_id).find('table', id=table_id)
+    if html_table is None:
+        return None
+    fields: Dict[str, int] = {}
+    records = []
+    for cells in _iter_table_rows(html_table):
+        for field in cells:
+            fields.setdefault(field, len(fields))
+        records.append(cells)
+    names = tuple(fields)
+    return TableRows(names, [tuple(cells.get(field) for field in names) for cells in records])
+
+
+class _InlineExecutor(Executor):
+    """Chạy ngay trong luồng gọi (dùng khi tắt pool tiến trình)."""
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+class ParsePool:
+    """
+    Pool tiến trình cho bước phân tích. `workers=0` chạy ngay trong tiến trình hiện tại.
+    Tiến trình con chỉ được khởi động ở lần phân tích đầu tiên.
+    """
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, workers)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers else _InlineExecutor()
+            return self._executor
+
+    def submit(self, func: Callable, *args) -> Future:
+        """Gửi một hàm phân tích (phải ở cấp module để pickle được) sang pool."""
+        return self._get_executor().submit(func, *args)
+
+    def map(self, func: Callable, items: Sequence[tuple]) -> List:
+        """Chạy `func(*item)` cho mọi item trong pool, giữ nguyên thứ tự."""
+        futures = [self.submit(func, *item) for item in items]
+        return [future.result() for future in futures]
+
+    def extract_tables(self, htmls: Dict[str, Optional[str]]) -> Dict[str, Optional[TableRows]]:
+        """Phân tích song song nhiều bảng (table_id -> HTML), trả về table_id -> TableRows (None nếu lỗi)."""
+        futures = {table_id: self.submit(extract_rows, html, table_id)
+                   for table_id, html in htmls.items() if html is not None}
+        results: Dict[str, Optional[TableRows]] = {}
+        for table_id in htmls:
+            future = futures.get(table_id)
+            try:
+                results[table_id] = future.result() if future is not None else None
+            except Exception as e:
+                print(f"[ERROR] Parse failed for table {table_id}: {e}")
+                results[table_id] = None
+        return results
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+_pool: Optional[ParsePool] = None
+_pool_lock = threading.Lock()
+
+
+def configure_parse_pool(workers: Optional[int] = None) -> ParsePool:
+    """Tạo (hoặc tạo lại) pool phân tích dùng chung; `workers=None` dùng số lõi CPU."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ParsePool(workers)
+        return _pool
+
+
+def get_parse_pool() -> ParsePool:
+    """Pool phân tích dùng chung; tạo với cấu hình mặc định nếu chưa được cấu hình."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ParsePool()
+        return _pool
+
+
+def shutdown_parse_pool() -> None:
+    """Đóng các tiến trình con của pool dùng chung."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+# player_table.py
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Kiểu mặc định khi không có schema: các data-stat này giữ dạng chuỗi, còn lại là số thực
+TEXT_STATS = ('player', 'nationality', 'position', 'team', 'age')
+STRING_KINDS = ('text', 'categorical')
+# Các kiểu được lưu dạng số nguyên (array('q') / Int64)
+INTEGER_KINDS = ('int', 'age_days')
+
+NAN = float('nan')
+DAYS_PER_YEAR = 365.25
+
+
+def _clean(value_str: Optional[str]) -> Optional[str]:
+    if value_str is None:
+        return None
+    cleaned = value_str.replace(',', '').strip()
+    if not cleaned or cleaned == 'N/a':
+        return None
+    return cleaned
+
+
+def parse_number(value_str: Optional[str]) -> Optional[float]:
+    """Chuyển chuỗi số của fbref ('2,250', '65.3', '') sang float; None nếu rỗng hoặc không hợp lệ."""
+    cleaned = _clean(value_str)
+    if cleaned is None:
+        return None
+    try:
+        return float(cleaned.replace('%', ''))
+    except ValueError:
+        return None
+
+
+def parse_int(value_str: Optional[str]) -> Optional[int]:
+    """Chuyển chuỗi số nguyên ('2,250') sang int; None nếu rỗng hoặc không hợp lệ."""
+    number = parse_number(value_str)
+    if number is None or number != number or not number.is_integer():
+        return None
+    return int(number)
+
+
+def parse_age_days(value_str: Optional[str]) -> Optional[int]:
+    """Đổi tuổi dạng 'năm-ngày' của fbref ('35-130') sang tổng số ngày nguyên (12913); None nếu không hợp lệ."""
+    cleaned = _clean(value_str)
+    if cleaned is None:
+        return None
+    years, _, days = cleaned.partition('-')
+    try:
+        return int(int(years) * DAYS_PER_YEAR) + (int(days) if days else 0)
+    except ValueError:
+        return None
+
+
+def age_years(age_days: Any) -> Any:
+    """Số năm tròn từ tổng số ngày của parse_age_days (dùng được cho số hoặc Series)."""
+    return age_days // DAYS_PER_YEAR
+
+
+# Hàm chuyển kiểu cho từng loại cột số (percent giữ thang 0-100 như trên fbref)
+NUMERIC_PARSERS: Dict[str, Callable[[Optional[str]], Optional[float]]] = {
+    'int': parse_int,
+    'float': parse_number,
+    'percent': parse_number,
+    'age_days': parse_age_days,
+}
+
+
+def parse_value(kind: str, value_str: Optional[str]) -> Any:
+    """Chuyển một ô thô sang giá trị có kiểu theo loại cột `kind`; None nếu thiếu dữ liệu."""
+    if kind in STRING_KINDS:
+        return value_str if value_str is not None and value_str != 'N/a' else None
+    return NUMERIC_PARSERS[kind](value_str)
+
+
+class PlayerTable:
+    """
+    Bảng cầu thủ lưu theo cột (struct-of-arrays).
+    Mỗi cột có kiểu theo `stat_types` (xem STAT_SCHEMA trong config.py) và được chuyển kiểu
+    ngay khi nạp: 'int'/'age_days' dùng `array('q')`, 'float'/'percent' dùng `array('d')`,
+    'text'/'categorical' là list chuỗi. Giá trị thiếu được đánh dấu bằng mặt nạ null
+    (bytearray) thay vì chuỗi 'N/a'.
+    """
+    def __init__(self, stats: Iterable[str], stat_types: Optional[Dict[str, str]] = None):
+        self._types: Dict[str, str] = dict(stat_types or {})
+        self._numeric: Dict[str, array] = {}
+        self._mask: Dict[str, bytearray] = {}
+        self._text: Dict[str, List[Optional[str]]] = {}
+        self._size = 0
+        for stat in stats:
+            self._add_column(stat)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._mask.keys())
+
+    def kind(self, stat: str) -> str:
+        """Kiểu của cột; không có trong schema thì theo quy tắc mặc định TEXT_STATS/float."""
+        if stat not in self._types:
+            self._types[stat] = 'text' if stat in TEXT_STATS else 'float'
+        return self._types[stat]
+
+    def _add_column(self, stat: str) -> None:
+        if stat in self._mask:
+            return
+        kind = self.kind(stat)
+        self._mask[stat] = bytearray(self._size)
+        if kind in STRING_KINDS:
+            self._text[stat] = [None] * self._size
+        elif kind in INTEGER_KINDS:
+            self._numeric[stat] = array('q', [0]) * self._size
+        else:
+            self._numeric[stat] = array('d', [NAN]) * self._size
+
+    def _set(self, row: int, stat: str, value_str: Optional[str]) -> None:
+        if stat not in self._mask:
+            self._add_column(stat)
+        if stat in self._text:
+            present = value_str is not None and value_str != 'N/a'
+            self._text[stat][row] = value_str if present else None
+        else:
+            column = self._numeric[stat]
+            number = NUMERIC_PARSERS[self.kind(stat)](value_str)
+            present = number is not None
+            column[row] = number if present else (0 if column.typecode == 'q' else NAN)
+        self._mask[stat][row] = 1 if present else 0
+
+    def append_row(self, values: Dict[str, Optional[str]]) -> int:
+        """Thêm một hàng mới từ dict data-stat -> chuỗi thô, trả về chỉ số hàng."""
+        row = self._size
+        self._size += 1
+        for stat in self._mask:
+            self._mask[stat].append(0)
+        for column in self._numeric.values():
+            column.append(0 if column.typecode == 'q' else NAN)
+        for column in self._text.values():
+            column.append(None)
+        self.set_values(row, values)
+        return row
+
+    def set_values(self, row: int, values: Dict[str, Optional[str]]) -> None:
+        """Cập nhật các ô của hàng `row` từ dict data-stat -> chuỗi thô."""
+        for stat, value_str in values.items():
+            self._set(row, stat, value_str)
+
+    def get(self, row: int, stat: str, default: Any = None) -> Any:
+        """Lấy giá trị đã chuyển kiểu của một ô, `default` nếu ô thiếu dữ liệu."""
+        mask = self._mask.get(stat)
+        if mask is None or not mask[row]:
+            return default
+        if stat in self._text:
+            return self._text[stat][row]
+        return self._numeric[stat][row]
+
+    def missing_stats(self, stats: Iterable[str]) -> List[str]:
+        """Các data-stat không có giá trị ở bất kỳ hàng nào."""
+        return [stat for stat in stats if stat not in self._mask or not any(self._mask[stat])]
+
+    def _column_values(self, stat: str) -> Any:
+        if stat in self._text:
+            values = np.array(self._text[stat], dtype=object)
+            return pd.Categorical(values) if self.kind(stat) == 'categorical' else values
+        if stat not in self._numeric:
+            return np.full(self._size, NAN)
+        column = self._numeric[stat]
+        if column.typecode == 'q':
+            data = np.frombuffer(column, dtype=np.int64) if self._size else np.empty(0, dtype=np.int64)
+            missing = np.frombuffer(self._mask[stat], dtype=np.uint8) == 0
+            return pd.arrays.IntegerArray(data, missing)
+        return np.frombuffer(column, dtype=np.float64) if self._size else np.empty(0)
+
+    def to_dataframe(self, stats: Sequence[str], headers: Sequence[str],
+                     order: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """
+        Tạo DataFrame có kiểu theo schema, theo thứ tự `stats` với tên cột `headers`.
+        Cột số được bọc trực tiếp trên bộ nhớ của array (np.frombuffer, không sao chép);
+        cột 'int'/'age_days' thành Int64 (nullable), cột 'categorical' thành category.
+        Chỉ khi truyền `order` mới có một lần gom lại theo thứ tự hàng mới.
+        """
+        columns: Dict[str, Any] = {}
+        take = np.asarray(order, dtype=np.intp) if order is not None else None
+        for stat, header in zip(stats, headers):
+            values = self._column_values(stat)
+            columns[header] = values if take is None else values[take]
+        return pd.DataFrame(columns, copy=False)
+
+
+class Player:
+    """Lớp đại diện cho một cầu thủ: một khung nhìn (view) vào một hàng của PlayerTable."""
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table: PlayerTable, row: int):
+        """Khởi tạo đối tượng Player trỏ tới hàng `row` của `table`."""
+        self.table = table
+        self.row = row
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Lấy một chỉ số của cầu thủ."""
+        return self.table.get(self.row, key, default)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Dict các chỉ số có dữ liệu (dựng khi cần, chỉ dùng để tương thích/gỡ lỗi)."""
+        return {stat: self.get(stat) for stat in self.table.columns if self.get(stat) is not None}
+
+    def update(self, **kwargs: Any) -> None:
+        """Cập nhật dữ liệu cho cầu thủ."""
+        self.table.set_values(self.row, kwargs)
+
+    def export(self, export_keys: List[str]) -> List[Any]:
+        """
+        Xuất dữ liệu theo đúng thứ tự các data_stat key được yêu cầu.
+        Trả về 'N/a' nếu key không có dữ liệu.
+        """
+        return [self.get(key, 'N/a') for key in export_keys]
+
+    def __repr__(self) -> str:
+        """Biểu diễn đối tượng Player dưới dạng chuỗi."""
+        name = self.get('player', 'Unknown Player')
+        team = self.get('team', 'Unknown Team')
+        age = self.get('age', 'N/A')
+        return f"<Player: {name} ({age} - {team})>"
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# rate_limit.py
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+
+class _HostState:
+    """Trạng thái giới hạn của một host: token bucket, số lỗi liên tiếp và mốc hết backoff."""
+    def __init__(self, rate: float, burst: float, max_concurrency: int):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.failures = 0
+        self.backoff_until = 0.0
+        self.slots = threading.Semaphore(max_concurrency)
+
+
+class RateLimiter:
+    """
+    Giới hạn request theo host, dùng chung cho mọi đường tải (HTTP, Selenium, BAI-4).
+
+    - Token bucket: tốc độ `rate` request/giây, cho phép dồn tối đa `burst` request,
+      và tối đa `max_concurrency` request đồng thời tới một host.
+    - Tự điều chỉnh (AIMD): mỗi response nhanh tăng tốc độ thêm `increase`; response chậm
+      (> `slow_latency` giây) hoặc lỗi 429/5xx/timeout nhân tốc độ với `decrease`.
+    - Lỗi liên tiếp gây backoff lũy thừa (base_backoff * 2^(n-1), tối đa `max_backoff`)
+      có jitter; nếu server gửi Retry-After thì chờ đúng thời gian đó.
+    """
+    def __init__(self, rate: float = 1.0, burst: float = 2.0, max_concurrency: int = 4,
+                 min_rate: float = 0.1, max_rate: float = 4.0, increase: float = 0.1, decrease: float = 0.5,
+                 slow_latency: float = 5.0, base_backoff: float = 2.0, max_backoff: float = 60.0):
+        self.initial_rate = rate
+        self.burst = max(1.0, burst)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_latency = slow_latency
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _state(self, url: str) -> _HostState:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = _HostState(self.initial_rate, self.burst, self.max_concurrency)
+            return self._hosts[host]
+
+    def _take_token(self, state: _HostState) -> float:
+        """Lấy một token nếu được; trả về số giây cần chờ (0 nếu đã lấy được)."""
+        with self._lock:
+            now = time.monotonic()
+            state.tokens = min(self.burst, state.tokens + (now - state.updated) * state.rate)
+            state.updated = now
+            if now < state.backoff_until:
+                return state.backoff_until - now
+            if state.tokens >= 1.0:
+                state.tokens -= 1.0
+                return 0.0
+            return (1.0 - state.tokens) / state.rate
+
+    def reserve(self, url: str) -> float:
+        """
+        Thử lấy lượt cho `url` mà không chặn; trả về số giây cần chờ trước khi thử lại
+        (0 nếu đã lấy được). Dùng cho vòng lặp asyncio (async_fetch.py).
+        """
+        return self._take_token(self._state(url))
+
+    def acquire(self, url: str) -> None:
+        """Chờ tới lượt gửi một request tới host của `url` (không giữ chỗ đồng thời)."""
+        state = self._state(url)
+        while True:
+            wait = self._take_token(state)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        """Giữ một chỗ đồng thời của host và một token trong suốt một request."""
+        state = self._state(url)
+        with state.slots:
+            self.acquire(url)
+            yield
+
+    def success(self, url: str, latency: float = 0.0) -> None:
+        """Ghi nhận response thành công: tăng dần tốc độ nếu nhanh, giảm nhẹ nếu chậm."""
+        state = self._state(url)
+        with self._lock:
+            state.failures = 0
+            if latency > self.slow_latency:
+                state.rate = max(self.min_rate, state.rate * (1 + self.decrease) / 2)
+            else:
+                state.rate = min(self.max_rate, state.rate + self.increase)
+
+    def failure(self, url: str, retry_after: Optional[float] = None) -> float:
+        """
+        Ghi nhận lỗi bị server đẩy lùi (429/5xx/timeout): giảm tốc độ và đặt backoff.
+        Trả về số giây backoff đã đặt.
+        """
+        state = self._state(url)
+        with self._lock:
+            state.failures += 1
+            state.rate = max(self.min_rate, state.rate * self.decrease)
+            if retry_after is not None:
+                delay = min(self.max_backoff, retry_after)
+            else:
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (state.failures - 1))
+                delay = delay / 2 + random.uniform(0, delay / 2)
+            state.backoff_until = max(state.backoff_until, time.monotonic() + delay)
+            state.tokens = 0.0
+        print(f"[WARNING] RateLimiter: {urlparse(url).netloc} bi day lui, cho {delay:.1f}s "
+              f"(toc do {state.rate:.2f} req/s, loi lien tiep: {state.failures}).")
+        return delay
+
+    def rate(self, url: str) -> float:
+        return self._state(url).rate
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Đọc header Retry-After dạng số giây (dạng ngày giờ không được hỗ trợ, trả về None)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def configure_rate_limiter(**kwargs) -> RateLimiter:
+    """Tạo (hoặc tạo lại) bộ giới hạn dùng chung với các tham số của RateLimiter."""
+    global _limiter
+    with _limiter_lock:
+        _limiter = RateLimiter(**kwargs)
+        return _limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Bộ giới hạn dùng chung; tạo với cấu hình mặc định nếu chưa được cấu hình."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
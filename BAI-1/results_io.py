@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# results_io.py
+import os
+from typing import Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+# Các cột chuỗi lặp lại nhiều, được mã hóa dạng dictionary trong Parquet
+DICTIONARY_COLUMNS = ('Team', 'Nation', 'Position')
+
+
+def parquet_path_for(csv_path: str) -> str:
+    """Đường dẫn file Parquet đi kèm một file CSV kết quả (cùng tên, đuôi .parquet)."""
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def write_parquet(df: pd.DataFrame, parquet_path: str, column_order: Optional[Sequence[str]] = None) -> bool:
+    """
+    Ghi DataFrame ra Parquet theo thứ tự cột `column_order` (thường là HEADER_ORDER).
+    Team/Nation/Position được ghi dạng category (dictionary-encoded).
+    Trả về False nếu thiếu pyarrow/fastparquet hoặc ghi lỗi.
+    """
+    out = df
+    if column_order is not None:
+        out = df[[col for col in column_order if col in df.columns]]
+    out = out.astype({col: 'category' for col in DICTIONARY_COLUMNS if col in out.columns})
+    try:
+        out.to_parquet(parquet_path, index=False)
+        return True
+    except ImportError as e:
+        print(f"[WARNING] Khong ghi duoc Parquet (thieu pyarrow?): {e}")
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Loi khi ghi Parquet '{parquet_path}': {e}")
+    return False
+
+
+def _parquet_columns(parquet_path: str) -> List[str]:
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(parquet_path).schema_arrow.names
+
+
+def _use_parquet(csv_path: str) -> bool:
+    """Dùng file Parquet đi kèm nếu có và không cũ hơn CSV."""
+    parquet_path = parquet_path_for(csv_path)
+    return os.path.exists(parquet_path) and (
+        not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path))
+
+
+def read_results(csv_path: str, columns: Optional[Sequence[str]] = None, **read_csv_kwargs) -> pd.DataFrame:
+    """
+    Đọc kết quả BAI-1, ưu tiên file Parquet đi kèm nếu có và không cũ hơn CSV.
+    Chỉ nạp các cột trong `columns` (cột không tồn tại được bỏ qua).
+    Nếu không dùng được Parquet thì đọc CSV với `read_csv_kwargs`.
+    """
+    parquet_path = parquet_path_for(csv_path)
+    if _use_parquet(csv_path):
+        try:
+            wanted = None
+            if columns is not None:
+                available = set(_parquet_columns(parquet_path))
+                wanted = [col for col in columns if col in available]
+            return pd.read_parquet(parquet_path, columns=wanted)
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Khong doc duoc Parquet '{parquet_path}', dung CSV: {e}")
+
+    if columns is not None:
+        wanted_set = set(columns)
+        read_csv_kwargs['usecols'] = lambda col: col.strip() in wanted_set
+    return pd.read_csv(csv_path, **read_csv_kwargs)
+
+
+def iter_results(csv_path: str, chunksize: int, **read_csv_kwargs) -> Iterator[pd.DataFrame]:
+    """
+    Đọc kết quả BAI-1 theo từng khối `chunksize` dòng (cùng quy tắc chọn Parquet/CSV như read_results),
+    để xử lý file lớn mà không nạp toàn bộ vào bộ nhớ.
+    """
+    parquet_path = parquet_path_for(csv_path)
+    if _use_parquet(csv_path):
+        try:
+            import pyarrow.parquet as pq
+            parquet_file = pq.ParquetFile(parquet_path)
+        except (ImportError, OSError, ValueError) as e:
+            print(f"Khong doc duoc Parquet '{parquet_path}', dung CSV: {e}")
+        else:
+            for batch in parquet_file.iter_batches(batch_size=chunksize):
+                yield batch.to_pandas()
+            return
+
+    with pd.read_csv(csv_path, chunksize=chunksize, **read_csv_kwargs) as reader:
+        yield from reader
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+# run_report.py
+"""
+Đo thời gian từng bước của một lần chạy và ghi báo cáo JSON.
+
+Mỗi bước (khởi động driver, tải trang, chờ bảng, phân tích, gộp, xuất file...) được ghi
+thành một span có nhãn bảng/lần thử; kèm theo là các bộ đếm (request, lần thử lại, byte tải về,
+cache hit/miss). Cuối lần chạy, `write()` ghi toàn bộ span và phần tổng hợp theo bước/bảng ra file.
+
+    with get_run_report().span('parse', table=table_id, attempt=1):
+        ...
+    get_run_report().count('http_requests')
+
+Có thể chụp thêm profile CPU của cả lần chạy bằng `profile_call` (cProfile, hoặc pyinstrument nếu có).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import pyinstrument
+except ImportError:  # pyinstrument là tùy chọn, thiếu thì chỉ dùng cProfile
+    pyinstrument = None
+
+
+class RunReport:
+    """Bộ thu thập span và bộ đếm của một lần chạy, an toàn khi dùng từ nhiều luồng."""
+    def __init__(self, name: str = 'run'):
+        self.name = name
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+        self.counters: Dict[str, float] = {}
+        self.info: Dict[str, Any] = {}
+
+    @contextmanager
+    def span(self, stage: str, **tags: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Đo thời gian một bước. Dict được yield có thể nhận thêm nhãn trong lúc chạy
+        (vd. span['bytes'] = len(html)); span lỗi được ghi với 'error'.
+        """
+        record: Dict[str, Any] = {'stage': stage, **tags}
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['start'] = round(start - self._start, 4)
+            record['duration'] = round(time.perf_counter() - start, 4)
+            record['thread'] = threading.current_thread().name
+            with self._lock:
+                self.spans.append(record)
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set_info(self, **info: Any) -> None:
+        with self._lock:
+            self.info.update(info)
+
+    def summary(self) -> Dict[str, Any]:
+        """Tổng hợp theo bước và theo bảng: số span, tổng/lớn nhất thời gian, số lỗi."""
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+
+        def add(groups: Dict[str, Dict[str, Any]], key: str, span: Dict[str, Any]) -> None:
+            group = groups.setdefault(key, {'count': 0, 'total': 0.0, 'max': 0.0, 'errors': 0})
+            group['count'] += 1
+            group['total'] = round(group['total'] + span['duration'], 4)
+            group['max'] = max(group['max'], span['duration'])
+            group['errors'] += 'error' in span
+
+        by_stage: Dict[str, Dict[str, Any]] = {}
+        by_table: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for span in spans:
+            add(by_stage, span['stage'], span)
+            if 'table' in span:
+                add(by_table.setdefault(str(span['table']), {}), span['stage'], span)
+
+        lookups = counters.get('cache_hits', 0) + counters.get('cache_misses', 0)
+        return {
+            'wall_time': round(time.perf_counter() - self._start, 4),
+            'by_stage': by_stage,
+            'by_table': by_table,
+            'cache_hit_rate': round(counters.get('cache_hits', 0) / lookups, 4) if lookups else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        summary = self.summary()
+        with self._lock:
+            return {
+                'name': self.name,
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+                'info': dict(self.info),
+                'counters': dict(self.counters),
+                'summary': summary,
+                'spans': sorted(self.spans, key=lambda s: s['start']),
+            }
+
+    def write(self, path: str) -> None:
+        """Ghi báo cáo ra file JSON (ghi file tạm rồi đổi tên)."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def print_summary(self) -> None:
+        summary = self.summary()
+        print(f"[INFO] Thoi gian theo buoc (tong {summary['wall_time']:.2f} giay):")
+        for stage, group in sorted(summary['by_stage'].items(), key=lambda item: -item[1]['total']):
+            print(f"    {stage:<14} {group['total']:>8.2f}s  x{group['count']:<4} max {group['max']:.2f}s"
+                  + (f"  loi: {group['errors']}" if group['errors'] else ""))
+        if summary['cache_hit_rate'] is not None:
+            print(f"    cache hit rate: {summary['cache_hit_rate']:.0%}")
+
+
+_report = RunReport()
+_report_lock = threading.Lock()
+
+
+def configure_run_report(name: str = 'run') -> RunReport:
+    """Bắt đầu báo cáo mới cho lần chạy (các span trước đó bị bỏ)."""
+    global _report
+    with _report_lock:
+        _report = RunReport(name)
+        return _report
+
+
+def get_run_report() -> RunReport:
+    """Báo cáo của lần chạy hiện tại; luôn có sẵn nên các module có thể ghi span mà không cần kiểm tra."""
+    return _report
+
+
+def profile_call(func: Callable[[], Any], mode: Optional[str], out_path: str) -> Any:
+    """
+    Chạy `func()` kèm profile CPU nếu `mode` là 'cprofile' hoặc 'pyinstrument'.
+    cProfile ghi `<out_path>.prof` (mở bằng snakeviz/pstats) và in 25 hàm tốn thời gian nhất;
+    pyinstrument ghi `<out_path>.html`. `mode=None` chỉ gọi `func()`.
+    """
+    if mode == 'pyinstrument' and pyinstrument is None:
+        print("[WARNING] Chua cai pyinstrument, dung cProfile thay the.")
+        mode = 'cprofile'
+    if mode == 'cprofile':
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func)
+        finally:
+            profiler.dump_stats(out_path + '.prof')
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+            print(f"[INFO] Da ghi profile vao {out_path}.prof")
+    if mode == 'pyinstrument':
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            return func()
+        finally:
+            profiler.stop()
+            with open(out_path + '.html', 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            print(f"[INFO] Da ghi profile vao {out_path}.html")
+    return func()
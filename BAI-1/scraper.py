@@ -1,15 +1,23 @@
 # -*- coding: utf-8 -*-
 # scraper.py
 import time
-from typing import List, Dict, Optional, Any
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple, Any
 
 from bs4 import BeautifulSoup, Tag
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+import http_fetch
+from driver_pool import get_driver_pool
+from html_parser import table_soup
+from page_cache import get_page_cache
+from rate_limit import get_rate_limiter
+from run_report import get_run_report
+from player_table import Player, PlayerTable
+
 def safe_cast_int(value_str: Optional[str], default: int = 0) -> int:
     """
     Chuyển đổi chuỗi sang số nguyên một cách an toàn.
@@ -24,109 +32,282 @@ def safe_cast_int(value_str: Optional[str], default: int = 0) -> int:
         print(f"[DEBUG] safe_cast_int: Không thể chuyển đổi '{value_str}' thành int.")
         return default
 
-class Player:
-    """Lớp đại diện cho một cầu thủ và dữ liệu thống kê của họ."""
-    def __init__(self, **kwargs: Any):
-        """Khởi tạo đối tượng Player với dữ liệu ban đầu."""
-        self.data: Dict[str, Any] = kwargs
-
-    def update(self, **kwargs: Any) -> None:
-        """Cập nhật dữ liệu cho cầu thủ."""
-        self.data.update(kwargs)
-
-    def export(self, export_keys: List[str]) -> List[Any]: 
-        """
-        Xuất dữ liệu theo đúng thứ tự các data_stat key được yêu cầu.
-        Trả về 'N/a' nếu key không tồn tại trong dữ liệu của cầu thủ.
-        """
-        return [self.data.get(key, 'N/a') for key in export_keys]
+def normalize_name(name: Optional[str]) -> str:
+    """Chuẩn hóa tên (bỏ dấu, chữ thường, bỏ khoảng trắng thừa) để làm khóa tra cứu."""
+    if not isinstance(name, str):
+        return ""
+    nfkd_form = unicodedata.normalize('NFKD', name)
+    return "".join(c for c in nfkd_form if not unicodedata.combining(c)).lower().strip()
 
-    def __repr__(self) -> str:
-        """Biểu diễn đối tượng Player dưới dạng chuỗi."""
-        name = self.data.get('player', 'Unknown Player')
-        team = self.data.get('team', 'Unknown Team')
-        age = self.data.get('age', 'N/A')
-        return f"<Player: {name} ({age} - {team})>"
 
-
-def get_soup(url: str, table_id: str, retries: int = 3, delay: int = 5) -> Optional[BeautifulSoup]:
+class PlayerIndex:
+    """
+    Chỉ mục băm các cầu thủ theo khóa (tên chuẩn hóa, đội).
+    Cầu thủ chuyển đội có một hàng cho mỗi CLB nên được gộp đúng hàng của CLB đó.
+    Giữ thêm chỉ mục theo tên để dùng khi hàng cập nhật không có cột đội.
     """
-    Sử dụng Selenium để tải trang web, đợi bảng xuất hiện và trả về đối tượng BeautifulSoup.
-    Thực hiện thử lại nếu gặp lỗi và có độ trễ giữa các lần thử.
+    def __init__(self, players: Iterable[Player] = ()):
+        self._by_key: Dict[Tuple[str, str], List[Player]] = {}
+        self._by_name: Dict[str, List[Player]] = {}
+        for player in players:
+            self.add(player)
+
+    @staticmethod
+    def make_key(name: Optional[str], team: Optional[str]) -> Tuple[str, str]:
+        return normalize_name(name), normalize_name(team)
+
+    def add(self, player: Player) -> None:
+        """Thêm cầu thủ vào chỉ mục (gọi mỗi khi tạo Player mới)."""
+        key = self.make_key(player.get('player'), player.get('team'))
+        self._by_key.setdefault(key, []).append(player)
+        self._by_name.setdefault(key[0], []).append(player)
+
+    def lookup(self, name: Optional[str], team: Optional[str] = None) -> List[Player]:
+        """Tìm cầu thủ theo (tên, đội); nếu không có đội thì tìm theo tên."""
+        if team and team != 'N/a':
+            return self._by_key.get(self.make_key(name, team), [])
+        return self._by_name.get(normalize_name(name), [])
+
+    def __len__(self) -> int:
+        return sum(len(players) for players in self._by_key.values())
+
+
+def get_soup(url: str, table_id: str, retries: int = 3,
+             use_http: bool = True) -> Optional[BeautifulSoup]:
     """
-    options = Options()
-    # options.add_argument('--headless')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+    Lấy BeautifulSoup chứa bảng `table_id`.
+    Đọc qua cache trang trên đĩa (nếu đã bật): mục còn hạn được dùng ngay,
+    mục hết hạn được tải lại bằng một request có điều kiện (ETag/Last-Modified), 304 thì dùng bản cache.
+    Ưu tiên tải HTML thô qua HTTP (kể cả bảng ẩn trong comment),
+    chỉ dùng Selenium khi bảng thật sự không có trong HTML hoặc HTTP thất bại.
+    """
+    html = get_table_html(url, table_id, retries=retries, use_http=use_http)
+    if html is None:
+        return None
+    with get_run_report().span('parse', table=table_id, bytes=len(html)):
+        return table_soup(html, table_id)
 
-    driver = None
+def get_table_html(url: str, table_id: str, retries: int = 3,
+                   use_http: bool = True) -> Optional[str]:
+    """
+    Như get_soup nhưng trả về chuỗi HTML của riêng bảng `table_id`, chưa phân tích,
+    để có thể chuyển sang tiến trình khác (parse_pool.py). None nếu tải thất bại.
+    """
+    report = get_run_report()
+    cache = get_page_cache()
+    entry = cache.get(url, table_id) if cache else None
+    if entry is not None and entry.fresh:
+        print(f"[DEBUG] Cache hit for table {table_id}")
+        report.count('cache_hits')
+        return entry.html
+
+    html = None
+    response_meta: Dict[str, Optional[str]] = {}
+    if use_http and http_fetch.is_available():
+        # Mục hết hạn: một GET có điều kiện, 304 thì dùng lại bản cache, 200 thì dùng luôn nội dung mới
+        html = http_fetch.get_table_html(url, table_id, retries=retries, response_meta=response_meta,
+                                         etag=entry.etag if entry else None,
+                                         last_modified=entry.last_modified if entry else None)
+        if response_meta.get('status') == 304:
+            print(f"[DEBUG] Cache revalidated (304) for table {table_id}")
+            report.count('cache_hits')
+            report.count('cache_revalidated')
+            cache.touch(url, table_id)
+            return entry.html
+        if html is None:
+            print(f"[INFO] Falling back to Selenium for table {table_id} at {url}")
+    if cache is not None:
+        report.count('cache_misses')
+
+    if html is None:
+        report.count('selenium_fallbacks')
+        soup = _get_soup_selenium(url, table_id, retries=retries)
+        table = soup.find('table', id=table_id) if soup is not None else None
+        html = str(table) if table is not None else None
+
+    if html is not None and cache is not None:
+        # Chỉ lưu phần bảng cần dùng để cache gọn và phân tích lại nhanh
+        cache.put(url, html, part=table_id,
+                  etag=response_meta.get('etag'), last_modified=response_meta.get('last_modified'))
+    return html
+
+def _get_soup_selenium(url: str, table_id: str, retries: int = 3) -> Optional[BeautifulSoup]:
+    """
+    Sử dụng Selenium để tải trang web, đợi bảng có dữ liệu và trả về đối tượng BeautifulSoup.
+    Driver được mượn từ pool dùng chung thay vì khởi động Chrome mới cho mỗi lần thử.
+    Mỗi lần tải đi qua bộ giới hạn dùng chung; lỗi làm host chậm lại và lần thử sau
+    chờ theo backoff của bộ giới hạn thay vì một khoảng cố định.
+    """
+    pool = get_driver_pool()
+    limiter = get_rate_limiter()
+    report = get_run_report()
+    row_selector = f'table#{table_id} tr'
     for attempt in range(retries):
+        tags = {'table': table_id, 'attempt': attempt + 1, 'via': 'selenium'}
+        if attempt:
+            report.count('retries')
         try:
             print(f"[DEBUG] Attempt {attempt + 1}/{retries} to fetch {url} for table {table_id}")
-            driver = webdriver.Chrome(options=options)
-            driver.get(url)
-            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, table_id)))
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
+            with pool.driver() as driver:
+                with limiter.slot(url), report.span('page_load', **tags):
+                    start = time.monotonic()
+                    driver.get(url)
+                    WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, table_id)))
+                    latency = time.monotonic() - start
+                with report.span('wait', **tags):
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    # Chờ bảng có hàng dữ liệu thay vì sleep cố định
+                    WebDriverWait(driver, 10).until(lambda d: len(d.find_elements(By.CSS_SELECTOR, row_selector)) > 1)
+                page_source = driver.page_source
+            report.count('bytes_downloaded', len(page_source))
+            with report.span('parse', **tags):
+                soup = table_soup(page_source, table_id)
+            limiter.success(url, latency)
             table_check = soup.find('table', id=table_id)
             if table_check and len(table_check.find_all('tr')) > 1:
                 print(f"[DEBUG] Successfully fetched content for table {table_id}")
                 return soup
-            else:
-                print(f"[WARNING] Table {table_id} found but empty or not fully loaded on attempt {attempt + 1}.")
-                if driver: driver.quit()
-                time.sleep(delay)
-                continue
+            print(f"[WARNING] Table {table_id} found but empty or not fully loaded on attempt {attempt + 1}.")
+            limiter.failure(url)
         except Exception as e:
             print(f"[ERROR] Attempt {attempt + 1}/{retries} failed for URL {url}, table {table_id}: {e}")
-            if driver: driver.quit()
             if attempt < retries - 1:
-                print(f"Waiting {delay} seconds before retrying...")
-                time.sleep(delay)
+                limiter.failure(url)
             else:
                 print("[ERROR] Max retries reached. Failed to fetch content.")
                 return None
-        finally:
-            if driver: driver.quit()
     return None
 
+
+def fetch_tables(table_urls: Dict[str, str], max_workers: int = 4,
+                 use_http: bool = True, use_async: bool = False) -> Dict[str, Optional[BeautifulSoup]]:
+    """
+    Tải song song HTML của nhiều bảng (table_id -> url) với số luồng giới hạn.
+    Giới hạn theo host (số request đồng thời, tốc độ, backoff) do bộ giới hạn dùng chung
+    trong rate_limit.py đảm nhận, nên nhiều lời gọi đồng thời (vd. archive.py) vẫn chung một hạn mức.
+    Với `use_async`, việc tải được giao cho tầng asyncio (async_fetch.py).
+    Trả về dict table_id -> BeautifulSoup (None nếu tải thất bại).
+    """
+    if use_async and use_http:
+        import async_fetch  # nhập trễ vì async_fetch dùng lại _get_soup_selenium của module này
+        if async_fetch.is_available():
+            return async_fetch.fetch_tables(table_urls, use_http=use_http)
+    return _fetch_concurrently(get_soup, table_urls, max_workers, use_http)
+
+def fetch_table_htmls(table_urls: Dict[str, str], max_workers: int = 4,
+                      use_http: bool = True, use_async: bool = False) -> Dict[str, Optional[str]]:
+    """
+    Như fetch_tables nhưng trả về chuỗi HTML của từng bảng, chưa phân tích,
+    để bước phân tích chạy riêng trong pool tiến trình (parse_pool.py).
+    """
+    if use_async and use_http:
+        import async_fetch  # nhập trễ vì async_fetch dùng lại _get_soup_selenium của module này
+        if async_fetch.is_available():
+            return async_fetch.fetch_table_htmls(table_urls, use_http=use_http)
+    return _fetch_concurrently(get_table_html, table_urls, max_workers, use_http)
+
+def _fetch_concurrently(fetch, table_urls: Dict[str, str], max_workers: int, use_http: bool) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    print(f"[INFO] Fetching {len(table_urls)} tables concurrently (workers={max_workers})...")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            table_id: executor.submit(fetch, url, table_id, use_http=use_http)
+            for table_id, url in table_urls.items()
+        }
+        for table_id, future in futures.items():
+            try:
+                results[table_id] = future.result()
+            except Exception as e:
+                print(f"[ERROR] Fetch failed for table {table_id}: {e}")
+                results[table_id] = None
+    return results
+
+def _row_cells(row: Tag) -> Optional[Dict[str, str]]:
+    """
+    Duyệt các ô của một hàng <tr> đúng một lần và trả về dict data-stat -> text.
+    Trả về None nếu đây là hàng tiêu đề (có <th scope="col">).
+    """
+    cells: Dict[str, str] = {}
+    for cell in row.find_all(['th', 'td'], recursive=False):
+        if cell.name == 'th':
+            if cell.get('scope') == 'col':
+                return None
+            continue
+        stat = cell.get('data-stat')
+        if stat is not None and stat not in cells:
+            cells[stat] = cell.get_text().strip()
+    return cells
+
+
+def _iter_table_rows(table: Tag) -> Iterator[Dict[str, str]]:
+    """Duyệt toàn bộ bảng một lượt, sinh ra dict data-stat -> text cho từng hàng dữ liệu."""
+    for row in table.find_all('tr'):
+        cells = _row_cells(row)
+        if cells is not None:
+            yield cells
+
+
+def _project_row(cells: Dict[str, str], fields: Iterable[str]) -> Dict[str, str]:
+    """Chỉ lấy các trường được yêu cầu từ dict ô của một hàng, thiếu thì gán 'N/a'."""
+    return {field: cells.get(field, 'N/a') for field in fields}
+
+
 def _parse_player_row(row: Tag, fields: List[str]) -> Optional[Dict[str, str]]: 
     """Phân tích một hàng <tr> trong bảng HTML để lấy dữ liệu cầu thủ."""
-    player_data: Dict[str, str] = {}
-    player_name: Optional[str] = None
+    cells = _row_cells(row)
+    if cells is None:
+        return None
+    return _player_from_cells(cells, fields)
 
-    for field in fields:
-        cell = row.find('td', {'data-stat': field})
-        player_data[field] = cell.text.strip() if cell else 'N/a'
-        if field == 'player':
-            player_name = player_data[field]
 
+def _player_from_cells(cells: Dict[str, str], fields: Iterable[str]) -> Optional[Dict[str, str]]:
+    """Tạo dữ liệu cầu thủ từ dict ô đã duyệt, bỏ qua hàng không có tên cầu thủ hợp lệ."""
+    player_name = cells.get('player')
     if not player_name or player_name == 'Player' or player_name == 'N/a':
         return None
+    return _project_row(cells, fields)
 
-    return player_data
 
+def _find_table(url: str, table_id: str, soup: Optional[BeautifulSoup], updating: bool = False) -> Optional[Tag]:
+    """Tìm thẻ bảng trong `soup` (tải trang nếu chưa có), in lỗi và trả về None nếu không có."""
+    if soup is None:
+        if updating:
+            print(f"[INFO] Updating player data from table '{table_id}' at {url}...")
+        else:
+            print(f"[INFO] Fetching initial player data from table '{table_id}' at {url}...")
+        soup = get_soup(url, table_id)
+    if not soup:
+        if updating:
+            print(f"[WARNING] Skipping update from table {table_id} due to fetch error.")
+        else:
+            print(f"[ERROR] Could not get soup for table '{table_id}'. Skipping.")
+        return None
+    html_table = soup.find('table', id=table_id)
+    if not html_table:
+        print(f"[ERROR] {'Update table' if updating else 'Table'} with ID '{table_id}' not found at {url}.")
+        return None
+    return html_table
 
-def get_players_from_table(url: str, table_id: str, fetch_fields: List[str], min_mins: int) -> List[Player]: 
+def get_players_from_table(url: str, table_id: str, fetch_fields: List[str], min_mins: int,
+                           soup: Optional[BeautifulSoup] = None,
+                           index: Optional[PlayerIndex] = None,
+                           table: Optional[PlayerTable] = None,
+                           rows: Optional[Iterable[Dict[str, str]]] = None) -> List[Player]: 
     """
     Lấy dữ liệu cầu thủ từ bảng HTML, lọc theo số phút và trả về list các đối tượng Player.
     Cho phép các cầu thủ trùng tên.
+    Nếu truyền sẵn `soup` (từ `fetch_tables`) thì chỉ phân tích, không tải lại trang.
+    Nếu truyền `rows` (các dict ô đã duyệt sẵn, vd. TableRows.iter_cells() của parse_pool)
+    thì bỏ qua cả bước phân tích HTML.
+    Nếu truyền `index`, mỗi cầu thủ mới được thêm luôn vào chỉ mục.
+    Dữ liệu được nạp vào `table` (PlayerTable dạng cột); nếu không truyền thì tạo bảng mới.
     """
-    print(f"[INFO] Fetching initial player data from table '{table_id}' at {url}...")
-    soup = get_soup(url, table_id)
-    if not soup:
-        print(f"[ERROR] Could not get soup for table '{table_id}'. Skipping.")
-        return []
-
-    table = soup.find('table', id=table_id)
-    if not table:
-        print(f"[ERROR] Table with ID '{table_id}' not found at {url}.")
-        return []
+    if rows is None:
+        html_table = _find_table(url, table_id, soup)
+        if html_table is None:
+            return []
+        rows = _iter_table_rows(html_table)
 
-    rows = table.find_all('tr')
     players: List[Player] = [] 
     processed_count = 0
 
@@ -134,61 +315,58 @@ def get_players_from_table(url: str, table_id: str, fetch_fields: List[str], min
     extract_fields = set(fetch_fields)
     extract_fields.add('player')
     extract_fields.add('minutes')
+    if table is None:
+        table = PlayerTable(extract_fields)
 
-    for row in rows:
-        if row.find('th', {'scope': 'col'}): continue
-
-        player_data = _parse_player_row(row, list(extract_fields))
+    for cells in rows:
+        player_data = _player_from_cells(cells, extract_fields)
         if not player_data: continue
 
-        player_name = player_data['player']
-
         # Lọc theo số phút (> min_mins)
         mins_played = safe_cast_int(player_data.get('minutes'))
         if mins_played <= min_mins: continue
 
         # Tạo đối tượng Player và thêm vào list
-        players.append(Player(**player_data))
+        player_obj = Player(table, table.append_row(player_data))
+        players.append(player_obj)
+        if index is not None:
+            index.add(player_obj)
         processed_count += 1
 
     print(f"[INFO] Found {processed_count} valid players (> {min_mins} minutes) in table: {table_id}")
     return players
 
-def update_players(players: List[Player], url: str, table_id: str, update_fields: List[str]) -> None: 
+def update_players(players: List[Player], url: str, table_id: str, update_fields: List[str],
+                   soup: Optional[BeautifulSoup] = None,
+                   index: Optional[PlayerIndex] = None,
+                   rows: Optional[Iterable[Dict[str, str]]] = None) -> None: 
     """
     Cập nhật dữ liệu cho các cầu thủ trong danh sách `players`.
-    Tìm và cập nhật TẤT CẢ các cầu thủ có cùng tên.
+    Tìm cầu thủ qua chỉ mục (tên, đội) và cập nhật TẤT CẢ các bản ghi khớp khóa.
+    Nếu truyền sẵn `soup` (từ `fetch_tables`) thì chỉ gộp dữ liệu, không tải lại trang;
+    nếu truyền `rows` (các dict ô đã duyệt sẵn) thì không phân tích HTML.
+    Nếu không truyền `index`, chỉ mục được dựng một lần từ `players`.
     """
-    print(f"[INFO] Updating player data from table '{table_id}' at {url}...")
-    soup = get_soup(url, table_id)
-    if not soup:
-        print(f"[WARNING] Skipping update from table {table_id} due to fetch error.")
-        return
-
-    table = soup.find('table', id=table_id)
-    if not table:
-        print(f"[ERROR] Update table with ID '{table_id}' not found at {url}.")
-        return
-
-    rows = table.find_all('tr')
+    if rows is None:
+        table = _find_table(url, table_id, soup, updating=True)
+        if table is None:
+            return
+        rows = _iter_table_rows(table)
+
+    if index is None:
+        index = PlayerIndex(players)
     updates_count = 0 
     player_key_field = 'player'
 
-    for row in rows:
-        if row.find('th', {'scope': 'col'}): continue
-
-        name_cell = row.find('td', {'data-stat': player_key_field})
-        if not name_cell: continue
-        update_name = name_cell.text.strip()
+    for cells in rows:
+        update_name = cells.get(player_key_field)
+        if update_name is None: continue
 
-        # Tìm tất cả cầu thủ trong list có cùng tên
-        found_players = [p for p in players if p.data.get('player') == update_name]
+        # Tra chỉ mục theo (tên, đội) thay vì duyệt toàn bộ danh sách
+        found_players = index.lookup(update_name, cells.get('team'))
         if found_players:
             # Lấy dữ liệu cập nhật từ hàng hiện tại
-            updates_data: Dict[str, str] = {}
-            for field in update_fields:
-                cell = row.find('td', {'data-stat': field})
-                updates_data[field] = cell.text.strip() if cell else 'N/a'
+            updates_data = _project_row(cells, update_fields)
 
             # Cập nhật cho TẤT CẢ các cầu thủ tìm được có cùng tên
             for player_obj in found_players:
@@ -196,4 +374,3 @@ def update_players(players: List[Player], url: str, table_id: str, update_fields
                 updates_count += 1
 
     print(f"[INFO] Applied updates from table {table_id} to relevant player entries (total updates: {updates_count}).")
-    time.sleep(1.5)
\ No newline at end of file
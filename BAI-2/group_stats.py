@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# group_stats.py
+# Tinh count/mean/std/median theo nhom cho moi cot so trong mot lan goi (dung cho part_2.py)
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+import pandas as pd
+
+STAT_NAMES = ('Median', 'Mean', 'Std')
+
+
+class GroupStats(NamedTuple):
+    """Ket qua theo nhom: moi mang co dang (so nhom, so cot); hang cuoi cung la nhom 'all'."""
+    count: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    median: np.ndarray
+
+
+class Moments(NamedTuple):
+    """
+    Tong hop gop duoc cua moi (nhom, cot): so gia tri, trung binh, M2 (tong binh phuong do lech),
+    nho nhat, lon nhat. Nhom rong co count = 0, cac gia tri con lai la NaN.
+    """
+    count: np.ndarray
+    mean: np.ndarray
+    m2: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+
+    @classmethod
+    def empty(cls, shape) -> "Moments":
+        return cls(np.zeros(shape), *(np.full(shape, np.nan) for _ in range(4)))
+
+    def std(self) -> np.ndarray:
+        """Do lech chuan ddof=1 giong pandas (NaN neu duoi 2 gia tri)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+def combine_moments(a: Moments, b: Moments) -> Moments:
+    """Gop tung phan tu hai Moments cung dang (cong thuc song song cua Chan)."""
+    count = a.count + b.count
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = b.mean - a.mean
+        mean = np.where(a.count == 0, b.mean, np.where(b.count == 0, a.mean, a.mean + delta * b.count / count))
+        m2 = np.where(a.count == 0, b.m2, np.where(b.count == 0, a.m2,
+                                                     a.m2 + b.m2 + delta ** 2 * a.count * b.count / count))
+    return Moments(count, mean, m2, np.fmin(a.low, b.low), np.fmax(a.high, b.high))
+
+
+def total_moments(moments: Moments) -> Moments:
+    """Gop tat ca cac nhom (hang) thanh mot nhom co dang (1, so cot)."""
+    count, mean = moments.count, moments.mean
+    total = count.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        merged_mean = np.where(total > 0, np.nansum(count * mean, axis=0) / total, np.nan)
+        merged_m2 = np.nansum(np.where(count > 0, moments.m2, 0.0), axis=0) + np.nansum(count * (mean - merged_mean) ** 2, axis=0)
+    merged_m2 = np.where(total > 0, merged_m2, np.nan)
+    with np.errstate(all='ignore'):
+        low = np.fmin.reduce(moments.low, axis=0) if len(count) else np.full(count.shape[1:], np.nan)
+        high = np.fmax.reduce(moments.high, axis=0) if len(count) else np.full(count.shape[1:], np.nan)
+    return Moments(total[None], merged_mean[None], merged_m2[None], low[None], high[None])
+
+
+def _segments(codes: np.ndarray, n_groups: int):
+    """Thu tu hang theo nhom va kich thuoc/vi tri bat dau cua tung doan (nhom phu n_groups o cuoi)."""
+    codes = np.asarray(codes, dtype=np.int64)
+    codes = np.where((codes >= 0) & (codes < n_groups), codes, n_groups)
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes, minlength=n_groups + 1)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    return codes, order, sizes, starts
+
+
+def _segment_moments(x: np.ndarray, sizes: np.ndarray, starts: np.ndarray) -> Moments:
+    """Moments cua tung doan lien tiep cua `x` (hang da xep theo nhom)."""
+    m = x.shape[1]
+    moments = Moments.empty((len(sizes), m))
+    present = sizes > 0
+    if not present.any() or m == 0:
+        return moments
+    valid = ~np.isnan(x)
+    seg_starts = starts[present]
+    seg_count = np.add.reduceat(valid, seg_starts, axis=0).astype(np.float64)
+    seg_sum = np.add.reduceat(np.where(valid, x, 0.0), seg_starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        seg_mean = seg_sum / seg_count
+    deviation = np.where(valid, x - np.repeat(seg_mean, sizes[present], axis=0), 0.0)
+    seg_m2 = np.add.reduceat(deviation ** 2, seg_starts, axis=0)
+    empty = seg_count == 0
+    moments.count[present] = seg_count
+    moments.mean[present] = seg_mean
+    moments.m2[present] = np.where(empty, np.nan, seg_m2)
+    moments.low[present] = np.where(empty, np.nan, np.minimum.reduceat(np.where(valid, x, np.inf), seg_starts, axis=0))
+    moments.high[present] = np.where(empty, np.nan, np.maximum.reduceat(np.where(valid, x, -np.inf), seg_starts, axis=0))
+    return moments
+
+
+def grouped_moments(values: np.ndarray, codes: np.ndarray, n_groups: int) -> Moments:
+    """
+    Moments cua ma tran `values` (hang = cau thu, cot = chi so; NaN = thieu) theo nhom `codes`.
+    Ket qua co n_groups + 1 hang: hang cuoi la cac hang co ma ngoai 0..n_groups-1.
+    Sap xep hang theo nhom mot lan, cong theo doan bang np.add.reduceat
+    (trung binh truoc, roi tong binh phuong do lech).
+    """
+    values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+    _, order, sizes, starts = _segments(codes, n_groups)
+    return _segment_moments(values[order], sizes, starts)
+
+
+def grouped_stats(values: np.ndarray, codes: np.ndarray, n_groups: int) -> GroupStats:
+    """
+    Thong ke cua ma tran `values` (hang = cau thu, cot = chi so; NaN = thieu) theo nhom `codes`
+    (0..n_groups-1; ma < 0 hoac >= n_groups chi duoc tinh vao dong 'all').
+    Std dung ddof=1 giong pandas (NaN neu nhom co duoi 2 gia tri).
+
+    - count/mean/M2: nhu grouped_moments, dong 'all' gop tu cac nhom (cong thuc cua Chan).
+    - median: doi gia tri thanh thu hang trong cot, ghep khoa (nhom, thu hang) thanh so nguyen
+      va sap xep mot lan cho moi cot; median cua nhom la phan tu giua cua doan.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    n, m = values.shape
+    codes, order, sizes, starts = _segments(codes, n_groups)
+    segments = _segment_moments(values[order], sizes, starts)
+    all_row = total_moments(segments)
+    count = np.vstack([segments.count[:n_groups], all_row.count])
+    mean = np.vstack([segments.mean[:n_groups], all_row.mean])
+    std = np.vstack([segments.std()[:n_groups], all_row.std()])
+    all_count = all_row.count[0]
+
+    median = np.full((n_groups + 1, m), np.nan)
+    if n and m:
+        # Lam viec tren ma tran chuyen vi (cot lien tuc trong bo nho) de sap xep theo hang nhanh hon.
+        # Thu hang toan cot (NaN xep cuoi); khoa nhom * n + hang giu gia tri cua moi nhom lien nhau va da sap xep
+        columns = np.ascontiguousarray(values.T)
+        rank_order = np.argsort(columns, axis=1)
+        sorted_values = np.take_along_axis(columns, rank_order, axis=1)
+        ranks = np.empty((m, n), dtype=np.int64)
+        np.put_along_axis(ranks, rank_order, np.arange(n, dtype=np.int64)[None, :], axis=1)
+        ranks += codes[None, :] * n
+        ranks.sort(axis=1)
+        group_count = count[:n_groups].T.astype(np.int64)
+        group_starts = starts[None, :n_groups]
+        rows = np.arange(m)[:, None]
+        lo = ranks[rows, np.minimum(group_starts + np.maximum(group_count - 1, 0) // 2, n - 1)] % n
+        hi = ranks[rows, np.minimum(group_starts + group_count // 2, n - 1)] % n
+        median[:n_groups] = np.where(group_count > 0, (sorted_values[rows, lo] + sorted_values[rows, hi]) / 2, np.nan).T
+        total = all_count.astype(np.int64)
+        cols = np.arange(m)
+        median[n_groups] = np.where(
+            total > 0,
+            (sorted_values[cols, np.maximum(total - 1, 0) // 2] + sorted_values[cols, np.minimum(total // 2, n - 1)]) / 2,
+            np.nan
+        )
+    return GroupStats(count, mean, std, median)
+
+
+def stats_layout(stats: GroupStats) -> np.ndarray:
+    """Xep ket qua thanh ma tran (so nhom, 3 * so cot) theo thu tu Median of, Mean of, Std of cua tung cot."""
+    return np.stack([stats.median, stats.mean, stats.std], axis=2).reshape(stats.mean.shape[0], -1)
+
+
+def layout_columns(columns: Sequence[str]) -> List[str]:
+    """Ten cot tuong ung voi stats_layout."""
+    return [f'{name} of {col}' for col in columns for name in STAT_NAMES]
+
+
+def results_frame(stats: GroupStats, columns: Sequence[str], group_names: Sequence[str]) -> pd.DataFrame:
+    """Bang ket qua kieu results2.csv: dong 'all' truoc, sau do tung nhom theo thu tu `group_names`."""
+    layout = stats_layout(stats)
+    frame = pd.DataFrame(np.vstack([layout[-1:], layout[:-1]]), columns=layout_columns(columns))
+    frame.insert(0, '', ['all'] + list(group_names))
+    return frame
+
+
+def clean_stats_frame(df: pd.DataFrame, exclude_cols: Sequence[str]) -> List[str]:
+    """
+    Chuan hoa (tai cho) ten cot, cot Team va cac cot thong ke cua part_2; tra ve danh sach cot so.
+    Xu ly so phut dang chuoi '2,250' cua results.csv cu, cot phan tram co dau '%', va ep kieu cac cot chuoi.
+    """
+    df.columns = df.columns.str.strip()
+    if 'Team' in df.columns:
+        df['Team'] = df['Team'].str.strip()
+    stats_columns = [col for col in df.columns if col not in exclude_cols]
+
+    if 'Playing Time: minutes' in df.columns and not pd.api.types.is_numeric_dtype(df['Playing Time: minutes']):
+        df['Playing Time: minutes'] = pd.to_numeric(
+            df['Playing Time: minutes'].astype(str).str.replace(',', '', regex=False), errors='coerce')
+
+    for col in [col for col in df.columns if '%' in col]:
+        if not pd.api.types.is_numeric_dtype(df[col]) and df[col].astype(str).str.contains('%').any():
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace('%', '', regex=False), errors='coerce')
+
+    for col in stats_columns:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    return df[stats_columns].select_dtypes(include=np.number).columns.tolist()
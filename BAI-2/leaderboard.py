@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+# leaderboard.py
+"""
+Chi muc bang xep hang luu tren dia cho du lieu cau thu cua BAI-1.
+
+Voi moi chi so, chi muc giu san hoan vi da sap xep (giam dan) cua toan bo cau thu
+va cua tung nhom theo Team / Position, nen cac truy van khong can doc lai file ket qua:
+    - top/bottom k cua mot chi so (toan giai, mot doi, hoac mot vi tri): O(k)
+    - cau thu dung thu n: O(1)
+    - thu hang / phan tram thu hang cua mot cau thu: O(log n) (tim nhi phan)
+Cau thu moi (khoa Player|Team chua co) duoc chen vao cac hoan vi da sap xep ma khong sap xep lai.
+
+Vi du:
+    python leaderboard.py top PrgP --k 5 --position DF
+    python leaderboard.py nth PrgP 5 --position DF
+    python leaderboard.py rank "Bukayo Saka" "Expected: xG" --team Arsenal
+"""
+import argparse
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, '..', 'BAI-1'))
+from results_io import read_results
+
+try:
+    from config import OUT_FILE
+except ImportError:
+    OUT_FILE = 'results.csv'
+
+RESULTS_PATH = os.path.join(current_dir, '..', 'BAI-1', OUT_FILE)
+INDEX_PATH = os.path.join(current_dir, 'leaderboard.npz')
+NON_STAT_COLUMNS = ['Player', 'Nation', 'Team', 'Position', 'Age']
+PARTITION_COLUMNS = ('Team', 'Position')
+INDEX_VERSION = 1
+
+Scope = Optional[Tuple[str, str]] # None = toan bo cau thu, ('Team', 'Arsenal'), ('Position', 'DF')
+
+
+class Entry(NamedTuple):
+    rank: int
+    player: str
+    team: str
+    value: float
+
+
+class _ScopeIndex:
+    """Hoan vi da sap xep cua mot nhom: perm[:, j] la chi so hang theo thu tu giam dan cua chi so j."""
+    def __init__(self, perm: np.ndarray, keys: np.ndarray):
+        self.perm = perm
+        self.keys = keys # Khoa da sap xep tang dan (= -gia tri, NaN -> +inf)
+        self.nvalid = np.isfinite(keys).sum(axis=0)
+
+
+def _sort_keys(values: np.ndarray) -> np.ndarray:
+    """Khoa sap xep tang dan tuong ung voi gia tri giam dan; NaN xep cuoi."""
+    return np.where(np.isnan(values), np.inf, -values)
+
+
+def _split_positions(position) -> List[str]:
+    if not isinstance(position, str):
+        return []
+    return [p.strip() for p in position.split(',') if p.strip()]
+
+
+def load_stat_frame(path: str = RESULTS_PATH) -> pd.DataFrame:
+    """Doc ket qua BAI-1 va ep kieu so cho cac cot chi so (bo dau ',' hang nghin cua file CSV cu)."""
+    df = read_results(path, na_values=['N/a'])
+    for col in df.columns:
+        if col in NON_STAT_COLUMNS or pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    return df
+
+
+class Leaderboard:
+    """Chi muc xep hang theo tung chi so, co the chia nhom theo Team va Position."""
+    def __init__(self, players: Sequence[str], teams: Sequence[str], positions: Sequence[str],
+                 stats: Sequence[str], values: np.ndarray, partition_by: Sequence[str] = PARTITION_COLUMNS):
+        self.players = [str(p) for p in players]
+        self.teams = ['' if pd.isna(t) else str(t) for t in teams]
+        self.positions = ['' if pd.isna(p) else str(p) for p in positions]
+        self.stats = list(stats)
+        self.values = np.asarray(values, dtype=np.float64).reshape(len(self.players), len(self.stats))
+        self.partition_by = tuple(partition_by)
+        self._stat_pos = {stat: j for j, stat in enumerate(self.stats)}
+        self._rows_by_player: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.players):
+            self._rows_by_player.setdefault(name, []).append(i)
+        self._scopes: Dict[Scope, _ScopeIndex] = {}
+        self._build_scopes(range(len(self.players)))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, partition_by: Sequence[str] = PARTITION_COLUMNS) -> "Leaderboard":
+        stats = [col for col in df.columns
+                 if col not in NON_STAT_COLUMNS and pd.api.types.is_numeric_dtype(df[col]) and df[col].notna().any()]
+        return cls(
+            df['Player'].tolist(),
+            df['Team'].tolist() if 'Team' in df.columns else [''] * len(df),
+            df['Position'].tolist() if 'Position' in df.columns else [''] * len(df),
+            stats,
+            df[stats].to_numpy(dtype=np.float64, na_value=np.nan),
+            partition_by
+        )
+
+    # --- Dung va cap nhat ---
+    def _scope_keys(self, row: int) -> List[Scope]:
+        scopes: List[Scope] = [None]
+        if 'Team' in self.partition_by and self.teams[row]:
+            scopes.append(('Team', self.teams[row]))
+        if 'Position' in self.partition_by:
+            scopes.extend(('Position', p) for p in _split_positions(self.positions[row]))
+        return scopes
+
+    def _members(self, rows) -> Dict[Scope, List[int]]:
+        members: Dict[Scope, List[int]] = {}
+        for row in rows:
+            for scope in self._scope_keys(row):
+                members.setdefault(scope, []).append(row)
+        return members
+
+    def _build_scopes(self, rows) -> None:
+        for scope, member_rows in self._members(rows).items():
+            members = np.asarray(member_rows, dtype=np.intp)
+            keys = _sort_keys(self.values[members])
+            order = np.argsort(keys, axis=0, kind='stable')
+            self._scopes[scope] = _ScopeIndex(members[order], np.take_along_axis(keys, order, axis=0))
+
+    def add_rows(self, df: pd.DataFrame) -> int:
+        """
+        Them cac cau thu moi vao chi muc: moi hang moi duoc chen vao dung vi tri trong cac
+        hoan vi da sap xep (tim nhi phan + chen), khong sap xep lai ca nhom. Tra ve so hang da them.
+        """
+        if df.empty:
+            return 0
+        start = len(self.players)
+        new_values = np.column_stack([
+            pd.to_numeric(df[stat], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            if stat in df.columns else np.full(len(df), np.nan)
+            for stat in self.stats
+        ]) if self.stats else np.empty((len(df), 0))
+        self.values = np.vstack([self.values, new_values])
+        for offset, (name, team, position) in enumerate(zip(
+                df['Player'], df.get('Team', pd.Series([''] * len(df))), df.get('Position', pd.Series([''] * len(df))))):
+            self.players.append(str(name))
+            self.teams.append('' if pd.isna(team) else str(team))
+            self.positions.append('' if pd.isna(position) else str(position))
+            self._rows_by_player.setdefault(str(name), []).append(start + offset)
+
+        new_rows = range(start, len(self.players))
+        for scope, member_rows in self._members(new_rows).items():
+            existing = self._scopes.get(scope)
+            members = np.asarray(member_rows, dtype=np.intp)
+            keys = _sort_keys(self.values[members])
+            order = np.argsort(keys, axis=0, kind='stable')
+            added_perm = members[order]
+            added_keys = np.take_along_axis(keys, order, axis=0)
+            if existing is None:
+                self._scopes[scope] = _ScopeIndex(added_perm, added_keys)
+                continue
+            perm = np.empty((existing.perm.shape[0] + len(members), len(self.stats)), dtype=np.intp)
+            merged = np.empty(perm.shape, dtype=np.float64)
+            for j in range(len(self.stats)):
+                # side='right': hang moi dung sau cac hang cu cung gia tri (giu thu tu xuat hien)
+                at = np.searchsorted(existing.keys[:, j], added_keys[:, j], side='right')
+                perm[:, j] = np.insert(existing.perm[:, j], at, added_perm[:, j])
+                merged[:, j] = np.insert(existing.keys[:, j], at, added_keys[:, j])
+            self._scopes[scope] = _ScopeIndex(perm, merged)
+        return len(new_rows)
+
+    # --- Truy van ---
+    def resolve_stat(self, stat: str) -> int:
+        """Vi tri cot cua chi so: ten day du, hoac phan cuoi duy nhat (vd. 'Save%' -> '...: Save%')."""
+        if stat in self._stat_pos:
+            return self._stat_pos[stat]
+        matches = [s for s in self.stats if s.endswith(': ' + stat) or s.endswith(' ' + stat)]
+        if len(matches) == 1:
+            return self._stat_pos[matches[0]]
+        if matches:
+            raise KeyError(f"Chi so '{stat}' khong ro rang: {matches}")
+        raise KeyError(f"Khong co chi so '{stat}'")
+
+    def _scope(self, team: Optional[str] = None, position: Optional[str] = None) -> _ScopeIndex:
+        if team and position:
+            raise ValueError("Chi loc theo mot trong team hoac position")
+        scope: Scope = ('Team', team) if team else ('Position', position) if position else None
+        if scope is not None and scope[0] not in self.partition_by:
+            raise ValueError(f"Chi muc khong chia nhom theo {scope[0]}")
+        index = self._scopes.get(scope)
+        if index is None:
+            raise KeyError(f"Khong co nhom {scope}")
+        return index
+
+    def _entry(self, index: _ScopeIndex, j: int, position: int) -> Entry:
+        row = int(index.perm[position, j])
+        rank = int(np.searchsorted(index.keys[:, j], index.keys[position, j], side='left')) + 1
+        return Entry(rank, self.players[row], self.teams[row], float(self.values[row, j]))
+
+    def top(self, stat: str, k: int = 3, team: Optional[str] = None, position: Optional[str] = None,
+            ascending: bool = False) -> List[Entry]:
+        """k cau thu cao nhat (hoac thap nhat neu ascending) cua chi so trong nhom. O(k)."""
+        j = self.resolve_stat(stat)
+        index = self._scope(team, position)
+        nvalid = int(index.nvalid[j])
+        positions = range(min(k, nvalid)) if not ascending else range(nvalid - 1, max(nvalid - k, 0) - 1, -1)
+        return [self._entry(index, j, p) for p in positions]
+
+    def nth(self, stat: str, n: int, team: Optional[str] = None, position: Optional[str] = None) -> Optional[Entry]:
+        """Cau thu dung thu n (tinh tu 1, theo thu tu giam dan) trong nhom, None neu nhom it hon n cau thu."""
+        j = self.resolve_stat(stat)
+        index = self._scope(team, position)
+        if not 1 <= n <= index.nvalid[j]:
+            return None
+        return self._entry(index, j, n - 1)
+
+    def _player_row(self, player: str, team: Optional[str] = None) -> int:
+        rows = self._rows_by_player.get(player, [])
+        if team:
+            rows = [r for r in rows if self.teams[r] == team]
+        if not rows:
+            raise KeyError(f"Khong co cau thu '{player}'" + (f" o doi '{team}'" if team else ''))
+        return rows[0]
+
+    def rank(self, player: str, stat: str, player_team: Optional[str] = None,
+             team: Optional[str] = None, position: Optional[str] = None) -> Optional[Tuple[int, int, float]]:
+        """
+        Thu hang cua cau thu trong nhom: (hang, so cau thu co gia tri, phan tram thu hang).
+        Cau thu bang diem cung hang; phan tram = % cau thu thap hon + mot nua so bang diem. O(log n).
+        None neu cau thu khong co gia tri chi so nay.
+        """
+        j = self.resolve_stat(stat)
+        index = self._scope(team, position)
+        value = self.values[self._player_row(player, player_team), j]
+        if np.isnan(value):
+            return None
+        nvalid = int(index.nvalid[j])
+        column = index.keys[:nvalid, j]
+        higher = int(np.searchsorted(column, -value, side='left'))
+        tied = int(np.searchsorted(column, -value, side='right')) - higher
+        lower = nvalid - higher - tied
+        return higher + 1, nvalid, 100.0 * (lower + 0.5 * tied) / nvalid
+
+    # --- Luu / doc ---
+    def save(self, path: str = INDEX_PATH, source_mtime: float = 0.0) -> None:
+        scopes = list(self._scopes)
+        arrays = {
+            'version': np.array(INDEX_VERSION),
+            'source_mtime': np.array(source_mtime),
+            'players': np.array(self.players, dtype=str),
+            'teams': np.array(self.teams, dtype=str),
+            'positions': np.array(self.positions, dtype=str),
+            'stats': np.array(self.stats, dtype=str),
+            'partition_by': np.array(self.partition_by, dtype=str),
+            'values': self.values,
+            'scopes': np.array(['' if s is None else f"{s[0]}={s[1]}" for s in scopes], dtype=str),
+        }
+        for i, scope in enumerate(scopes):
+            arrays[f'perm_{i}'] = self._scopes[scope].perm.astype(np.int32)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> Tuple["Leaderboard", float]:
+        """Doc chi muc da luu, tra ve (Leaderboard, mtime cua file nguon luc dung chi muc)."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != INDEX_VERSION:
+                raise ValueError("Phien ban chi muc khong khop")
+            board = cls.__new__(cls)
+            board.players = data['players'].tolist()
+            board.teams = data['teams'].tolist()
+            board.positions = data['positions'].tolist()
+            board.stats = data['stats'].tolist()
+            board.partition_by = tuple(data['partition_by'].tolist())
+            board.values = data['values'].reshape(len(board.players), len(board.stats))
+            board._stat_pos = {stat: j for j, stat in enumerate(board.stats)}
+            board._rows_by_player = {}
+            for i, name in enumerate(board.players):
+                board._rows_by_player.setdefault(name, []).append(i)
+            board._scopes = {}
+            keys = _sort_keys(board.values)
+            for i, label in enumerate(data['scopes'].tolist()):
+                scope = None if label == '' else tuple(label.split('=', 1))
+                perm = data[f'perm_{i}'].astype(np.intp)
+                board._scopes[scope] = _ScopeIndex(perm, np.take_along_axis(keys, perm, axis=0))
+            return board, float(data['source_mtime'])
+
+
+def _row_keys(players, teams) -> List[str]:
+    return [f"{p}|{'' if pd.isna(t) else t}" for p, t in zip(players, teams)]
+
+
+def load_or_build(results_path: str = RESULTS_PATH, index_path: str = INDEX_PATH) -> Leaderboard:
+    """
+    Dung chi muc da luu neu file ket qua khong doi. Neu file ket qua chi co them cau thu moi
+    (cac hang cu giu nguyen gia tri) thi chen them vao chi muc; neu khong thi dung lai tu dau.
+    """
+    source_mtime = os.path.getmtime(results_path) if os.path.exists(results_path) else 0.0
+    board = None
+    if os.path.exists(index_path):
+        try:
+            board, indexed_mtime = Leaderboard.load(index_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Khong doc duoc chi muc '{index_path}', dung lai: {e}")
+            board = None
+        if board is not None and indexed_mtime == source_mtime:
+            return board
+
+    df = load_stat_frame(results_path)
+    if board is not None:
+        keys = _row_keys(df['Player'], df.get('Team', pd.Series([''] * len(df))))
+        known = {key: i for i, key in enumerate(_row_keys(board.players, board.teams))}
+        is_new = np.array([key not in known for key in keys], dtype=bool)
+        old_rows = [known[key] for key in np.array(keys, dtype=object)[~is_new]]
+        unchanged = (len(old_rows) == len(board.players) and set(board.stats) <= set(df.columns))
+        if unchanged:
+            old_values = df.loc[~is_new, board.stats].to_numpy(dtype=np.float64, na_value=np.nan)
+            unchanged = np.array_equal(old_values, board.values[old_rows], equal_nan=True)
+        if unchanged:
+            added = board.add_rows(df.loc[is_new])
+            print(f"Chi muc: them {added} cau thu moi.")
+            board.save(index_path, source_mtime)
+            return board
+
+    board = Leaderboard.from_frame(df)
+    print(f"Chi muc: dung moi cho {len(board.players)} cau thu x {len(board.stats)} chi so.")
+    board.save(index_path, source_mtime)
+    return board
+
+
+def _format_entry(entry: Entry) -> str:
+    value = int(entry.value) if float(entry.value).is_integer() else entry.value
+    return f"{entry.rank:>4}. {entry.player} ({entry.team}): {value}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Truy van bang xep hang cau thu theo chi so.")
+    parser.add_argument('--results', default=RESULTS_PATH, help="File ket qua cua BAI-1")
+    parser.add_argument('--index', default=INDEX_PATH, help="File chi muc (.npz)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('top', 'bottom'):
+        p = sub.add_parser(name, help=f"{name} k cau thu cua mot chi so")
+        p.add_argument('stat')
+        p.add_argument('--k', type=int, default=3)
+    p = sub.add_parser('nth', help="Cau thu dung thu n cua mot chi so")
+    p.add_argument('stat')
+    p.add_argument('n', type=int)
+    p = sub.add_parser('rank', help="Thu hang va phan tram thu hang cua mot cau thu")
+    p.add_argument('player')
+    p.add_argument('stat')
+    p.add_argument('--player-team', help="Doi cua cau thu (khi trung ten)")
+    sub.add_parser('build', help="Chi dung/cap nhat chi muc")
+    for p in sub.choices.values():
+        p.add_argument('--team', help="Chi xet cau thu cua doi nay")
+        p.add_argument('--position', help="Chi xet cau thu o vi tri nay (DF, MF, FW, GK)")
+    args = parser.parse_args()
+
+    board = load_or_build(args.results, args.index)
+    try:
+        if args.command in ('top', 'bottom'):
+            for entry in board.top(args.stat, args.k, team=args.team, position=args.position,
+                                   ascending=args.command == 'bottom'):
+                print(_format_entry(entry))
+        elif args.command == 'nth':
+            entry = board.nth(args.stat, args.n, team=args.team, position=args.position)
+            print(_format_entry(entry) if entry else f"Nhom co it hon {args.n} cau thu co chi so nay.")
+        elif args.command == 'rank':
+            result = board.rank(args.player, args.stat, args.player_team, team=args.team, position=args.position)
+            if result is None:
+                print(f"{args.player} khong co gia tri cho chi so nay.")
+            else:
+                rank, total, percentile = result
+                print(f"{args.player}: hang {rank}/{total}, phan tram thu hang {percentile:.1f}")
+    except (KeyError, ValueError) as e:
+        print(f"Loi: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,28 @@
+import argparse
 import pandas as pd
 import numpy as np
 import os
+import sys
 import traceback
 
 # --- Buoc 1: Doc config va xac dinh duong dan ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, '..', 'BAI-1'))
+from results_io import read_results
+from ranking import TIE_MODES, top_bottom_k, coerce_stat_columns, format_top_lines
+
+parser = argparse.ArgumentParser(description="Tim k cau thu cao nhat/thap nhat cua moi chi so.")
+parser.add_argument('--k', type=int, default=3, help="So cau thu moi chieu (mac dinh 3)")
+parser.add_argument('--ties', choices=TIE_MODES, default='first',
+                    help="first: du k cau thu, gia tri bang nhau theo thu tu trong file; all: lay ca cac cau thu bang diem hang thu k")
+parser.add_argument('--chunksize', type=int, default=None,
+                    help="Doc file theo tung khoi N dong (bo nho gioi han) thay vi nap ca file")
+args = parser.parse_args()
+top_k = max(1, args.k)
 
 try:
     from config import OUT_FILE, HEADER_ORDER
-    input_path = os.path.join(current_dir, OUT_FILE)
+    input_path = os.path.join(current_dir, '..', 'BAI-1', OUT_FILE)
     print("Da import du lieu tu config.py")
 except ImportError:
     print("Loi: Khong the import tu config.py. Dung duong dan mac dinh.")
@@ -19,80 +33,68 @@ except Exception as e:
     input_path = os.path.join(current_dir, '..', 'BAI-1', 'results.csv')
     HEADER_ORDER = None
 
-output_path = os.path.join(current_dir, 'top_3.txt')
+output_path = os.path.join(current_dir, f'top_{top_k}.txt')
 
 # --- Buoc 2: Doc file CSV ---
-if not os.path.exists(input_path):
+if not os.path.exists(input_path) and not os.path.exists(os.path.splitext(input_path)[0] + '.parquet'):
     print(f"Loi: Tep '{input_path}' khong ton tai.")
     exit()
 
-try:
-    df = pd.read_csv(input_path, na_values=['N/a'])
-    print("Da doc du lieu CSV thanh cong.")
-except Exception as e:
-    print(f"Loi khi doc file CSV: {e}")
-    exit()
-
-# --- Buoc 3: Xac dinh cot thong ke ---
+# Xac dinh cot khong thong ke
+non_stat_candidates = ['Player', 'Nation', 'Team', 'Position', 'Age']
 player_column = 'Player'
 
-if player_column not in df.columns:
-    print(f"Loi: Cot '{player_column}' khong ton tai trong file.")
-    exit()
-
-# Xac dinh cot khong thong ke
-if HEADER_ORDER:
-    non_stat_cols = [col for col in ['Player', 'Nation', 'Team', 'Position', 'Age'] if col in HEADER_ORDER]
+if args.chunksize:
+    # --- Buoc 3-4 (che do doc tung khoi): chi giu cac cau thu ung vien top/bottom k ---
+    from streaming import stream_top_bottom
+    try:
+        stat_columns, players, values, top, bottom, integer = stream_top_bottom(
+            input_path, args.chunksize, non_stat_candidates, k=top_k, ties=args.ties, na_values=['N/a'])
+    except (KeyError, ValueError) as e:
+        print(f"Loi khi doc file theo khoi: {e}")
+        exit()
+    print("Da doc du lieu theo khoi thanh cong.")
 else:
-    non_stat_cols = [col for col in ['Player', 'Nation', 'Team', 'Position', 'Age'] if col in df.columns]
-
-if player_column not in non_stat_cols:
-    non_stat_cols.append(player_column)
-
-# Loc cot thong ke (kieu so)
-stat_columns = []
-for col in df.columns:
-    if col in non_stat_cols:
-        continue
-    numeric_col = pd.to_numeric(df[col], errors='coerce')
-    if not numeric_col.isnull().all():
-        df[col] = numeric_col
-        stat_columns.append(col)
+    try:
+        df = read_results(input_path, na_values=['N/a'])
+        print("Da doc du lieu thanh cong.")
+    except Exception as e:
+        print(f"Loi khi doc file CSV: {e}")
+        exit()
+
+    # --- Buoc 3: Xac dinh cot thong ke ---
+    if player_column not in df.columns:
+        print(f"Loi: Cot '{player_column}' khong ton tai trong file.")
+        exit()
+
+    if HEADER_ORDER:
+        non_stat_cols = [col for col in non_stat_candidates if col in HEADER_ORDER]
+    else:
+        non_stat_cols = [col for col in non_stat_candidates if col in df.columns]
+
+    if player_column not in non_stat_cols:
+        non_stat_cols.append(player_column)
+
+    # Loc cot thong ke (kieu so)
+    stat_columns = coerce_stat_columns(df, non_stat_cols)
+
+    # --- Buoc 4: Xu ly top k ---
+    # Tim top/bottom k cua tat ca cac cot mot lan tren ma tran so, khong sap xep tung cot
+    values = df[stat_columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    top, bottom = top_bottom_k(values, k=top_k, ties=args.ties)
+    players = df[player_column].to_numpy(dtype=object)
+    integer = [pd.api.types.is_integer_dtype(df[stat]) for stat in stat_columns]
 
 if not stat_columns:
     print("Khong tim thay cot thong ke phu hop.")
     exit()
 
-# --- Buoc 4: Xu ly top 3 va ghi ra file ---
+lines = format_top_lines(stat_columns, players, values, top, bottom, integer, top_k)
+
 try:
+    print(f"Dang ghi top {top_k}...")
     with open(output_path, 'w', encoding='utf-8') as f:
-        print("Dang xu ly va ghi top 3...")
-
-        for stat in stat_columns:
-            f.write(f"Chi so: {stat}\n")
-            df_stat = df[[player_column, stat]].dropna()
-
-            if df_stat.empty:
-                f.write("Khong co du lieu hop le\n\n")
-                continue
-
-            if df_stat[stat].nunique() == 1:
-                f.write(f"Tat ca cau thu cung gia tri: {df_stat[stat].iloc[0]}\n")
-                top_3 = bottom_3 = df_stat.head(3)
-            else:
-                top_3 = df_stat.sort_values(by=stat, ascending=False).head(3)
-                bottom_3 = df_stat.sort_values(by=stat, ascending=True).head(3)
-
-            f.write("3 cau thu diem cao nhat:\n")
-            for _, row in top_3.iterrows():
-                f.write(f"   {row[player_column]}: {row[stat]}\n")
-
-            f.write("3 cau thu diem thap nhat:\n")
-            for _, row in bottom_3.iterrows():
-                f.write(f"   {row[player_column]}: {row[stat]}\n")
-
-            f.write("\n")
-
+        f.write("\n".join(lines) + "\n")
     print(f"Hoan thanh. Da luu ket qua vao: {output_path}")
 
 except Exception as e:
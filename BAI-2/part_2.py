@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+import argparse
 import pandas as pd
 import os
+import sys
 import numpy as np
 
 # --- Dinh nghia duong dan ---
@@ -8,6 +10,9 @@ import numpy as np
 # Khi ban chay tren may, neu file CSV khong cung thu muc, hay sua duong dan nay
 current_dir = os.path.dirname(os.path.abspath(__file__)) if '__file__' in locals() else '.'
 csv_path = os.path.join(current_dir,'..','BAI-1', 'results.csv') # File input (dam bao file nay o cung thu muc voi ma code)
+sys.path.insert(0, os.path.join(current_dir, '..', 'BAI-1'))
+from results_io import read_results # Uu tien results.parquet neu co
+from group_stats import clean_stats_frame, grouped_stats, results_frame
 # Doi ten file output de co ca median cua doi
 output_filename = 'results2.csv'
 output_path = os.path.join(current_dir, output_filename) # Duong dan file output
@@ -16,113 +21,91 @@ output_path = os.path.join(current_dir, output_filename) # Duong dan file output
 # Cac gia tri se duoc coi la NA khi doc file CSV
 na_values_list = ['N/a', 'n/a', 'NA', 'na', 'NaN', 'nan', '']
 
-try:
-    # --- Buoc 1: Doc du lieu ---
-    print(f"Dang doc du lieu tu: {csv_path}")
-    df = pd.read_csv(csv_path, na_values=na_values_list, encoding='utf-8')
-    df.columns = df.columns.str.strip()
-    if 'Team' in df.columns:
-        df['Team'] = df['Team'].str.strip()
-    print("Doc du lieu thanh cong.")
-
-    # --- Buoc 2: Xac dinh va chuan bi cac cot so ---
-    exclude_cols = [
-        'Player', 'Nation', 'Team', 'Position', 'Age',
-        'Playing Time: matches played', 'Playing Time: starts'
-    ]
-    available_cols = df.columns.tolist()
-    stats_columns = [col for col in available_cols if col not in exclude_cols]
-
-    if 'Playing Time: minutes' in df.columns:
-        df['Playing Time: minutes'] = df['Playing Time: minutes'].astype(str).str.replace(',', '', regex=False)
-        df['Playing Time: minutes'] = pd.to_numeric(df['Playing Time: minutes'], errors='coerce')
-
-    percent_cols = [col for col in df.columns if '%' in col]
-    for col in percent_cols:
-        if col in df.columns and df[col].dtype == 'object':
-            if df[col].astype(str).str.contains('%').any():
-                df[col] = df[col].astype(str).str.replace('%', '', regex=False)
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    for col in stats_columns:
-        if df[col].dtype == 'object':
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-    numeric_cols = df[stats_columns].select_dtypes(include=np.number).columns.tolist()
-
-    if not numeric_cols:
-        print("Loi: Khong tim thay cot du lieu so de tinh toan thong ke.")
-        exit()
-
-    print(f"So cot so se duoc tinh toan: {len(numeric_cols)}")
-
-    # --- Buoc 3: Tinh toan thong ke tong the (all) ---
-    print("Dang tinh toan thong ke tong the (all)...")
-    overall_stats = df[numeric_cols].agg(['median', 'mean', 'std']).T
-    overall_stats.columns = ['Median', 'Mean', 'Std']
-    print("Tinh toan thong ke tong the hoan tat.")
-
-    # --- Buoc 4: Tao dong 'all' ---
-    all_row_data = {'': ['all']}
-    for col in numeric_cols:
-        col_median = f'Median of {col}'
-        col_mean = f'Mean of {col}'
-        col_std = f'Std of {col}'
-        if col in overall_stats.index:
-            all_row_data[col_median] = [overall_stats.loc[col, 'Median']]
-            all_row_data[col_mean] = [overall_stats.loc[col, 'Mean']]
-            all_row_data[col_std] = [overall_stats.loc[col, 'Std']]
-        else:
-            all_row_data[col_median] = [pd.NA]
-            all_row_data[col_mean] = [pd.NA]
-            all_row_data[col_std] = [pd.NA]
-    all_row_df = pd.DataFrame(all_row_data)
-    print("Tao dong 'all' hoan tat.")
+# Cac cot khong tinh thong ke
+exclude_cols = [
+    'Player', 'Nation', 'Team', 'Position', 'Age',
+    'Playing Time: matches played', 'Playing Time: starts'
+]
+
+parser = argparse.ArgumentParser(description="Tinh median/mean/std moi chi so cho toan giai va tung doi.")
+parser.add_argument('--chunksize', type=int, default=None,
+                    help="Doc file theo tung khoi N dong (bo nho gioi han); mac dinh median lay tu sketch KLL")
+parser.add_argument('--median', choices=['exact', 'approx'], default=None,
+                    help="exact: median chinh xac (giu moi gia tri); approx: sketch KLL gop duoc. "
+                         "Mac dinh exact, hoac approx khi dung --chunksize")
+parser.add_argument('--epsilon', type=float, default=0.01,
+                    help="Sai so hang cho phep cua median xap xi (mac dinh 0.01)")
+parser.add_argument('--merge-sketches', nargs='+', default=[], metavar='FILE',
+                    help="Gop them thong ke da luu (.npz) cua mua/giai khac hoac cua cac tran truoc")
+parser.add_argument('--save-sketches', metavar='FILE',
+                    help="Luu thong ke gop duoc (moments + sketch moi (doi, chi so)) ra file .npz")
+parser.add_argument('--sketches-only', action='store_true',
+                    help="Chi gop cac file --merge-sketches, khong doc du lieu goc")
+args = parser.parse_args()
+median_mode = args.median or ('approx' if args.chunksize else 'exact')
+use_accumulator = bool(args.chunksize or median_mode == 'approx' or args.merge_sketches
+                       or args.save_sketches or args.sketches_only)
 
-    # --- Buoc 5: Tinh toan thong ke theo doi (Median, Mean, Std) ---
-    print("Dang tinh toan thong ke theo doi (Median, Mean, Std)...")
-    if 'Team' not in df.columns:
-        print("Loi: Khong tim thay cot 'Team' de nhom.")
-        exit()
-    team_stats = df.groupby('Team')[numeric_cols].agg(['median', 'mean', 'std'], numeric_only=True)
-    print("Tinh toan thong ke theo doi hoan tat.")
-
-    # --- Buoc 6: Tao DataFrame ket qua theo doi ---
-    team_names = team_stats.index.tolist()
-    team_results_data = {'': team_names}
-
-    for col in numeric_cols:
-        col_median = f'Median of {col}'
-        col_mean = f'Mean of {col}'
-        col_std = f'Std of {col}'
-
-        median_key = (col, 'median')
-        mean_key = (col, 'mean')
-        std_key = (col, 'std')
-
-        if median_key in team_stats.columns:
-            team_results_data[col_median] = team_stats[median_key].reindex(team_names).values
-        else:
-            team_results_data[col_median] = [pd.NA] * len(team_names)
-
-        if mean_key in team_stats.columns:
-            team_results_data[col_mean] = team_stats[mean_key].reindex(team_names).values
-        else:
-            team_results_data[col_mean] = [pd.NA] * len(team_names)
-
-        if std_key in team_stats.columns:
-            team_results_data[col_std] = team_stats[std_key].reindex(team_names).values
+try:
+    if use_accumulator:
+        # --- Buoc 1-4 (bo tich luy gop duoc): doc theo khoi va/hoac gop thong ke da luu ---
+        from quantile_sketch import epsilon_for_k, k_for_epsilon
+        from streaming import DEFAULT_CHUNKSIZE, GroupAccumulator, accumulate_group_stats
+        sketch_k = k_for_epsilon(args.epsilon) if median_mode == 'approx' else None
+        accumulator = None
+        for sketch_path in args.merge_sketches:
+            print(f"Dang gop thong ke da luu: {sketch_path}")
+            stored = GroupAccumulator.load(sketch_path)
+            if accumulator is None:
+                accumulator = stored
+            else:
+                accumulator.merge(stored)
+        if not args.sketches_only:
+            chunksize = args.chunksize or DEFAULT_CHUNKSIZE
+            print(f"Dang doc du lieu theo khoi {chunksize} dong tu: {csv_path}")
+            accumulator = accumulate_group_stats(csv_path, chunksize, exclude_cols, accumulator=accumulator,
+                                                 sketch_k=sketch_k, na_values=na_values_list, encoding='utf-8')
+        if accumulator is None or not accumulator.columns:
+            print("Loi: Khong tim thay cot du lieu so de tinh toan thong ke.")
+            exit()
+        if args.save_sketches:
+            accumulator.save(args.save_sketches)
+            print(f"Da luu thong ke gop duoc vao: {args.save_sketches}")
+        numeric_cols = accumulator.columns
+        team_names, stats = accumulator.result()
+        if accumulator.sketch_k is None:
+            print(f"So cot so da tinh toan: {len(numeric_cols)} (median chinh xac)")
         else:
-            team_results_data[col_std] = [pd.NA] * len(team_names)
-
-    team_results_df = pd.DataFrame(team_results_data)
-    print("Tao DataFrame ket qua theo doi hoan tat.")
-
-    # --- Buoc 7: Ket hop ---
-    print("Dang ket hop ket qua...")
-    team_results_df = team_results_df.reindex(columns=all_row_df.columns, fill_value=pd.NA)
-    final_results = pd.concat([all_row_df, team_results_df], ignore_index=True)
-    print("Ket hop hoan tat.")
+            print(f"So cot so da tinh toan: {len(numeric_cols)} "
+                  f"(median xap xi, k={accumulator.sketch_k}, sai so hang ~{epsilon_for_k(accumulator.sketch_k):.3f})")
+    else:
+        # --- Buoc 1: Doc du lieu ---
+        print(f"Dang doc du lieu tu: {csv_path}")
+        df = read_results(csv_path, na_values=na_values_list, encoding='utf-8')
+        print("Doc du lieu thanh cong.")
+
+        # --- Buoc 2: Xac dinh va chuan bi cac cot so ---
+        numeric_cols = clean_stats_frame(df, exclude_cols)
+
+        if not numeric_cols:
+            print("Loi: Khong tim thay cot du lieu so de tinh toan thong ke.")
+            exit()
+
+        print(f"So cot so se duoc tinh toan: {len(numeric_cols)}")
+
+        # --- Buoc 3: Tinh thong ke tong the (all) va theo doi trong mot lan ---
+        if 'Team' not in df.columns:
+            print("Loi: Khong tim thay cot 'Team' de nhom.")
+            exit()
+        print("Dang tinh toan thong ke tong the (all) va theo doi (Median, Mean, Std)...")
+        team_codes, team_names = pd.factorize(df['Team'], sort=True) # Giong groupby: sap xep ten doi, bo doi NaN
+        values = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        stats = grouped_stats(values, team_codes, len(team_names))
+        print("Tinh toan thong ke hoan tat.")
+
+    # --- Buoc 4: Tao DataFrame ket qua (dong 'all' truoc, sau do tung doi) ---
+    final_results = results_frame(stats, numeric_cols, team_names)
+    print("Tao DataFrame ket qua hoan tat.")
 
     # --- Buoc 9: Luu ket qua cuoi cung ---
     print(f"Dang luu ket qua vao: {output_path}")
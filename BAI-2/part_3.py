@@ -4,27 +4,38 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import os
 import re
+import sys
 
 # --- 1. Xac dinh duong dan va doc du lieu ---
 current_dir = os.path.dirname(os.path.abspath(__file__))
 csv_path = os.path.join(current_dir, '..', 'BAI-1', 'results.csv')
+sys.path.insert(0, os.path.join(current_dir, '..', 'BAI-1'))
+from results_io import parquet_path_for, read_results
 
 # Tao thu muc luu bieu do
 output_image_dir = os.path.join(current_dir, 'histograms')
 os.makedirs(output_image_dir, exist_ok=True)
 print(f"Cac tep anh histogram se duoc luu tai: {output_image_dir}")
 
+# --- 2. Chon cac cot chi so ---
+columns_to_plot = [
+    'Playing Time: matches played',
+    'Playing Time: starts',
+    'Performance: goals'
+]
+
 try:
-    if not os.path.isfile(csv_path):
+    if not os.path.isfile(csv_path) and not os.path.isfile(parquet_path_for(csv_path)):
         raise FileNotFoundError(f"Tep khong ton tai tai duong dan: {csv_path}")
 
+    # Chi nap cac cot can ve
     try:
-        df = pd.read_csv(csv_path)
+        df = read_results(csv_path, columns=columns_to_plot)
     except UnicodeDecodeError:
         try:
-            df = pd.read_csv(csv_path, encoding='latin1')
+            df = read_results(csv_path, columns=columns_to_plot, encoding='latin1')
         except UnicodeDecodeError:
-            df = pd.read_csv(csv_path, encoding='iso-8859-1')
+            df = read_results(csv_path, columns=columns_to_plot, encoding='iso-8859-1')
 
     print(f"Tai du lieu thanh cong tu: {csv_path}")
 
@@ -35,12 +46,6 @@ except Exception as e:
     print(f"Loi khong xac dinh khi doc tep CSV: {e}")
     df = None
 
-# --- 2. Chon cac cot chi so ---
-columns_to_plot = [
-    'Playing Time: matches played',
-    'Playing Time: starts',
-    'Performance: goals'
-]
 
 # --- 3. Kiem tra va xu ly du lieu ---
 data_to_plot = {}
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# quantile_sketch.py
+"""
+Sketch KLL uoc luong median/quantile voi bo nho gioi han (dung cho che do doc tung khoi).
+
+Sketch giu cac "tang" gia tri: tang h co trong so 2^h. Khi tong so phan tu vuot suc chua,
+tang thap nhat bi day duoc sap xep va giu lai mot nua (le hoac chan, chon ngau nhien) len tang tren.
+Bo nho la O(k); sai so hang cua quantile khoang O(1/k).
+Khi chua nen lan nao (n <= k) sketch giu moi gia tri nen median la chinh xac, giong pandas;
+k=None cho sketch khong bao gio nen (median chinh xac, bo nho tang theo du lieu).
+
+Sketch gop duoc (merge) va luu duoc ra mang numpy (pack_sketches/unpack_sketches), nen co the
+luu theo mua/giai roi gop lai ma khong can doc lai du lieu goc.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_K = 200
+_CAPACITY_DECAY = 2 / 3
+
+
+def k_for_epsilon(epsilon: float) -> int:
+    """
+    k nho nhat de sai so hang cua mot quantile khong qua `epsilon` (do tin cay ~99%),
+    theo cong thuc thuc nghiem cua KLL: epsilon ~ 2.296 / k^0.9723.
+    """
+    if not 0 < epsilon < 1:
+        raise ValueError("epsilon phai nam trong (0, 1)")
+    return max(8, int(np.ceil((2.296 / epsilon) ** (1 / 0.9723))))
+
+
+def epsilon_for_k(k: Optional[int]) -> float:
+    """Sai so hang uoc luong cua sketch co tham so k (0 neu sketch chinh xac)."""
+    return 0.0 if k is None else 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+    """Sketch quantile KLL cho mot cot so (bo qua NaN). k=None: giu moi gia tri (chinh xac)."""
+    def __init__(self, k: Optional[int] = DEFAULT_K, seed: Optional[int] = 0):
+        if k is not None and k < 2:
+            raise ValueError("k phai >= 2")
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * _CAPACITY_DECAY ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self) -> float:
+        if self.k is None:
+            return float('inf')
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    @property
+    def is_exact(self) -> bool:
+        """True neu chua nen lan nao (moi gia tri deu con trong sketch)."""
+        return len(self.levels) == 1
+
+    def update(self, values) -> None:
+        """Them mot mang gia tri (NaN bi bo qua)."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Gop sketch khac vao sketch nay (tang cung bac duoc noi lai roi nen)."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+
+    def _compress(self) -> None:
+        while self._size() > self._max_size():
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) >= self._capacity(h):
+                    self._compact(h)
+                    break
+
+    def _compact(self, level: int) -> None:
+        items = np.sort(self.levels[level])
+        keep_last = len(items) % 2 == 1
+        tail = items[-1:] if keep_last else items[:0]
+        if keep_last:
+            items = items[:-1]
+        if level + 1 == len(self.levels):
+            self.levels.append(np.empty(0))
+        promoted = items[int(self._rng.integers(2))::2]
+        self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+        self.levels[level] = tail
+
+    def quantile(self, q: float) -> float:
+        """Quantile q (0..1). Khi sketch con chinh xac, noi suy tuyen tinh giong np.quantile/pandas."""
+        if self.n == 0:
+            return float('nan')
+        if self.is_exact:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        target = q * cumulative[-1]
+        return float(items[order][min(np.searchsorted(cumulative, target, side='left'), len(items) - 1)])
+
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+
+def pack_sketches(sketches: Sequence[KLLSketch], prefix: str = '') -> Dict[str, np.ndarray]:
+    """Dong goi nhieu sketch thanh vai mang numpy (luu bang np.savez, khong can pickle)."""
+    n_levels = max((len(sketch.levels) for sketch in sketches), default=1)
+    level_sizes = np.zeros((len(sketches), n_levels), dtype=np.int64)
+    for i, sketch in enumerate(sketches):
+        level_sizes[i, :len(sketch.levels)] = [len(items) for items in sketch.levels]
+    items = [items for sketch in sketches for items in sketch.levels]
+    return {
+        prefix + 'k': np.array([0 if sketch.k is None else sketch.k for sketch in sketches], dtype=np.int64),
+        prefix + 'n': np.array([sketch.n for sketch in sketches], dtype=np.int64),
+        prefix + 'n_levels': np.array([len(sketch.levels) for sketch in sketches], dtype=np.int64),
+        prefix + 'level_sizes': level_sizes,
+        prefix + 'items': np.concatenate(items) if items else np.empty(0),
+    }
+
+
+def unpack_sketches(arrays, prefix: str = '') -> List[KLLSketch]:
+    """Dung lai danh sach sketch tu ket qua cua pack_sketches."""
+    ks, ns, n_levels = arrays[prefix + 'k'], arrays[prefix + 'n'], arrays[prefix + 'n_levels']
+    level_sizes, items = arrays[prefix + 'level_sizes'], arrays[prefix + 'items']
+    sketches = []
+    offset = 0
+    for k, n, levels, sizes in zip(ks.tolist(), ns.tolist(), n_levels.tolist(), level_sizes):
+        sketch = KLLSketch(None if k == 0 else k)
+        sketch.n = n
+        sketch.levels = []
+        for size in sizes[:levels].tolist():
+            sketch.levels.append(items[offset:offset + size].copy())
+            offset += size
+        sketches.append(sketch)
+    return sketches
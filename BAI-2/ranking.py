@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# ranking.py
+# Tim top-k / bottom-k cua tat ca cac cot so trong mot lan goi (dung cho main2.py)
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+TIE_MODES = ('first', 'all')
+
+
+class Selection(NamedTuple):
+    """Chi so hang duoc chon cua moi cot, noi lien nhau: cot j la rows[offsets[j]:offsets[j + 1]]."""
+    rows: np.ndarray
+    offsets: np.ndarray
+
+    def column(self, j: int) -> np.ndarray:
+        return self.rows[self.offsets[j]:self.offsets[j + 1]]
+
+
+def _select_smallest(keys: np.ndarray, valid: np.ndarray, k: int, ties: str) -> Selection:
+    """
+    Chon k hang co khoa nho nhat o moi cot (khoa NaN da thay bang +inf).
+    Nguong cua moi cot lay bang np.partition (khong sap xep ca cot), sau do chi sap xep
+    cac hang duoc chon theo (khoa, thu tu hang).
+    ties='first': hang bang nguong duoc chon theo thu tu xuat hien cho du k hang;
+    ties='all': lay them moi hang bang gia tri hang thu k.
+    """
+    n, m = keys.shape
+    kk = min(k, n)
+    if kk <= 0 or m == 0:
+        return Selection(np.empty(0, dtype=np.intp), np.zeros(m + 1, dtype=np.intp))
+    threshold = np.partition(keys, kk - 1, axis=0)[kk - 1]
+    below = keys < threshold
+    equal = (keys == threshold) & valid
+    if ties == 'all':
+        selected = below | equal
+    else:
+        need = kk - below.sum(axis=0)
+        selected = below | (equal & (np.cumsum(equal, axis=0) <= need))
+    selected &= valid
+
+    cols, rows = np.nonzero(selected.T)
+    order = np.lexsort((rows, keys[rows, cols], cols))
+    offsets = np.zeros(m + 1, dtype=np.intp)
+    np.cumsum(np.bincount(cols, minlength=m), out=offsets[1:])
+    return Selection(rows[order], offsets)
+
+
+def top_bottom_k(values: np.ndarray, k: int = 3, ties: str = 'first') -> Tuple[Selection, Selection]:
+    """
+    Voi ma tran `values` (hang = cau thu, cot = chi so; NaN = thieu), tra ve (top, bottom):
+    top.column(j) la chi so k hang lon nhat cua cot j theo thu tu giam dan,
+    bottom.column(j) la k hang nho nhat theo thu tu tang dan. Hang bang nhau xep theo thu tu xuat hien.
+    """
+    if ties not in TIE_MODES:
+        raise ValueError(f"ties phai la mot trong {TIE_MODES}, nhan duoc {ties!r}")
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    valid = ~np.isnan(values)
+    top = _select_smallest(np.where(valid, -values, np.inf), valid, k, ties)
+    bottom = _select_smallest(np.where(valid, values, np.inf), valid, k, ties)
+    return top, bottom
+
+
+def constant_columns(values: np.ndarray) -> np.ndarray:
+    """Mask cac cot co it nhat mot gia tri va moi gia tri hop le deu bang nhau."""
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    has_value = valid.any(axis=0)
+    low = np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+    high = np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf)
+    return has_value & (low == high)
+
+
+def format_values(values: np.ndarray, integer: bool) -> List[str]:
+    """Dinh dang gia tri giong cach in cua pandas: cot nguyen in khong co phan thap phan."""
+    if integer:
+        return [str(int(v)) for v in values]
+    return [str(float(v)) for v in values]
+
+
+def coerce_stat_columns(df: pd.DataFrame, non_stat_cols: Sequence[str], drop_empty: bool = True) -> List[str]:
+    """
+    Ep kieu so (tai cho) cac cot khong nam trong `non_stat_cols` va tra ve danh sach cot thong ke.
+    results.csv moi da dung kieu luc scrape, chi cac cot con la chuoi moi can pd.to_numeric.
+    drop_empty: bo cac cot khong co gia tri so nao.
+    """
+    stat_columns = []
+    for col in df.columns:
+        if col in non_stat_cols:
+            continue
+        numeric_col = df[col] if pd.api.types.is_numeric_dtype(df[col]) else pd.to_numeric(df[col], errors='coerce')
+        if not drop_empty or not numeric_col.isnull().all():
+            df[col] = numeric_col
+            stat_columns.append(col)
+    return stat_columns
+
+
+def format_top_lines(stat_columns: Sequence[str], players: np.ndarray, values: np.ndarray,
+                     top: Selection, bottom: Selection, integer: Sequence[bool], k: int) -> List[str]:
+    """Cac dong cua file top_k.txt: moi chi so mot khoi top k / bottom k."""
+    constant = constant_columns(values)
+    lines = []
+    for j, stat in enumerate(stat_columns):
+        lines.append(f"Chi so: {stat}")
+        top_rows, bottom_rows = top.column(j), bottom.column(j)
+        if len(top_rows) == 0:
+            lines.append("Khong co du lieu hop le")
+            lines.append("")
+            continue
+
+        if constant[j]:
+            lines.append(f"Tat ca cau thu cung gia tri: {format_values(values[top_rows[:1], j], integer[j])[0]}")
+
+        lines.append(f"{k} cau thu diem cao nhat:")
+        for name, value in zip(players[top_rows], format_values(values[top_rows, j], integer[j])):
+            lines.append(f"   {name}: {value}")
+        lines.append(f"{k} cau thu diem thap nhat:")
+        for name, value in zip(players[bottom_rows], format_values(values[bottom_rows, j], integer[j])):
+            lines.append(f"   {name}: {value}")
+        lines.append("")
+    return lines
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+# streaming.py
+"""
+Che do doc tung khoi cho part_2.py va main2.py: file ket qua duoc doc theo khoi N dong,
+moi khoi chi cap nhat cac bo tich luy gop duoc roi bi bo, nen bo nho khong phu thuoc kich thuoc file.
+
+    - GroupAccumulator: moi (doi, chi so) giu count/mean/M2/min/max (gop bang cong thuc cua Chan)
+      va mot sketch KLL cho median; dong 'all' gop tu cac doi.
+    - TopKAccumulator: chi giu cac cau thu dang nam trong top/bottom k cua it nhat mot chi so.
+
+Ket qua giong che do nap ca file; median chinh xac khi nhom co khong qua k gia tri
+(sketch chua phai nen), lon hon thi la gia tri xap xi cua KLL (sketch_k=None: luon chinh xac).
+
+GroupAccumulator luu/doc duoc (save/load) va gop duoc (merge), nen thong ke cua tung mua/giai
+co the gop lai, hoac cap nhat them tran moi cua mua hien tai, ma khong can doc lai du lieu goc.
+"""
+import os
+import sys
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, '..', 'BAI-1'))
+from results_io import iter_results
+from group_stats import GroupStats, Moments, clean_stats_frame, combine_moments, grouped_moments, total_moments
+from quantile_sketch import DEFAULT_K, KLLSketch, pack_sketches, unpack_sketches
+from ranking import Selection, coerce_stat_columns, top_bottom_k
+
+DEFAULT_CHUNKSIZE = 50000
+# Sketch cua dong 'all' lon hon de median toan giai van chinh xac voi file co vai nghin cau thu
+ALL_SKETCH_K = 4096
+STORE_VERSION = 1
+
+
+def _take(moments: Moments, rows) -> Moments:
+    return Moments(*(field[rows] for field in moments))
+
+
+class GroupAccumulator:
+    """
+    Thong ke gop duoc theo nhom cho cac cot `columns`; hang khong co nhom chi tinh vao dong 'all'.
+    sketch_k: tham so k cua sketch median moi (nhom, cot); None = giu moi gia tri (median chinh xac).
+    """
+    def __init__(self, columns: Sequence[str], sketch_k: Optional[int] = DEFAULT_K,
+                 all_sketch_k: Optional[int] = ALL_SKETCH_K):
+        self.columns = list(columns)
+        self.sketch_k = sketch_k
+        if sketch_k is None:
+            all_sketch_k = None
+        elif all_sketch_k is not None:
+            all_sketch_k = max(sketch_k, all_sketch_k)
+        self.names: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.moments = Moments.empty((0, len(self.columns)))
+        self.other = Moments.empty((1, len(self.columns)))
+        self.sketches: List[List[KLLSketch]] = []
+        self.all_sketches = [KLLSketch(all_sketch_k) for _ in self.columns]
+
+    def _group_ids(self, names: Sequence[str]) -> np.ndarray:
+        added = [name for name in names if name not in self._index]
+        for name in added:
+            self._index[name] = len(self.names)
+            self.names.append(name)
+            self.sketches.append([KLLSketch(self.sketch_k) for _ in self.columns])
+        if added:
+            grown = Moments.empty((len(added), len(self.columns)))
+            self.moments = Moments(*(np.vstack([old, new]) for old, new in zip(self.moments, grown)))
+        return np.array([self._index[name] for name in names], dtype=np.intp)
+
+    def update(self, values: np.ndarray, labels) -> None:
+        """Them mot khoi: `values` (hang x cot, NaN = thieu) va nhan nhom cua tung hang (NaN = khong co nhom)."""
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), len(self.columns))
+        codes, uniques = pd.factorize(pd.Series(labels, dtype=object))
+        ids = self._group_ids([str(name) for name in uniques])
+        chunk = grouped_moments(values, codes, len(ids))
+        merged = combine_moments(_take(self.moments, ids), _take(chunk, slice(0, len(ids))))
+        for field, new in zip(self.moments, merged):
+            field[ids] = new
+        self.other = combine_moments(self.other, _take(chunk, slice(len(ids), None)))
+
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(ids) + 1))
+        rows = values[order]
+        for local, group in enumerate(ids):
+            segment = rows[bounds[local]:bounds[local + 1]]
+            for j, sketch in enumerate(self.sketches[group]):
+                sketch.update(segment[:, j])
+        for j, sketch in enumerate(self.all_sketches):
+            sketch.update(values[:, j])
+
+    def merge(self, other: "GroupAccumulator") -> None:
+        """Gop bo tich luy cua mot phan du lieu khac (cung danh sach cot)."""
+        if other.columns != self.columns:
+            raise ValueError("Khong the gop hai bo tich luy co cot khac nhau")
+        ids = self._group_ids(other.names)
+        merged = combine_moments(_take(self.moments, ids), other.moments)
+        for field, new in zip(self.moments, merged):
+            field[ids] = new
+        self.other = combine_moments(self.other, other.other)
+        for group, sketches in zip(ids, other.sketches):
+            for mine, theirs in zip(self.sketches[group], sketches):
+                mine.merge(theirs)
+        for mine, theirs in zip(self.all_sketches, other.all_sketches):
+            mine.merge(theirs)
+
+    def save(self, path: str) -> None:
+        """Luu bo tich luy (moments va sketch cua moi (nhom, cot)) ra file .npz."""
+        arrays = {
+            'version': np.array(STORE_VERSION),
+            'columns': np.array(self.columns, dtype=str),
+            'names': np.array(self.names, dtype=str),
+            'sketch_k': np.array(0 if self.sketch_k is None else self.sketch_k),
+            **{f'moments_{field}': value for field, value in zip(Moments._fields, self.moments)},
+            **{f'other_{field}': value for field, value in zip(Moments._fields, self.other)},
+            **pack_sketches([sketch for sketches in self.sketches for sketch in sketches], 'group_'),
+            **pack_sketches(self.all_sketches, 'all_'),
+        }
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "GroupAccumulator":
+        """Doc bo tich luy da luu bang save()."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != STORE_VERSION:
+                raise ValueError(f"Phien ban file thong ke '{path}' khong khop")
+            sketch_k = int(data['sketch_k'])
+            accumulator = cls(data['columns'].tolist(), sketch_k=sketch_k or None)
+            accumulator.names = data['names'].tolist()
+            accumulator._index = {name: i for i, name in enumerate(accumulator.names)}
+            accumulator.moments = Moments(*(data[f'moments_{field}'] for field in Moments._fields))
+            accumulator.other = Moments(*(data[f'other_{field}'] for field in Moments._fields))
+            sketches = unpack_sketches(data, 'group_')
+            m = len(accumulator.columns)
+            accumulator.sketches = [sketches[i * m:(i + 1) * m] for i in range(len(accumulator.names))]
+            accumulator.all_sketches = unpack_sketches(data, 'all_')
+        return accumulator
+
+    def result(self) -> Tuple[List[str], GroupStats]:
+        """(ten nhom theo thu tu chu cai, GroupStats voi hang cuoi la 'all') giong grouped_stats."""
+        order = sorted(range(len(self.names)), key=self.names.__getitem__)
+        groups = _take(self.moments, np.array(order, dtype=np.intp))
+        all_row = total_moments(Moments(*(np.vstack([a, b]) for a, b in zip(groups, self.other))))
+        median = np.array([[sketch.median() for sketch in self.sketches[g]] for g in order]
+                          + [[sketch.median() for sketch in self.all_sketches]]).reshape(len(order) + 1, len(self.columns))
+        stats = GroupStats(
+            np.vstack([groups.count, all_row.count]),
+            np.vstack([groups.mean, all_row.mean]),
+            np.vstack([groups.std(), all_row.std()]),
+            median
+        )
+        return [self.names[g] for g in order], stats
+
+
+class TopKAccumulator:
+    """
+    Top/bottom k gop duoc: chi giu cac hang dang nam trong top hoac bottom k cua it nhat mot cot
+    (toi da 2k hang moi cot), theo thu tu xuat hien nen hang bang diem xep giong khi nap ca file.
+    """
+    def __init__(self, n_columns: int, k: int = 3, ties: str = 'first'):
+        self.k = k
+        self.ties = ties
+        self.players = np.empty(0, dtype=object)
+        self.values = np.empty((0, n_columns))
+
+    def update(self, players: np.ndarray, values: np.ndarray) -> None:
+        """Them mot khoi hang (nam sau moi hang da them truoc do)."""
+        players = np.concatenate([self.players, np.asarray(players, dtype=object)])
+        values = np.vstack([self.values, np.asarray(values, dtype=np.float64)])
+        top, bottom = top_bottom_k(values, k=self.k, ties=self.ties)
+        keep = np.union1d(top.rows, bottom.rows)
+        self.players, self.values = players[keep], values[keep]
+
+    def merge(self, other: "TopKAccumulator") -> None:
+        """Gop ung vien cua phan du lieu nam sau."""
+        self.update(other.players, other.values)
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray, Selection, Selection]:
+        top, bottom = top_bottom_k(self.values, k=self.k, ties=self.ties)
+        return self.players, self.values, top, bottom
+
+
+def accumulate_group_stats(path: str, chunksize: int, exclude_cols: Sequence[str],
+                           accumulator: Optional[GroupAccumulator] = None, sketch_k: Optional[int] = DEFAULT_K,
+                           **read_csv_kwargs) -> Optional[GroupAccumulator]:
+    """
+    Doc file theo khoi va cap nhat `accumulator` (tao moi voi `sketch_k` neu None).
+    Cot cua file khong co trong accumulator da co bi bo qua; cot thieu duoc coi la NaN.
+    """
+    for chunk in iter_results(path, chunksize, **read_csv_kwargs):
+        numeric_cols = clean_stats_frame(chunk, exclude_cols)
+        if 'Team' not in chunk.columns:
+            raise KeyError('Team')
+        if accumulator is None:
+            accumulator = GroupAccumulator(numeric_cols, sketch_k=sketch_k)
+        values = chunk.reindex(columns=accumulator.columns).apply(pd.to_numeric, errors='coerce')
+        accumulator.update(values.to_numpy(dtype=np.float64, na_value=np.nan), chunk['Team'])
+    return accumulator
+
+
+def stream_top_bottom(path: str, chunksize: int, non_stat_candidates: Sequence[str], k: int = 3,
+                      ties: str = 'first', player_column: str = 'Player', **read_csv_kwargs):
+    """
+    Top/bottom k cua main2 voi file doc theo khoi.
+    Tra ve (cot thong ke, ten cau thu, gia tri, top, bottom, cot nguyen) cho ranking.format_top_lines;
+    chi so hang trong top/bottom la chi so trong tap ung vien, khong phai trong file.
+    """
+    accumulator: Optional[TopKAccumulator] = None
+    columns: List[str] = []
+    integer = np.zeros(0, dtype=bool)
+    for chunk in iter_results(path, chunksize, **read_csv_kwargs):
+        if player_column not in chunk.columns:
+            raise KeyError(player_column)
+        non_stat_cols = [col for col in non_stat_candidates if col in chunk.columns] + [player_column]
+        chunk_columns = coerce_stat_columns(chunk, non_stat_cols, drop_empty=False)
+        if accumulator is None:
+            columns = chunk_columns
+            accumulator = TopKAccumulator(len(columns), k=k, ties=ties)
+            integer = np.ones(len(columns), dtype=bool)
+        # Cot nguyen khi moi khoi deu la kieu nguyen (giong dtype cua ca cot khi nap ca file)
+        integer &= np.array([pd.api.types.is_integer_dtype(chunk[col]) for col in columns], dtype=bool)
+        accumulator.update(chunk[player_column].to_numpy(dtype=object),
+                           chunk[columns].to_numpy(dtype=np.float64, na_value=np.nan))
+    if accumulator is None:
+        return [], np.empty(0, dtype=object), np.empty((0, 0)), None, None, []
+
+    # Bo cac cot khong co gia tri so nao trong ca file (ung vien luon chua gia tri lon/nho nhat cua moi cot)
+    players, values, _, _ = accumulator.result()
+    keep = np.flatnonzero(~np.isnan(values).all(axis=0))
+    values = values[:, keep]
+    top, bottom = top_bottom_k(values, k=k, ties=ties)
+    return [columns[j] for j in keep], players, values, top, bottom, integer[keep].tolist()
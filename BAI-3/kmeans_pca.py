@@ -10,13 +10,17 @@ from sklearn.decomposition import PCA
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+import sys
 
 # --- 1. Tai du lieu ---
 # Su dung os.path de tim file CSV trong thu muc cha ('../BAI-1')
 current_dir = os.path.dirname(os.path.abspath(__file__)) if '__file__' in locals() else '.'
 csv_path = os.path.join(current_dir, '..', 'BAI-1', 'results.csv') # Duong dan tuong doi den file input
+sys.path.insert(0, os.path.join(current_dir, '..', 'BAI-1'))
+from results_io import read_results # Uu tien results.parquet neu co
+from player_table import age_years # Age moi: tong so ngay -> so nam
 try:
-    data = pd.read_csv(csv_path)
+    data = read_results(csv_path, na_values=['N/a'])
     print("Da tai du lieu thanh cong tu results.csv")
 except FileNotFoundError:
     print(f"Loi: Khong tim thay file 'results.csv' tai duong dan: {csv_path}. Hay dam bao file nay ton tai.")
@@ -29,8 +33,11 @@ except Exception as e:
 # --- 2. Tien xu ly du lieu ---
 print("Bat dau tien xu ly du lieu...")
 
-# Xu ly cot 'Age' dac biet
-if 'Age' in data.columns:
+# Xu ly cot 'Age' dac biet: dua ve so nam nguyen
+# (results.csv moi ghi Age la tong so ngay, results.csv cu ghi dang chuoi '35-130')
+if 'Age' in data.columns and pd.api.types.is_numeric_dtype(data['Age']):
+    data['Age'] = age_years(data['Age'].astype('float64'))
+elif 'Age' in data.columns:
     print("Dang xu ly cot 'Age'...")
     # Thay the 'N/a' bang NaN truoc khi tach chuoi
     data['Age'] = data['Age'].replace('N/a', np.nan)
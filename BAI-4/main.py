@@ -1,11 +1,14 @@
 # thu.py (Phiên bản cuối cùng - Sua ScrapeOrder bat dau tu 1)
 import os
 import re
+import sys
 import time
 import json
 import logging
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from urllib.parse import urlparse
 import pandas as pd
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -19,16 +22,65 @@ from selenium.common.exceptions import NoSuchElementException, TimeoutException,
 # Lay thu muc chua tep script nay (thu.py)
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
+# Dung chung cache trang voi BAI-1
+sys.path.insert(0, os.path.join(current_dir, '..', 'BAI-1'))
+try:
+    from page_cache import PageCache
+except ImportError:
+    PageCache = None
+try:
+    from results_io import parquet_path_for, read_results
+except ImportError:
+    parquet_path_for, read_results = None, None
+try:
+    import http_fetch
+except ImportError:
+    http_fetch = None
+try:
+    from rate_limit import get_rate_limiter
+except ImportError:
+    get_rate_limiter = None
+try:
+    import async_fetch
+except ImportError:
+    async_fetch = None
+try:
+    from parse_pool import get_parse_pool
+except ImportError:
+    get_parse_pool = None
+try:
+    from driver_pool import add_lean_options, apply_lean_profile
+except ImportError:
+    add_lean_options, apply_lean_profile = None, None
+try:
+    from html_parser import make_soup, slice_element
+except ImportError:
+    def make_soup(html, tag=None, attrs=None, parser=None):
+        return BeautifulSoup(html, parser or 'html.parser')
+    def slice_element(html, tag, element_id):
+        return None
+
 # === Cau hinh ===
 config = {
     "output_folder": os.path.join(current_dir, "output_part4_final"),
     "part1_results_filename": r"D:\PTIT\NAM2\KI2\Python\ASS-1\BAI-1\results.csv", # Duong dan tuyet doi
     "scraped_all_data_filename": "scraped_all_data_temp.csv",
     "estimation_output_filename": "estimation_data.csv",
+    "page_cache_dirname": "page_cache",
+    "page_cache_ttl": 6 * 3600, # Giay
+    "checkpoint_filename": "scrape_checkpoint.json",
+    "checkpoint_rows_filename": "scraped_pages.jsonl", # Moi dong la cac hang cua mot trang (chi ghi them)
+    "checkpoint_max_age": 24 * 3600, # Giay; checkpoint cu hon se bi bo, quet lai tu trang 1
+    "lean_browser": True, # Chrome headless, chan anh/CSS/font/script ben thu ba, pageLoadStrategy=eager
     "scraping": {
         "transfer_url": "https://www.footballtransfers.com/us/players/uk-premier-league",
+        # URL rieng cua tung trang danh sach; dat None de chi dung cach bam 'Next'
+        "page_url_template": "https://www.footballtransfers.com/us/players/uk-premier-league/{page}",
+        "page_fetch_workers": 6, # So trang tai song song qua HTTP
+        "max_pages": 60, # Gioi han an toan khi khong doc duoc so trang tu phan trang
         "wait_time": 15,
         "player_table_selector": "tbody#player-table-body",
+        "player_table_id": "player-table-body",
         "player_row_selector": "tr",
         "player_name_selector": "td.td-player div.text > a",
         "nation_selector": "td.nationality span.ficon",
@@ -50,6 +102,9 @@ config = {
 config['scraped_file_path'] = os.path.join(config['output_folder'], config['scraped_all_data_filename'])
 config['final_output_path'] = os.path.join(config['output_folder'], config['estimation_output_filename'])
 config['part1_file_path'] = config['part1_results_filename']
+config['page_cache_path'] = os.path.join(config['output_folder'], config['page_cache_dirname'])
+config['checkpoint_path'] = os.path.join(config['output_folder'], config['checkpoint_filename'])
+config['checkpoint_rows_path'] = os.path.join(config['output_folder'], config['checkpoint_rows_filename'])
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 @contextmanager
@@ -63,9 +118,14 @@ def get_driver():
     opts.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
     opts.add_experimental_option("excludeSwitches", ["enable-automation"])
     opts.add_experimental_option('useAutomationExtension', False)
+    lean = config['lean_browser'] and add_lean_options is not None
+    if lean:
+        add_lean_options(opts)
     driver = None
     try:
         driver = webdriver.Chrome(options=opts)
+        if lean:
+            apply_lean_profile(driver)
         driver.set_page_load_timeout(45)
         yield driver
     except Exception as e:
@@ -114,25 +174,365 @@ def parse_skill_potential(val_str):
             logging.warning(f"Khong the chuyen doi skill/potential thanh float: {val_str}")
             return None
 
+def wait_turn(url):
+    """Cho toi luot gui request toi host cua url theo bo gioi han dung chung voi BAI-1."""
+    if get_rate_limiter is not None:
+        get_rate_limiter().acquire(url)
+
+def back_off(url, fallback_delay):
+    """Bao server dang cham/loi: bo gioi han giam toc va cho backoff (co jitter); thieu module thi sleep co dinh."""
+    if get_rate_limiter is None:
+        time.sleep(fallback_delay)
+        return
+    get_rate_limiter().failure(url)
+    get_rate_limiter().acquire(url)
+
+def get_page_cache():
+    """Tao cache trang cho vong lap phan trang (None neu khong co module page_cache)."""
+    if PageCache is None:
+        return None
+    try:
+        return PageCache(config['page_cache_path'], ttl=config['page_cache_ttl'])
+    except OSError as e:
+        logging.warning(f"Khong the tao cache trang: {e}")
+        return None
+
+def parse_listing_page(table_html, start_order):
+    """Phan tich HTML cua tbody danh sach cau thu, tra ve list ban ghi bat dau tu so thu tu start_order."""
+    cfg = config['scraping']
+    rows = make_soup(table_html).select(cfg['player_row_selector'])
+    data_list = []
+    scrape_order_counter = start_order
+    for row in rows:
+        player = get_element_text(row, cfg['player_name_selector'])
+        if player and player != 'N/a':
+            nation = get_element_attribute(row, cfg['nation_selector'], 'title')
+            position = get_element_text(row, cfg['position_selector'])
+            age = get_element_text(row, cfg['age_selector'])
+            team = get_element_text(row, cfg['team_name_selector'])
+            skill_raw = get_element_text(row, cfg['skill_selector'])
+            potential_raw = get_element_text(row, cfg['potential_selector'])
+            etv_raw = get_element_text(row, cfg['etv_selector'])
+
+            skill_parsed = parse_skill_potential(skill_raw)
+            potential_parsed = parse_skill_potential(potential_raw)
+            etv_parsed = parse_value(etv_raw)
+
+            data_list.append({
+                'ScrapeOrder': scrape_order_counter, # Gan gia tri counter
+                'Player': player.strip(),
+                'Nation_Internal': nation,
+                'Position': position,
+                'Age': age,
+                'Team_Internal': team,
+                'Skill': skill_parsed,
+                'Potential': potential_parsed,
+                'ETV_Raw_Internal': etv_raw,
+                config['processing']['internal_etv_var']: etv_parsed
+            })
+            scrape_order_counter += 1 # Tang counter sau khi gan
+    return data_list
+
+def parse_listing_pages(table_htmls):
+    """
+    Phan tich nhieu trang danh sach cung luc trong pool tien trinh cua BAI-1 (neu co),
+    tranh GIL khi BeautifulSoup xu ly nhieu trang. Moi trang danh so ScrapeOrder tu 1;
+    phan tu la None neu HTML cua trang la None.
+    """
+    items = [(table_html, 1) for table_html in table_htmls if table_html is not None]
+    if get_parse_pool is not None and len(items) > 1:
+        parsed = iter(get_parse_pool().map(parse_listing_page, items))
+    else:
+        parsed = (parse_listing_page(*item) for item in items)
+    return [next(parsed) if table_html is not None else None for table_html in table_htmls]
+
+def renumber(page_rows, start_order):
+    for offset, row in enumerate(page_rows):
+        row['ScrapeOrder'] = start_order + offset
+    return page_rows
+
+def scrape_from_cache(cache):
+    """
+    Doc toan bo danh sach tu cache neu lan chay truoc da quet het cac trang va cache con han.
+    Tra ve None neu cache thieu trang nao do (can mo trinh duyet).
+    """
+    if cache is None:
+        return None
+    url = config['scraping']['transfer_url']
+    marker = cache.get(url, 'pages')
+    if marker is None or not marker.fresh:
+        return None
+    table_htmls = []
+    for page in range(1, int(marker.html) + 1):
+        entry = cache.get(url, f'page-{page}')
+        if entry is None or not entry.fresh:
+            return None
+        table_htmls.append(entry.html)
+    data_list = []
+    for page_rows in parse_listing_pages(table_htmls):
+        data_list.extend(renumber(page_rows, len(data_list) + 1))
+    logging.info(f"Doc {marker.html} trang tu cache, {len(data_list)} ban ghi (khong mo trinh duyet).")
+    return data_list
+
+# --- Tai truc tiep theo URL so trang ---
+def page_url(page):
+    cfg = config['scraping']
+    return cfg['transfer_url'] if page == 1 else cfg['page_url_template'].format(page=page)
+
+def find_page_count(html):
+    """Doc so trang lon nhat tu cac lien ket phan trang trong HTML (None neu khong tim thay)."""
+    template = urlparse(config['scraping']['page_url_template']).path
+    pattern = re.escape(template).replace(re.escape('{page}'), r'(\d+)') + r'(?![\d/])'
+    pages = [int(n) for n in re.findall(pattern, html)]
+    return max(pages) if pages else None
+
+def extract_listing_tbody(html):
+    """Cat HTML cua tbody danh sach cau thu tu trang (None neu bang khong co trong HTML tinh)."""
+    cfg = config['scraping']
+    table_html = slice_element(html, 'tbody', cfg['player_table_id'])
+    if table_html is None:
+        table_body = make_soup(html, 'tbody', {'id': cfg['player_table_id']}).select_one(cfg['player_table_selector'])
+        table_html = str(table_body) if table_body else None
+    return table_html
+
+def fetch_listing_page(page, cache=None):
+    """Lay tbody cua trang `page`: tu cache neu con han, neu khong thi tai bang HTTP. None neu loi."""
+    url = config['scraping']['transfer_url']
+    entry = cache.get(url, f'page-{page}') if cache is not None else None
+    if entry is not None and entry.fresh:
+        return entry.html
+    html = http_fetch.fetch_html(page_url(page))
+    table_html = extract_listing_tbody(html) if html else None
+    if table_html is not None and cache is not None:
+        cache.put(url, table_html, part=f'page-{page}')
+    return table_html
+
+def fetch_listing_pages(pages, cache=None):
+    """
+    Lay tbody cua nhieu trang cung luc, tra ve dict trang -> tbody (None neu loi).
+    Trang con han trong cache duoc dung ngay; cac trang con lai tai dong thoi qua asyncio
+    (async_fetch) neu co, neu khong thi qua pool luong voi fetch_listing_page.
+    """
+    cfg = config['scraping']
+    tables, missing = {}, []
+    for page in pages:
+        entry = cache.get(cfg['transfer_url'], f'page-{page}') if cache is not None else None
+        if entry is not None and entry.fresh:
+            tables[page] = entry.html
+        else:
+            missing.append(page)
+    if not missing:
+        return tables
+    if async_fetch is not None and async_fetch.is_available():
+        htmls = async_fetch.fetch_pages([page_url(p) for p in missing], max_concurrency=cfg['page_fetch_workers'])
+        for page in missing:
+            html = htmls.get(page_url(page))
+            table_html = extract_listing_tbody(html) if html else None
+            if table_html is not None and cache is not None:
+                cache.put(cfg['transfer_url'], table_html, part=f'page-{page}')
+            tables[page] = table_html
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, cfg['page_fetch_workers'])) as executor:
+            tables.update(zip(missing, executor.map(lambda p: fetch_listing_page(p, cache), missing)))
+    return tables
+
+def scrape_by_page_url(cache=None, checkpoint=None, resume_rows=None):
+    """
+    Tai cac trang danh sach truc tiep theo URL so trang (page_url_template), song song,
+    thay vi bam 'Next' va cho trang truoc. Trang 1 duoc tai truoc de doc so trang tu phan trang;
+    neu khong doc duoc thi tai theo tung dot `page_fetch_workers` trang cho den trang rong/lap lai.
+    Cac trang duoc ghi vao checkpoint theo dung thu tu. Tra ve None neu can quay ve cach bam
+    'Next' (thieu requests, bang khong co trong HTML tinh, hoac mot trang tai loi).
+    """
+    cfg = config['scraping']
+    if http_fetch is None or not http_fetch.is_available() or not cfg.get('page_url_template'):
+        return None
+    first_html = http_fetch.fetch_html(cfg['transfer_url'])
+    first_table = extract_listing_tbody(first_html) if first_html else None
+    if not first_table or not parse_listing_page(first_table, 1):
+        logging.info("Khong lay duoc bang danh sach qua HTTP, dung trinh duyet de bam 'Next'.")
+        return None
+    if cache is not None:
+        cache.put(cfg['transfer_url'], first_table, part='page-1')
+    page_count = find_page_count(first_html)
+    logging.info(f"Tai truc tiep theo URL so trang (so trang: {page_count or 'chua ro'}).")
+
+    state = checkpoint or new_checkpoint()
+    data_list = list(resume_rows or []) if checkpoint else []
+    next_page = state['last_page'] + 1
+    workers = max(1, cfg['page_fetch_workers'])
+    last_page = page_count or cfg['max_pages']
+    previous_first = None
+    done = False
+    while not done and next_page <= last_page:
+        # Biet so trang thi tai het mot luot, neu khong thi tai tung dot `workers` trang
+        batch_end = last_page if page_count else min(next_page + workers - 1, last_page)
+        batch = list(range(next_page, batch_end + 1))
+        tables = fetch_listing_pages([p for p in batch if p != 1], cache)
+        tables[1] = first_table
+        parsed = dict(zip(batch, parse_listing_pages([tables[p] for p in batch])))
+        for page in batch:
+            page_rows = parsed[page]
+            if page_rows is None:
+                logging.warning(f"Tai trang {page} qua HTTP that bai, chuyen sang bam 'Next' tu checkpoint.")
+                return None
+            renumber(page_rows, state['next_order'])
+            # Trang vuot qua so trang thuc te: rong hoac lap lai trang truoc
+            if not page_rows or page_rows[0]['Player'] == previous_first:
+                done = True
+                break
+            previous_first = page_rows[0]['Player']
+            data_list.extend(page_rows)
+            append_page_rows(page, page_rows)
+            state['last_page'] = page
+            state['next_order'] += len(page_rows)
+            state['cursor'] = page_url(page + 1)
+            save_checkpoint(state)
+            logging.info(f"Trang {page}: {len(page_rows)} hang.")
+        next_page = batch_end + 1
+
+    state['complete'] = True
+    save_checkpoint(state)
+    if cache is not None:
+        cache.put(cfg['transfer_url'], str(state['last_page']), part='pages')
+    logging.info(f"Da tai {state['last_page']} trang qua HTTP, {len(data_list)} ban ghi.")
+    return data_list
+
+# --- Checkpoint theo trang ---
+def new_checkpoint():
+    return {
+        'url': config['scraping']['transfer_url'],
+        'last_page': 0, # Trang cuoi cung da ghi xong vao file hang
+        'next_order': 1, # ScrapeOrder cua hang dau tien o trang tiep theo
+        'cursor': config['scraping']['transfer_url'], # URL trinh duyet dang o sau khi sang trang tiep theo
+        'complete': False,
+        'updated_at': time.time()
+    }
+
+def reset_checkpoint():
+    for path in (config['checkpoint_path'], config['checkpoint_rows_path']):
+        if os.path.exists(path):
+            os.remove(path)
+
+def save_checkpoint(state):
+    """Ghi checkpoint (ghi file tam roi doi ten de khong bao gio de lai file do)."""
+    state['updated_at'] = time.time()
+    os.makedirs(config['output_folder'], exist_ok=True)
+    tmp_path = config['checkpoint_path'] + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, config['checkpoint_path'])
+
+def append_page_rows(page, rows):
+    """Ghi them cac hang cua mot trang vao file hang va dong bo xuong dia truoc khi cap nhat checkpoint."""
+    os.makedirs(config['output_folder'], exist_ok=True)
+    with open(config['checkpoint_rows_path'], 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'page': page, 'rows': rows}, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def load_checkpoint():
+    """
+    Doc checkpoint va cac hang da luu cua lan chay truoc.
+    Tra ve (state, data_list); state la None neu khong co checkpoint dung duoc.
+    Chi giu cac trang <= last_page: dong ghi do cua trang dang quet khi bi dung bi bo qua.
+    """
+    path = config['checkpoint_path']
+    if not os.path.exists(path):
+        return None, []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Khong doc duoc checkpoint '{path}': {e}. Quet lai tu dau.")
+        reset_checkpoint()
+        return None, []
+    if state.get('url') != config['scraping']['transfer_url'] or \
+            time.time() - state.get('updated_at', 0) > config['checkpoint_max_age']:
+        logging.info("Checkpoint da cu hoac khac URL, quet lai tu trang 1.")
+        reset_checkpoint()
+        return None, []
+
+    last_page = state.get('last_page', 0)
+    pages = {}
+    if os.path.exists(config['checkpoint_rows_path']):
+        with open(config['checkpoint_rows_path'], 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 1 <= record.get('page', 0) <= last_page:
+                    pages[record['page']] = record['rows']
+    if set(pages) != set(range(1, last_page + 1)):
+        logging.warning("File hang cua checkpoint thieu trang, quet lai tu trang 1.")
+        reset_checkpoint()
+        return None, []
+    # Ghi lai file hang chi gom cac trang hop le, de dong ghi do khong dinh vao trang ghi them sau
+    tmp_path = config['checkpoint_rows_path'] + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for page in sorted(pages):
+            f.write(json.dumps({'page': page, 'rows': pages[page]}, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, config['checkpoint_rows_path'])
+    data_list = [row for page in sorted(pages) for row in pages[page]]
+    logging.info(f"Doc checkpoint: {last_page} trang, {len(data_list)} ban ghi"
+                 f"{' (da quet xong)' if state.get('complete') else ''}.")
+    return state, data_list
+
+def seek_to_page(driver, wait, target_page, cursor):
+    """
+    Dua trinh duyet toi trang target_page khi tiep tuc tu checkpoint.
+    Neu cursor la URL rieng cua trang thi mo thang; neu khong thi nhan 'Next' lien tiep
+    ma khong phan tich noi dung cac trang da co. Tra ve False neu khong toi duoc.
+    """
+    cfg = config['scraping']
+    last_row_selector = f"{cfg['player_table_selector']} {cfg['player_row_selector']}:last-child"
+    if cursor and cursor.rstrip('/') != cfg['transfer_url'].rstrip('/'):
+        logging.info(f"Mo thang trang {target_page} tu checkpoint: {cursor}")
+        driver.get(cursor)
+        return True
+    for current in range(1, target_page):
+        try:
+            last_row = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, last_row_selector)))
+            next_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, cfg['next_page_selector'])))
+            driver.execute_script("arguments[0].click();", next_btn)
+            wait.until(EC.staleness_of(last_row))
+        except (NoSuchElementException, TimeoutException, StaleElementReferenceException):
+            logging.warning(f"Khong the chuyen toi trang {target_page} (dung o trang {current}).")
+            return False
+    logging.info(f"Da chuyen toi trang {target_page} tu checkpoint.")
+    return True
+
 # --- Scraping Function (Thay doi dong khoi tao counter) ---
-def scrape(driver):
+def scrape(driver, cache=None, checkpoint=None, resume_rows=None):
+    """
+    Quet danh sach cau thu theo tung trang.
+    Moi trang quet xong duoc ghi them vao file hang va cap nhat checkpoint ngay,
+    nen neu bi dung giua chung, lan chay sau (truyen `checkpoint`/`resume_rows` tu
+    load_checkpoint) tiep tuc tu trang ke tiep thay vi trang 1.
+    """
     if not driver:
         logging.error("WebDriver khong kha dung de scraping.")
-        return []
-    data_list = []
-    # *** THAY ĐỔI Ở ĐÂY: Khởi tạo từ 1 ***
-    scrape_order_counter = 1
-    # ***********************************
+        return list(resume_rows or [])
     cfg = config['scraping']
     wait = WebDriverWait(driver, cfg['wait_time'])
     try:
+        wait_turn(cfg['transfer_url'])
         driver.get(cfg['transfer_url'])
         logging.info(f"Da truy cap URL: {cfg['transfer_url']}")
     except Exception as e:
         logging.error(f"Loi tai URL {cfg['transfer_url']}: {e}")
-        return []
-
-    page = 1
+        return list(resume_rows or [])
+
+    state = checkpoint or new_checkpoint()
+    data_list = list(resume_rows or []) if checkpoint else []
+    page = state['last_page'] + 1
+    if page > 1 and not seek_to_page(driver, wait, page, state.get('cursor')):
+        logging.warning("Khong tiep tuc duoc tu checkpoint, quet lai tu trang 1.")
+        reset_checkpoint()
+        state, data_list, page = new_checkpoint(), [], 1
+        driver.get(cfg['transfer_url'])
+    scrape_order_counter = state['next_order']
     last_known_element = None
     while True:
         logging.info(f"--- Bat dau quet trang {page} ---")
@@ -141,64 +541,58 @@ def scrape(driver):
             last_row_selector = f"{cfg['player_table_selector']} {cfg['player_row_selector']}:last-child"
             last_known_element = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, last_row_selector)))
             logging.debug(f"Bang va hang cuoi trang {page} da hien thi.")
-            time.sleep(1.5)
 
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
-            table_body = soup.select_one(cfg['player_table_selector'])
-            if not table_body:
-                logging.warning(f"Khong tim thay table body tren trang {page}. Ket thuc quet.")
-                break
-            rows = table_body.select(cfg['player_row_selector'])
-            if not rows:
+            entry = cache.get(cfg['transfer_url'], f'page-{page}') if cache else None
+            if entry is not None and entry.fresh:
+                logging.info(f"Dung cache cho trang {page}.")
+                table_html = entry.html
+            else:
+                # Chi dung cay con cua tbody danh sach, khong phan tich ca trang
+                soup = make_soup(driver.page_source, 'tbody', {'id': cfg['player_table_id']})
+                table_body = soup.select_one(cfg['player_table_selector'])
+                if not table_body:
+                    logging.warning(f"Khong tim thay table body tren trang {page}. Ket thuc quet.")
+                    break
+                table_html = str(table_body)
+                if cache is not None:
+                    cache.put(cfg['transfer_url'], table_html, part=f'page-{page}')
+
+            page_rows = parse_listing_page(table_html, scrape_order_counter)
+            if not page_rows:
                 logging.info(f"Khong tim thay hang cau thu nao tren trang {page}. Ket thuc quet.")
                 break
 
-            logging.info(f"Tim thay {len(rows)} hang tren trang {page}.")
-            for row in rows:
-                player = get_element_text(row, cfg['player_name_selector'])
-                if player and player != 'N/a':
-                    nation = get_element_attribute(row, cfg['nation_selector'], 'title')
-                    position = get_element_text(row, cfg['position_selector'])
-                    age = get_element_text(row, cfg['age_selector'])
-                    team = get_element_text(row, cfg['team_name_selector'])
-                    skill_raw = get_element_text(row, cfg['skill_selector'])
-                    potential_raw = get_element_text(row, cfg['potential_selector'])
-                    etv_raw = get_element_text(row, cfg['etv_selector'])
-
-                    skill_parsed = parse_skill_potential(skill_raw)
-                    potential_parsed = parse_skill_potential(potential_raw)
-                    etv_parsed = parse_value(etv_raw)
-
-                    data_list.append({
-                        'ScrapeOrder': scrape_order_counter, # Gan gia tri counter
-                        'Player': player.strip(),
-                        'Nation_Internal': nation,
-                        'Position': position,
-                        'Age': age,
-                        'Team_Internal': team,
-                        'Skill': skill_parsed,
-                        'Potential': potential_parsed,
-                        'ETV_Raw_Internal': etv_raw,
-                        config['processing']['internal_etv_var']: etv_parsed
-                    })
-                    scrape_order_counter += 1 # Tang counter sau khi gan
+            logging.info(f"Tim thay {len(page_rows)} hang tren trang {page}.")
+            data_list.extend(page_rows)
+            scrape_order_counter += len(page_rows)
+            append_page_rows(page, page_rows)
+            state['last_page'] = page
+            state['next_order'] = scrape_order_counter
+            save_checkpoint(state)
 
             # Pagination
             try:
                 driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(0.5)
                 next_btn = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, cfg['next_page_selector'])))
+                wait_turn(cfg['transfer_url'])
                 driver.execute_script("arguments[0].click();", next_btn)
                 logging.info("Da nhan nut 'Next page'.")
                 try:
                     WebDriverWait(driver, cfg['wait_time']).until(EC.staleness_of(last_known_element))
                     logging.debug(f"Noi dung trang {page} da cu.")
                 except TimeoutException:
-                    logging.warning("Noi dung trang cu khong bi stale. Su dung delay co dinh.")
-                    time.sleep(3)
+                    logging.warning("Noi dung trang cu khong bi stale. Cho theo backoff cua bo gioi han.")
+                    back_off(cfg['transfer_url'], 3)
                 page += 1
+                state['cursor'] = driver.current_url
+                save_checkpoint(state)
             except (NoSuchElementException, TimeoutException):
                 logging.info("Khong tim thay nut 'Next page' kha dung. Ket thuc phan trang.")
+                state['complete'] = True
+                save_checkpoint(state)
+                if cache is not None:
+                    # Danh dau da quet het de lan chay sau doc thang tu cache
+                    cache.put(cfg['transfer_url'], str(page), part='pages')
                 break
             except Exception as e_click:
                  logging.error(f"Loi khi nhan nut next page: {e_click}")
@@ -206,7 +600,7 @@ def scrape(driver):
 
         except StaleElementReferenceException:
             logging.warning(f"Loi StaleElementReferenceException tren trang {page}. Thu lai...")
-            time.sleep(1)
+            back_off(cfg['transfer_url'], 1)
             continue
         except TimeoutException as e_page:
             logging.error(f"Loi Timeout khi cho phan tu tren trang {page}: {e_page.msg}")
@@ -215,6 +609,8 @@ def scrape(driver):
              logging.error(f"Loi khong xac dinh khi quet trang {page}: {e}", exc_info=True)
              break
     logging.info(f"Ket thuc qua trinh quet. Thu thap duoc {len(data_list)} ban ghi.")
+    if not state['complete']:
+        logging.warning(f"Quet chua xong (dung sau trang {state['last_page']}); chay lai se tiep tuc tu trang {state['last_page'] + 1}.")
     return data_list
 
 # --- Processing Function (Giu nguyen logic loc theo ten) ---
@@ -232,20 +628,28 @@ def process(scraped_data_list):
     valid_player_set = set()
     try:
         results_file_path = config['part1_file_path']
-        if not os.path.exists(results_file_path):
+        parquet_exists = parquet_path_for is not None and os.path.exists(parquet_path_for(results_file_path))
+        if not os.path.exists(results_file_path) and not parquet_exists:
             logging.error(f"LOI: Khong tim thay tep input: '{results_file_path}'. Vui long kiem tra duong dan.")
             logging.error("Hay dam bao ban chay script nay tu dung vi tri (vi du: ASS-1/BAI-4).")
             return None
-        df_results = pd.read_csv(results_file_path)
-        logging.info(f"Da tai du lieu tu '{results_file_path}'. Shape: {df_results.shape}")
-
         player_col = config['processing']['part1_player_column']
         minutes_col = config['processing']['part1_minutes_column']
+        if read_results is not None:
+            # Chi nap 2 cot can dung, uu tien results.parquet neu co
+            df_results = read_results(results_file_path, columns=[player_col, minutes_col], na_values=['N/a'])
+        else:
+            df_results = pd.read_csv(results_file_path, na_values=['N/a'])
+        logging.info(f"Da tai du lieu tu '{results_file_path}'. Shape: {df_results.shape}")
+
         if player_col not in df_results.columns or minutes_col not in df_results.columns:
             logging.error(f"Cac cot '{player_col}' hoac '{minutes_col}' khong ton tai trong {results_file_path}.")
             return None
 
-        df_results['minutes_numeric'] = pd.to_numeric(df_results[minutes_col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+        if pd.api.types.is_numeric_dtype(df_results[minutes_col]):
+            df_results['minutes_numeric'] = df_results[minutes_col]
+        else:
+            df_results['minutes_numeric'] = pd.to_numeric(df_results[minutes_col].astype(str).str.replace(',', '', regex=False), errors='coerce')
         df_results = df_results.dropna(subset=['minutes_numeric'])
         min_minutes = config['processing']['min_minutes_threshold']
         df_filtered_results = df_results[df_results['minutes_numeric'] >= min_minutes]
@@ -338,13 +742,27 @@ def main():
     """Ham chinh dieu phoi qua trinh scraping va processing."""
     start_time = time.time()
     logging.info("Bat dau scraping va xu ly du lieu (Phien ban 1 tep, loc theo ten)...")
-    scraped_player_data = []
-
-    with get_driver() as driver:
-        if driver:
-            scraped_player_data = scrape(driver)
-        else:
-            logging.error("Khong the lay WebDriver, bo qua buoc scraping.")
+    cache = get_page_cache()
+    checkpoint, resume_rows = load_checkpoint()
+    if checkpoint is not None and checkpoint.get('complete'):
+        scraped_player_data = resume_rows
+    elif checkpoint is None:
+        scraped_player_data = scrape_from_cache(cache)
+    else:
+        scraped_player_data = None
+
+    if scraped_player_data is None:
+        scraped_player_data = scrape_by_page_url(cache, checkpoint, resume_rows)
+
+    if scraped_player_data is None:
+        # Tai truc tiep co the da ghi them trang vao checkpoint truoc khi dung
+        checkpoint, resume_rows = load_checkpoint()
+        scraped_player_data = list(resume_rows)
+        with get_driver() as driver:
+            if driver:
+                scraped_player_data = scrape(driver, cache, checkpoint, resume_rows)
+            else:
+                logging.error("Khong the lay WebDriver, bo qua buoc scraping.")
 
     final_data = process(scraped_player_data)
 
@@ -2,13 +2,19 @@
 import time
 from typing import List, Dict, Optional, Any
 
-from bs4 import BeautifulSoup, Tag
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 def safe_cast_int(value_str: Optional[str], default: int = 0) -> int:
     if not value_str or value_str == 'N/a':
         return default
@@ -51,7 +57,7 @@ def get_soup(url: str, table_id: str, retries: int = 3, delay: int = 5) -> Optio
             WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.ID, table_id)))
             driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             time.sleep(2)
-            soup = BeautifulSoup(driver.page_source, 'html.parser')
+            soup = BeautifulSoup(driver.page_source, HTML_PARSER, parse_only=SoupStrainer('table', id=table_id))
             table_check = soup.find('table', id=table_id)
             if table_check and len(table_check.find_all('tr')) > 1:
                 print(f"[THANH CONG] Da lay duoc noi dung cua bang {table_id}")
@@ -6,18 +6,54 @@ import time, csv, re, pandas as pd
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, ElementClickInterceptedException
 import traceback
 import os
+import sys
+import queue
+import threading
 import unicodedata
-import random
+from contextlib import nullcontext
+from bs4 import BeautifulSoup
+
+# Dung chung cache trang, tai HTTP va pool WebDriver voi BAI-1
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'BAI-1'))
+try:
+    from page_cache import PageCache
+except ImportError:
+    PageCache = None
+try:
+    import http_fetch
+except ImportError:
+    http_fetch = None
+try:
+    from driver_pool import DriverPool
+except ImportError:
+    DriverPool = None
+try:
+    from rate_limit import configure_rate_limiter
+except ImportError:
+    configure_rate_limiter = None
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 MAIN_URL = "https://www.footballtransfers.com/us/players/uk-premier-league"
 RESULTS_CSV_PATH = "Report/OUTPUT_BAI1/results.csv" 
 ALL_PLAYERS_FILE = "Report/OUTPUT_BAI4/all_players_scraped.csv" 
 OVER_900_FILE = "Report/OUTPUT_BAI4/players_over_900_filtered.csv" 
+DETAIL_CACHE_DIR = "Report/OUTPUT_BAI4/detail_cache"
+DETAIL_CACHE_TTL = 24 * 3600 # Giay
 WAIT_TIMEOUT = 15 
 SHORT_WAIT_TIMEOUT = 7 
-TIME_SLEEP_AFTER_PAGE_LOAD = 3 
-TIME_SLEEP_DETAIL_PAGE = 3 
+DETAIL_WORKERS = 6 # So luong tai trang chi tiet dong thoi
+DETAIL_START_RATE = 2.0 # Request/giay luc dau; bo gioi han tu tang/giam theo phan hoi cua server
 NEXT_BUTTON_SELECTOR = "button.pagination_next_button:not([disabled])"
+PLAYER_ROW_SELECTOR = "tbody#player-table-body tr"
+# Chon thang o "Highest ETV" tren trang chi tiet thay vi duyet tat ca div.d-col
+HIGHEST_ETV_SELECTOR = 'div.d-col:has(span.txt:-soup-contains("Highest ETV")) span.player-tag'
+HIGHEST_ETV_XPATH = ("//div[contains(concat(' ', normalize-space(@class), ' '), ' d-col ')]"
+                     "[.//span[contains(@class, 'txt')][contains(., 'Highest ETV')]]"
+                     "//span[contains(@class, 'player-tag')]")
 
 def normalize_name(name: str) -> str:
     if not isinstance(name, str):
@@ -67,151 +103,174 @@ def load_eligible_players(min_minutes=900):
         traceback.print_exc()
         return eligible_players_set
 
-options = webdriver.ChromeOptions()
-options.add_argument("--start-maximized")
-options.add_argument("--headless")
-driver = webdriver.Chrome(options=options)
+def text_of(row, selector, default="N/A"):
+    elem = row.select_one(selector)
+    return elem.get_text(strip=True) if elem else default
 
-all_results = [] 
-eligible_players_set = load_eligible_players()
+def parse_listing_rows(page_html, page_num):
+    """Doc cac hang cua bang danh sach tu HTML trang (mot lan phan tich, khong goi Selenium tung o)."""
+    soup = BeautifulSoup(page_html, HTML_PARSER)
+    players = []
+    for row in soup.select(PLAYER_ROW_SELECTOR):
+        link_elem = row.select_one("td.td-player div.text > a")
+        if link_elem is None:
+            continue
+        name = link_elem.get_text(strip=True)
+        detail_url = link_elem.get("href")
+        if not name or not detail_url:
+            continue
+        if detail_url.startswith("/"):
+            detail_url = "https://www.footballtransfers.com" + detail_url
+        current_etv_text = text_of(row, "span.player-tag")
+        players.append({
+            "Player": name,
+            "Team": text_of(row, "td.td-team span.td-team__teamname"),
+            "Age": text_of(row, "td.m-hide.age").split("-")[0].strip(),
+            "Position": text_of(row, "td.td-player span.sub-text"),
+            "TransferValue_EUR_Millions": parse_etv(current_etv_text),
+            "detail_url": detail_url,
+            "page": page_num,
+        })
+    return players
 
-try:
+def extract_highest_etv(page_html):
+    """Lay chuoi Highest ETV tu HTML trang chi tiet (None neu khong co trong HTML)."""
+    elem = BeautifulSoup(page_html, HTML_PARSER).select_one(HIGHEST_ETV_SELECTOR)
+    return elem.get_text(strip=True) if elem else None
+
+class DetailFetcher:
+    """
+    Lay Highest ETV cua trang chi tiet cau thu.
+    Thu tu: cache theo URL cau thu -> HTTP (requests) -> WebDriver trong pool voi cho tuong minh
+    (presence cua o Highest ETV) thay vi sleep co dinh.
+    """
+    def __init__(self, workers):
+        self.cache = None
+        if PageCache is not None:
+            try:
+                self.cache = PageCache(DETAIL_CACHE_DIR, ttl=DETAIL_CACHE_TTL)
+            except OSError as e:
+                print(f"Khong the tao cache trang chi tiet: {e}")
+        self.use_http = http_fetch is not None and http_fetch.is_available()
+        # http_fetch va nhanh trinh duyet ben duoi dung chung bo gioi han theo host (backoff khi 429/5xx)
+        self.limiter = configure_rate_limiter(rate=DETAIL_START_RATE, max_concurrency=workers) \
+            if configure_rate_limiter is not None else None
+        self.pool = DriverPool(size=workers, lean=True) if DriverPool is not None else None
+
+    def _from_browser(self, url):
+        if self.pool is None:
+            return None, None
+        with self.pool.driver() as driver:
+            try:
+                with self.limiter.slot(url) if self.limiter is not None else nullcontext():
+                    start = time.monotonic()
+                    driver.get(url)
+                    elem = WebDriverWait(driver, SHORT_WAIT_TIMEOUT).until(
+                        EC.presence_of_element_located((By.XPATH, HIGHEST_ETV_XPATH)))
+                if self.limiter is not None:
+                    self.limiter.success(url, time.monotonic() - start)
+                return elem.text.strip(), driver.page_source
+            except TimeoutException:
+                if self.limiter is not None:
+                    self.limiter.failure(url)
+                return None, None
+
+    def _fetch(self, url):
+        if self.use_http:
+            page_html = http_fetch.fetch_html(url)
+            if page_html:
+                highest = extract_highest_etv(page_html)
+                if highest is not None:
+                    return highest, page_html
+        return self._from_browser(url)
+
+    def highest_etv(self, url):
+        entry = self.cache.get(url, "detail") if self.cache is not None else None
+        if entry is not None and entry.fresh:
+            highest = extract_highest_etv(entry.html)
+            if highest is not None:
+                return highest
+        highest, page_html = self._fetch(url)
+        if highest is not None and page_html and self.cache is not None:
+            self.cache.put(url, page_html, part="detail")
+        return highest
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+def detail_worker(fetcher, detail_queue, results, results_lock):
+    """Consumer: lay cau thu tu hang doi, tai Highest ETV va ghi ket qua theo thu tu quet."""
+    while True:
+        item = detail_queue.get()
+        if item is None:
+            detail_queue.task_done()
+            return
+        order, player = item
+        try:
+            highest_etv_parsed = parse_etv(fetcher.highest_etv(player["detail_url"]) or "")
+        except Exception as e_detail:
+            print(f"    Loi khi lay trang chi tiet cua {player['Player']}: {type(e_detail).__name__} - {e_detail}")
+            highest_etv_parsed = None
+        if highest_etv_parsed is None:
+            highest_etv_parsed = player["TransferValue_EUR_Millions"]
+        record = {k: v for k, v in player.items() if k not in ("detail_url", "page")}
+        record["Highest_ETV_EUR_Millions"] = highest_etv_parsed
+        with results_lock:
+            results[order] = record
+            done = len(results)
+        print(f" Da thu thap {player['Player']} (trang {player['page']}, {done} cau thu): "
+              f"Current ETV = {player['TransferValue_EUR_Millions']}MEUR, Highest = {highest_etv_parsed}MEUR")
+        detail_queue.task_done()
+
+def scrape_listing(driver, detail_queue):
+    """
+    Producer: duyet cac trang danh sach, dua tung cau thu vao hang doi ngay khi doc xong trang
+    de cac worker tai trang chi tiet song song voi viec chuyen trang.
+    Tra ve so cau thu da dua vao hang doi.
+    """
     print(f"Dang tai trang dau tien: {MAIN_URL}")
     driver.get(MAIN_URL)
     WebDriverWait(driver, WAIT_TIMEOUT).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "tbody#player-table-body"))
+        EC.presence_of_element_located((By.CSS_SELECTOR, PLAYER_ROW_SELECTOR))
     )
     print("Trang danh sach da tai, tim thay bang cau thu.")
-    time.sleep(TIME_SLEEP_AFTER_PAGE_LOAD)
 
     page_num = 1
-    total_rows_processed_across_pages = 0
-    total_players_collected_before_filter = 0
-
+    queued = 0
     while True:
         print(f"\nDang xu ly du lieu trang {page_num}...")
         try:
-            WebDriverWait(driver, WAIT_TIMEOUT).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "tbody#player-table-body"))
+            first_row = WebDriverWait(driver, WAIT_TIMEOUT).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, PLAYER_ROW_SELECTOR))
             )
         except TimeoutException:
             print(f"    Timeout khi cho bang du lieu tren trang {page_num}. Co the da het trang hoac loi tai trang.")
             break
 
-        rows_on_current_page = driver.find_elements(By.CSS_SELECTOR, "tbody#player-table-body tr")
-        print(f"    Tim thay {len(rows_on_current_page)} cau thu tren trang {page_num}.")
-        if not rows_on_current_page and page_num > 1:
+        players = parse_listing_rows(driver.page_source, page_num)
+        print(f"    Tim thay {len(players)} cau thu tren trang {page_num}.")
+        if not players and page_num > 1:
             print("    Khong tim thay cau thu nao tren trang nay, co the da het du lieu.")
             break
+        for player in players:
+            detail_queue.put((queued, player))
+            queued += 1
 
-        for i, row in enumerate(rows_on_current_page):
-            name, detail_url, team, age, pos = "N/A", None, "N/A", "N/A", "N/A"
-            current_etv_text, highest_etv_text = "N/A", "N/A"
-            current_etv_parsed, highest_etv_parsed = None, None
-            
-            total_rows_processed_across_pages += 1
-
-            try:
-                try:
-                    link_elem = row.find_element(By.CSS_SELECTOR, "td.td-player div.text > a")
-                    name = link_elem.text.strip()
-                    detail_url = link_elem.get_attribute("href")
-                except NoSuchElementException:
-                    continue
-
-                if not name or not detail_url:
-                    continue
-                
-                print(f"    Dang xu ly: {name} (Hang {i+1} - Trang {page_num})") 
-                
-                try:
-                    team = row.find_element(By.CSS_SELECTOR, "td.td-team span.td-team__teamname").text.strip()
-                except NoSuchElementException: team = "N/A"
-
-                try:
-                    age_raw_text = row.find_element(By.CSS_SELECTOR, "td.m-hide.age").text.strip()
-                    age = age_raw_text.split("-")[0].strip()
-                except NoSuchElementException: age = "N/A"
-
-                try:
-                    pos = row.find_element(By.CSS_SELECTOR, "td.td-player span.sub-text").text.strip()
-                except NoSuchElementException: pos = "N/A"
-                
-                try:
-                    etv_elem = row.find_element(By.CSS_SELECTOR, "span.player-tag")
-                    current_etv_text = etv_elem.text.strip()
-                except NoSuchElementException: current_etv_text = "N/A"
-                
-                current_etv_parsed = parse_etv(current_etv_text)
-                #Highest ETV
-                main_window_handle = driver.current_window_handle
-                driver.execute_script("window.open('');")
-                driver.switch_to.window(driver.window_handles[1])
-                driver.get(detail_url)
-                
-                time.sleep(TIME_SLEEP_DETAIL_PAGE) 
-
-                highest_etv_text = "N/A"
-                divs = driver.find_elements(By.CSS_SELECTOR, "div.d-col")
-                for div_element in divs: 
-                    try:
-                        label = div_element.find_element(By.CSS_SELECTOR, "span.txt")
-                        if "Highest ETV" in label.text: 
-                            value = div_element.find_element(By.CSS_SELECTOR, "span.player-tag")
-                            highest_etv_text = value.text.strip()
-                            break
-                    except: 
-                        continue
-                
-                driver.close()
-                driver.switch_to.window(main_window_handle)
-
-                highest_etv_parsed = parse_etv(highest_etv_text)
-                if highest_etv_parsed is None:
-                    highest_etv_parsed = current_etv_parsed
-                
-                # Them du lieu vao all_results
-                all_results.append({
-                    "Player": name,
-                    "Team": team,
-                    "Age": age,
-                    "Position": pos,
-                    "TransferValue_EUR_Millions": current_etv_parsed,
-                    "Highest_ETV_EUR_Millions": highest_etv_parsed
-                })
-                total_players_collected_before_filter += 1
-                print(f" Da thu thap {name}: Current ETV = {current_etv_parsed}MEUR, Highest = {highest_etv_parsed}MEUR")
-                time.sleep(random.uniform(0.5, 1.2))
-
-            except TimeoutException as e_timeout_row:
-                print(f" Timeout khi xu ly chi tiet cho {name if name != 'N/A' else f'hang {i+1}'}. Loi: {e_timeout_row}. Bo qua.")
-                if driver.current_window_handle != main_window_handle and len(driver.window_handles) > 1:
-                    driver.close()
-                    driver.switch_to.window(main_window_handle)
-                continue
-            except Exception as e_row:
-                print(f"    Loi khi xu ly chi tiet cho {name if name != 'N/A' else f'hang {i+1}'}: {type(e_row).__name__} - {e_row}. Bo qua.")
-                if driver.current_window_handle != main_window_handle and len(driver.window_handles) > 1:
-                    driver.close()
-                    driver.switch_to.window(main_window_handle)
-                continue
-        
-        print(f"    Da xu ly {len(rows_on_current_page)} hang tren trang {page_num}. Tong so cau thu da thu thap: {total_players_collected_before_filter}")
         try:
             next_button = WebDriverWait(driver, SHORT_WAIT_TIMEOUT).until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, NEXT_BUTTON_SELECTOR))
             )
             print(f"    Tim thay nut 'Next page'. Dang chuyen sang trang {page_num + 1}...")
             driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-            time.sleep(0.5)
             try:
                 next_button.click()
             except ElementClickInterceptedException:
                 print("        Click thuong bi chan, thu click bang JavaScript...")
                 driver.execute_script("arguments[0].click();", next_button)
-
+            # Cho bang cu bi thay the thay vi sleep co dinh
+            WebDriverWait(driver, WAIT_TIMEOUT).until(EC.staleness_of(first_row))
             page_num += 1
-            time.sleep(TIME_SLEEP_AFTER_PAGE_LOAD)
 
         except TimeoutException:
             print("Khong tim thay nut 'Next page' hoac da het trang. Ket thuc thu thap du lieu tu web.")
@@ -220,18 +279,44 @@ try:
             print(f"Loi trong qua trinh phan trang: {type(e_pagination).__name__} - {e_pagination}")
             traceback.print_exc()
             break
+    return queued
 
-    print(f"\nHoan tat cao du lieu tu tat ca cac trang.")
-    print(f"    Tong so hang da duyet qua tren web: {total_rows_processed_across_pages}")
-    print(f"    Tong so cau thu co du lieu duoc thu thap (truoc khi loc): {total_players_collected_before_filter}")
+options = webdriver.ChromeOptions()
+options.add_argument("--start-maximized")
+options.add_argument("--headless")
+driver = webdriver.Chrome(options=options)
 
+all_results = [] 
+eligible_players_set = load_eligible_players()
+detail_results = {}
+detail_results_lock = threading.Lock()
+detail_queue = queue.Queue()
+fetcher = DetailFetcher(DETAIL_WORKERS)
+workers = [
+    threading.Thread(target=detail_worker, args=(fetcher, detail_queue, detail_results, detail_results_lock), daemon=True)
+    for _ in range(DETAIL_WORKERS)
+]
+for worker in workers:
+    worker.start()
+
+try:
+    total_players_queued = scrape_listing(driver, detail_queue)
+    print(f"\nHoan tat duyet danh sach: {total_players_queued} cau thu, dang cho cac trang chi tiet...")
 except Exception as e_global:
     print(f"Loi tong the nghiem trong trong qua trinh cao du lieu: {e_global}")
     traceback.print_exc()
 finally:
     if 'driver' in locals() and driver:
         driver.quit()
-        print("\nTrinh duyet da dong.")
+        print("\nTrinh duyet danh sach da dong.")
+    for _ in workers:
+        detail_queue.put(None)
+    for worker in workers:
+        worker.join()
+    fetcher.shutdown()
+
+all_results = [detail_results[order] for order in sorted(detail_results)]
+print(f"    Tong so cau thu co du lieu duoc thu thap (truoc khi loc): {len(all_results)}")
 
 if all_results:
     df_all = pd.DataFrame(all_results)
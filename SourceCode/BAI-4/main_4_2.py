@@ -1,4 +1,4 @@
-import os, traceback, joblib
+import os, sys, traceback, joblib
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -13,6 +13,17 @@ from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 from scipy.stats import randint, uniform
 
+# Dung chung bo doc ket qua voi BAI-1 (uu tien results.parquet neu khong cu hon results.csv)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'BAI-1'))
+try:
+    from results_io import read_results
+except ImportError:
+    read_results = None
+try:
+    from config import HEADER_ORDER
+except ImportError:
+    HEADER_ORDER = None
+
 # --- Config ---
 DATA_STATS = "Report/OUTPUT_BAI1/results.csv"
 DATA_VALS = "Report/OUTPUT_BAI4/players_over_900_filtered.csv"
@@ -27,9 +38,22 @@ CAT_COLS = ["Position"]
 
 os.makedirs(PLOTS_PATH, exist_ok=True)
 
+def read_stats(stats_path, id_cols):
+    # Chi nap Player (de ghep) va cac cot dac trung, bo cac cot dinh danh con lai
+    columns = [c for c in HEADER_ORDER if c == "Player" or c not in id_cols] if HEADER_ORDER else None
+    if read_results is not None:
+        stats = read_results(stats_path, columns=columns, na_values=["N/a"])
+    else:
+        usecols = (lambda c: c.strip() in set(columns)) if columns else None
+        stats = pd.read_csv(stats_path, na_values=["N/a"], usecols=usecols)
+    # Team/Nation/Position trong Parquet la category: doi ve object de fillna("Missing") sau merge khong loi
+    for col in stats.select_dtypes("category"):
+        stats[col] = stats[col].astype(object)
+    return stats
+
 def load_data(stats_path, val_path, target_col):
     try:
-        stats, vals = pd.read_csv(stats_path), pd.read_csv(val_path)
+        stats, vals = read_stats(stats_path, ID_COLS), pd.read_csv(val_path)
         if target_col not in vals.columns: return None
         merged = pd.merge(stats, vals, on="Player", how="right")
         merged.dropna(subset=[target_col], inplace=True)
@@ -41,10 +65,7 @@ def preprocess_data(df, target, id_cols, cat_cols):
     y = df[f"{target}_log"]
     X = df.drop(columns=[target, f"{target}_log"] + [c for c in id_cols if c in df.columns])
     X.replace("N/a", np.nan, inplace=True)
-
-    for col in X.select_dtypes("object"):
-        cleaned = pd.to_numeric(X[col].astype(str).str.replace(",", ""), errors="coerce")
-        if cleaned.notna().mean() > 0.7: X[col] = cleaned
+    # Cot chi so da co kieu so theo STAT_SCHEMA tu BAI-1, khong can doan cot so nua
 
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     num_cols = X_train.select_dtypes("number").columns.tolist()